@@ -0,0 +1,196 @@
+"""
+複数のリポジトリのサマリーを1つのプロセスでまとめて生成するバッチ処理
+
+リポジトリごとにインタープリタを起動する代わりに、プロセスプールで並列に処理する。
+キャッシュは同じ SQLite ファイルを全ワーカーで共有し、除外パターンのコンパイル結果は
+ワーカープロセス内でリポジトリをまたいで再利用される。
+"""
+import json
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from cache import RenderCache
+from config import BATCH_MAX_PARALLEL, DEFAULT_OUTPUT_FILENAME
+from logging_config import get_logger
+from main import generate_summary
+from report import RunReport
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class BatchJob:
+    """
+    1つのリポジトリに対するサマリー生成の指定
+
+    Attributes:
+        root_dir: リポジトリのルートディレクトリ
+        output_path: 出力ファイルのパス
+        exclude_dirs: 除外するディレクトリリスト
+        include_extensions: 含めるファイル拡張子リスト
+        target_files: 取得対象のファイル名リスト
+        options: generate_summary に渡すその他のキーワード引数
+        use_cache: このリポジトリで処理結果のキャッシュを使うか（リポジトリごとのプリセットの設定）
+    """
+    root_dir: Path
+    output_path: Path
+    exclude_dirs: List[str] = field(default_factory=list)
+    include_extensions: List[str] = field(default_factory=list)
+    target_files: List[str] = field(default_factory=list)
+    options: Dict[str, Any] = field(default_factory=dict)
+    use_cache: bool = True
+
+
+def load_manifest(manifest_path: Path) -> List[Dict[str, Optional[Path]]]:
+    """
+    マニフェストファイルからリポジトリの一覧を読み込む
+
+    マニフェストは JSON（パス文字列または {"root": ..., "output": ...} のリスト）か、
+    1行に1つのパスを書いたテキストファイル（# で始まる行は無視）。
+    相対パスはマニフェストファイルのあるディレクトリを基準にする。
+
+    Args:
+        manifest_path: マニフェストファイルのパス
+
+    Returns:
+        List[Dict[str, Optional[Path]]]: "root" と "output"（指定がなければ None）の辞書のリスト
+    """
+    base_dir = manifest_path.resolve().parent
+    text = manifest_path.read_text(encoding='utf-8')
+    if manifest_path.suffix == ".json":
+        items = json.loads(text)
+    else:
+        items = [line.strip() for line in text.splitlines() if line.strip() and not line.strip().startswith("#")]
+
+    entries = []
+    for item in items:
+        if isinstance(item, str):
+            item = {"root": item}
+        output = item.get("output")
+        entries.append({
+            "root": base_dir / item["root"],
+            "output": base_dir / output if output else None,
+        })
+    return entries
+
+
+def default_output_paths(root_dirs: List[Path], output_dir: Path) -> List[Path]:
+    """
+    リポジトリごとの出力ファイルのパスを決める
+
+    出力ファイル名はリポジトリのディレクトリ名に .md を付けたもの。同名のリポジトリがある場合は
+    連番を付けて重複を避ける。
+
+    Args:
+        root_dirs: リポジトリのルートディレクトリのリスト
+        output_dir: 出力ディレクトリ
+
+    Returns:
+        List[Path]: 出力ファイルのパスのリスト
+    """
+    used = set()
+    output_paths = []
+    for root_dir in root_dirs:
+        stem = root_dir.resolve().name or Path(DEFAULT_OUTPUT_FILENAME).stem
+        name = f"{stem}.md"
+        index = 1
+        while name in used:
+            index += 1
+            name = f"{stem}-{index}.md"
+        used.add(name)
+        output_paths.append(output_dir / name)
+    return output_paths
+
+
+def summarize_repositories(jobs: List[BatchJob], max_parallel: int = BATCH_MAX_PARALLEL,
+                           use_cache: bool = True, cache_path: Optional[Path] = None,
+                           hash_cache: bool = False) -> Dict[str, Any]:
+    """
+    複数のリポジトリのサマリーを生成し、集計したレポートを返す
+
+    同時に処理するリポジトリ数を max_parallel に制限し、ディスクの読み込みが飽和しないようにする。
+    キャッシュファイルは全ワーカーで共有する。書き込みは少しずつまとめてコミットされるため、
+    処理に時間のかかるリポジトリがあっても他のワーカーはロックを待たない。
+    あるリポジトリでエラーが発生しても、他のリポジトリの処理は続ける。
+
+    Args:
+        jobs: リポジトリごとの指定
+        max_parallel: 同時に処理するリポジトリ数
+        use_cache: 処理結果のキャッシュを使うか
+        cache_path: 共有するキャッシュファイルのパス。None の場合は既定の場所
+        hash_cache: mtime が変わったファイルも内容のハッシュが一致すればキャッシュを使うか
+
+    Returns:
+        Dict[str, Any]: リポジトリごとの結果と合計を含む JSON に変換可能なレポート
+    """
+    start = time.perf_counter()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    if max_parallel <= 1 or len(jobs) <= 1:
+        for index, job in enumerate(jobs):
+            results[index] = summarize_job(job, use_cache, cache_path, hash_cache)
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_parallel, len(jobs))) as pool:
+            futures = {pool.submit(summarize_job, job, use_cache, cache_path, hash_cache): index
+                       for index, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                logger.info(f"Finished {results[futures[future]]['root']}")
+
+    if use_cache and any(job.use_cache for job in jobs):
+        # ワーカーでは省略したサイズ上限の適用をここで1回だけ行う
+        try:
+            RenderCache(cache_path).close()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Failed to apply the cache size limit: {e}")
+
+    succeeded = [result for result in results if result["status"] == "ok"]
+    return {
+        "repositories": results,
+        "totals": {
+            "repositories": len(results),
+            "succeeded": len(succeeded),
+            "failed": len(results) - len(succeeded),
+            "files": sum(result["files"] for result in succeeded),
+            "total_chars": sum(result["total_chars"] for result in succeeded),
+            "total_tokens": sum(result["total_tokens"] for result in succeeded),
+            "seconds": round(time.perf_counter() - start, 6),
+        },
+    }
+
+
+def summarize_job(job: BatchJob, use_cache: bool = True, cache_path: Optional[Path] = None,
+                  hash_cache: bool = False) -> Dict[str, Any]:
+    """
+    1つのリポジトリのサマリーを生成する（プロセスプールのワーカーで実行される）
+
+    Args:
+        job: リポジトリの指定
+        use_cache: 処理結果のキャッシュを使うか（False の場合は job.use_cache によらず使わない）
+        cache_path: 共有するキャッシュファイルのパス
+        hash_cache: mtime が変わったファイルも内容のハッシュが一致すればキャッシュを使うか
+
+    Returns:
+        Dict[str, Any]: リポジトリの実行記録。失敗した場合は status が "error"
+    """
+    report = RunReport()
+    start = time.perf_counter()
+    cache = None
+    try:
+        # キャッシュを開けない場合も、このリポジトリの失敗として記録する
+        if use_cache and job.use_cache:
+            cache = RenderCache(cache_path, hash_contents=hash_cache)
+        job.output_path.parent.mkdir(parents=True, exist_ok=True)
+        generate_summary(job.root_dir, job.exclude_dirs, job.include_extensions, job.output_path.name,
+                         job.output_path.parent, job.target_files, cache=cache, report=report, **job.options)
+    except Exception as e:
+        logger.error(f"Failed to summarize {job.root_dir}: {e}")
+        return {"root": str(job.root_dir), "status": "error", "error": str(e)}
+    finally:
+        if cache is not None:
+            cache.close(evict=False)
+    report.add_time("total", time.perf_counter() - start)
+    return {"root": str(job.root_dir), "status": "ok", **report.to_dict(job.root_dir)}
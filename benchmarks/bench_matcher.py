@@ -0,0 +1,93 @@
+"""
+パスマッチャーのマイクロベンチマーク
+
+デフォルト設定の除外パターン・対象ファイルに対して、合成した相対パスを判定する。
+ファイルごとに fnmatch をパターンの数だけ呼び出す従来の判定と、
+コンパイル済みの PathMatcher による判定を比較する。
+
+    python -m benchmarks.bench_matcher [--paths 1000000]
+"""
+import argparse
+import fnmatch
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import DEFAULT_TARGET_FILES, EXCLUDE_DIRS, EXCLUDE_FILES, SUPPORTED_EXTENSIONS  # noqa: E402
+from matcher import compile_matcher  # noqa: E402
+
+DIR_NAMES = ["src", "lib", "app", "components", "utils", "tests", "docs", "node_modules", "build", "pkg.egg-info"]
+FILE_NAMES = ["index.ts", "main.py", "app.config.ts", "README.md", "style.min.css", "module.pyc", "notes.txt",
+              "package.json", "server.log", "view.tsx", "data.db", "backup.py~"]
+
+
+def make_paths(count: int, seed: int = 0) -> List[str]:
+    """深さ1〜6のランダムな相対パスを生成する"""
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        parts = [rng.choice(DIR_NAMES) for _ in range(rng.randint(0, 5))]
+        parts.append(f"{rng.randint(0, 99)}_{rng.choice(FILE_NAMES)}")
+        paths.append("/".join(parts))
+    return paths
+
+
+def legacy_select(paths: List[str]) -> int:
+    """ディレクトリ名の完全一致と、ファイルごとの fnmatch ループによる従来の判定"""
+    exclude_dirs = set(EXCLUDE_DIRS)
+    extensions = set(SUPPORTED_EXTENSIONS)
+    selected = 0
+    for path in paths:
+        parts = path.split("/")
+        name = parts[-1]
+        if any(part in exclude_dirs for part in parts[:-1]):
+            continue
+        if any(fnmatch.fnmatch(name, pattern) for pattern in EXCLUDE_FILES):
+            continue
+        if Path(name).suffix in extensions or name in DEFAULT_TARGET_FILES:
+            selected += 1
+    return selected
+
+
+def compiled_select(paths: List[str]) -> int:
+    """コンパイル済みの PathMatcher による判定"""
+    exclude_dirs = compile_matcher(tuple(EXCLUDE_DIRS))
+    excluded_files = compile_matcher(tuple(EXCLUDE_FILES))
+    targets = compile_matcher(tuple(DEFAULT_TARGET_FILES))
+    extensions = frozenset(SUPPORTED_EXTENSIONS)
+    selected = 0
+    for path in paths:
+        if exclude_dirs.matches_path(path) or excluded_files.matches(path):
+            continue
+        name = path.rsplit("/", 1)[-1]
+        dot = name.rfind(".")
+        if (dot > 0 and name[dot:] in extensions) or targets.matches(path):
+            selected += 1
+    return selected
+
+
+def measure(func, paths: List[str]) -> float:
+    start = time.perf_counter()
+    selected = func(paths)
+    elapsed = time.perf_counter() - start
+    print(f"{func.__name__:16s} {elapsed:8.2f} s  {len(paths) / elapsed / 1e6:6.2f} M paths/s  selected={selected:,}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paths", type=int, default=1_000_000, help="判定するパスの数")
+    args = parser.parse_args()
+
+    paths = make_paths(args.paths)
+    legacy = measure(legacy_select, paths)
+    compiled = measure(compiled_select, paths)
+    print(f"speedup: {legacy / compiled:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+generate_summary のピークメモリ計測
+
+合成ツリー（デフォルト 1 GB）を生成し、tracemalloc でストリーミング書き込みの
+ピークメモリを計測する。--compare を指定すると、出力全体を文字列として
+組み立てる従来方式とも比較する（出力サイズの数倍のメモリを使うので注意）。
+
+    python -m benchmarks.bench_memory --size-mb 1024
+"""
+import argparse
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from main import collect_files, generate_markdown_output, generate_summary  # noqa: E402
+from benchmarks.synthetic import make_sized_tree  # noqa: E402
+
+
+def run_streaming(root_dir: Path, output_dir: Path) -> None:
+    generate_summary(root_dir, [], [".py"], "summary.md", output_dir, [])
+
+
+def run_in_memory(root_dir: Path, output_dir: Path) -> None:
+    file_paths = collect_files(root_dir, [], [".py"], [])
+    content = generate_markdown_output(root_dir, file_paths, "")
+    (output_dir / "summary_in_memory.md").write_text(content, encoding='utf-8')
+
+
+def measure(label: str, func, *args) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:10s} {elapsed:8.2f} s  peak {peak / 1024 / 1024:10.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=1024, help="生成するツリーの合計サイズ (MiB)")
+    parser.add_argument("--file-kb", type=int, default=1024, help="1ファイルあたりのサイズ (KiB)")
+    parser.add_argument("--compare", action="store_true", help="従来のメモリ上での組み立てとも比較する")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as output_dir:
+        file_count = make_sized_tree(Path(source_dir), args.size_mb * 1024 * 1024, args.file_kb * 1024)
+        print(f"{file_count} files, {args.size_mb} MiB")
+        measure("streaming", run_streaming, Path(source_dir), Path(output_dir))
+        if args.compare:
+            measure("in-memory", run_in_memory, Path(source_dir), Path(output_dir))
+
+
+if __name__ == '__main__':
+    main()
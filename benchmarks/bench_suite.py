@@ -0,0 +1,188 @@
+"""
+合成リポジトリでのフェーズごとの所要時間とピークメモリの計測
+
+条件を指定して合成リポジトリを生成し、generate_summary の各フェーズ（walk, tree, read, render, write）の
+所要時間と、区間ごとのピークメモリ（walk, tree, output）を計測する。collect_files,
+calculate_file_stats, generate_markdown_output も個別に計測する。
+
+--json で結果を保存し、次回 --baseline に渡すと、許容範囲（--tolerance）を超えて遅くなった項目を報告して
+終了コード 1 で終わる。--profile を指定すると generate_summary を cProfile で計測する。
+
+    python -m benchmarks.bench_suite --files 20000 --depth 6 --excluded-share 0.3 --binary-share 0.05
+    python -m benchmarks.bench_suite --json baseline.json
+    python -m benchmarks.bench_suite --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import EXCLUDE_DIRS  # noqa: E402
+from main import (  # noqa: E402
+    calculate_file_stats, collect_files, generate_markdown_output, generate_summary
+)
+from profiling import profile_run  # noqa: E402
+from report import RunReport  # noqa: E402
+from benchmarks.synthetic import REPOSITORY_EXTENSIONS, SIZE_DISTRIBUTIONS, make_repository  # noqa: E402
+
+# 所要時間がこれより短い項目は、ばらつきが大きいため比較しない（秒）
+MIN_COMPARED_SECONDS = 0.01
+
+
+def measure(func: Callable, *args, **kwargs) -> Tuple[Any, float, int]:
+    """
+    関数の所要時間とピークメモリを計測する
+
+    Args:
+        func: 計測する関数
+        args: 関数の位置引数
+        kwargs: 関数のキーワード引数
+
+    Returns:
+        Tuple[Any, float, int]: 戻り値、所要時間（秒）、ピークメモリ（バイト）
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_suite(root_dir: Path, output_dir: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    合成リポジトリで各項目を1回ずつ計測する
+
+    Args:
+        root_dir: 合成リポジトリ
+        output_dir: 出力ディレクトリ
+        args: 解析済みの引数
+
+    Returns:
+        Dict[str, Any]: 計測結果
+    """
+    report = RunReport()
+    with profile_run(args.profile):
+        _, total, total_peak = measure(generate_summary, root_dir, EXCLUDE_DIRS, REPOSITORY_EXTENSIONS, "summary.md",
+                                       output_dir, [], workers=args.workers, executor=args.executor, report=report)
+    results: Dict[str, Any] = {
+        "phases": {name: round(seconds, 6) for name, seconds in report.timings.items()},
+        "memory_peaks": dict(report.memory_peaks),
+        "counters": dict(report.counters),
+        "functions": {"generate_summary": {"seconds": round(total, 6), "peak": total_peak}},
+    }
+    if args.skip_functions:
+        return results
+
+    file_paths, seconds, peak = measure(collect_files, root_dir, EXCLUDE_DIRS, REPOSITORY_EXTENSIONS, [])
+    results["functions"]["collect_files"] = {"seconds": round(seconds, 6), "peak": peak}
+    _, seconds, peak = measure(calculate_file_stats, file_paths)
+    results["functions"]["calculate_file_stats"] = {"seconds": round(seconds, 6), "peak": peak}
+    _, seconds, peak = measure(generate_markdown_output, root_dir, file_paths, "")
+    results["functions"]["generate_markdown_output"] = {"seconds": round(seconds, 6), "peak": peak}
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    基準の結果より許容範囲を超えて遅くなった項目を返す
+
+    Args:
+        results: 今回の計測結果
+        baseline: 基準の計測結果
+        tolerance: 許容する増加率（0.2 なら 20%）
+
+    Returns:
+        List[str]: 遅くなった項目の説明
+    """
+    regressions = []
+    pairs = [(f"phase {name}", seconds, baseline.get("phases", {}).get(name))
+             for name, seconds in results["phases"].items()]
+    pairs += [(f"function {name}", data["seconds"], baseline.get("functions", {}).get(name, {}).get("seconds"))
+              for name, data in results["functions"].items()]
+    for label, seconds, previous in pairs:
+        if previous is None or previous < MIN_COMPARED_SECONDS:
+            continue
+        if seconds > previous * (1 + tolerance):
+            regressions.append(f"{label}: {previous:.3f} s -> {seconds:.3f} s (+{seconds / previous - 1:.0%})")
+    return regressions
+
+
+def print_row(label: str, seconds: Any, peak: Any) -> None:
+    def cell(value: Any, scale: float) -> str:
+        if value is None:
+            return f"{'-':>10s}"
+        return f"{value:>10s}" if isinstance(value, str) else f"{value / scale:10.3f}"
+
+    print(f"{label:26s} {cell(seconds, 1)} {cell(peak, 1024 * 1024)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    generator = parser.add_argument_group("合成リポジトリ")
+    generator.add_argument("--files", type=int, default=5000, help="ファイル数")
+    generator.add_argument("--depth", type=int, default=5, help="ディレクトリの最大の深さ")
+    generator.add_argument("--mean-kb", type=float, default=4, help="1ファイルあたりの平均サイズ (KiB)")
+    generator.add_argument("--size-distribution", choices=SIZE_DISTRIBUTIONS, default="lognormal")
+    generator.add_argument("--excluded-share", type=float, default=0.2, help="除外ディレクトリ内のファイルの割合")
+    generator.add_argument("--binary-share", type=float, default=0.05, help="バイナリファイルの割合")
+    generator.add_argument("--seed", type=int, default=0)
+
+    runner = parser.add_argument_group("計測")
+    runner.add_argument("--workers", type=int, default=1)
+    runner.add_argument("--executor", choices=["thread", "process"], default="thread")
+    runner.add_argument("--skip-functions", action="store_true",
+                        help="collect_files などの個別の計測を行わない")
+    runner.add_argument("--profile", type=Path, help="generate_summary の cProfile の結果を書き出すパス")
+    runner.add_argument("--json", type=Path, help="計測結果を JSON で書き出すパス")
+    runner.add_argument("--baseline", type=Path, help="比較する基準の計測結果（--json で書き出したもの）")
+    runner.add_argument("--tolerance", type=float, default=0.2, help="基準より遅くなってもよい割合")
+    args = parser.parse_args()
+
+    # バイナリファイルごとの警告も計測の妨げになるため表示しない
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as output_dir:
+        summary = make_repository(Path(source_dir), files=args.files, depth=args.depth,
+                                  mean_bytes=int(args.mean_kb * 1024), size_distribution=args.size_distribution,
+                                  excluded_share=args.excluded_share, binary_share=args.binary_share,
+                                  seed=args.seed)
+        print(f"{summary['files']} files ({summary['excluded']} excluded, {summary['binary']} binary), "
+              f"{summary['bytes'] / 1024 / 1024:.1f} MiB")
+        results = run_suite(Path(source_dir), Path(output_dir), args)
+    results["repository"] = {**summary, **{key: getattr(args, key) for key in (
+        "depth", "mean_kb", "size_distribution", "excluded_share", "binary_share", "seed", "workers", "executor")}}
+
+    print_row("phase", "seconds", "peak MiB")
+    for name, seconds in results["phases"].items():
+        print_row(name, seconds, results["memory_peaks"].get(name))
+    # read, render, write はファイルごとに交互に行われるため、ピークメモリはまとめて表示する
+    print_row("read+render+write", None, results["memory_peaks"].get("output"))
+    print()
+    print_row("function", "seconds", "peak MiB")
+    for name, data in results["functions"].items():
+        print_row(name, data["seconds"], data["peak"])
+    print()
+    print("counters: " + ", ".join(f"{name}={value}" for name, value in results["counters"].items()))
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, indent=2) + "\n", encoding='utf-8')
+    if args.baseline is not None:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding='utf-8')), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
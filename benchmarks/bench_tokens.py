@@ -0,0 +1,54 @@
+"""
+トークン数計算のコスト計測
+
+合成ツリーのファイルを読み込んで変換する時間と、その出力のトークン数を数える時間を比較する。
+tiktoken がインストールされていれば BPE トークナイザーも計測する。
+
+    python -m benchmarks.bench_tokens --size-mb 128
+"""
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from main import collect_files, render_files  # noqa: E402
+from tokenizer import TOKENIZERS, get_tokenizer  # noqa: E402
+from benchmarks.synthetic import make_sized_tree  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=128, help="生成するツリーの合計サイズ (MiB)")
+    parser.add_argument("--file-kb", type=int, default=64, help="1ファイルあたりのサイズ (KiB)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root_dir = Path(temp_dir)
+        make_sized_tree(root_dir, args.size_mb * 1024 * 1024, args.file_kb * 1024)
+        file_paths = collect_files(root_dir, [], [".py"], [])
+
+        start = time.perf_counter()
+        blocks = [rendered.block for rendered in render_files(root_dir, file_paths)]
+        render_elapsed = time.perf_counter() - start
+        print(f"read + render (approx): {render_elapsed:8.2f} s")
+
+        for name in TOKENIZERS:
+            try:
+                tokenizer = get_tokenizer(name)
+            except ImportError as e:
+                print(f"{name:8s} skipped: {e}")
+                continue
+            start = time.perf_counter()
+            total = sum(tokenizer.count(block) for block in blocks)
+            elapsed = time.perf_counter() - start
+            print(f"{name:8s} count only: {elapsed:8.2f} s ({elapsed / render_elapsed:6.1%} of render)  "
+                  f"{total:,} tokens")
+
+
+if __name__ == '__main__':
+    main()
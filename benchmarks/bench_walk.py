@@ -0,0 +1,61 @@
+"""
+collect_files のベンチマーク
+
+巨大な node_modules を含む合成ツリーで、従来の rglob ベースの走査と
+os.scandir ベースの枝刈り走査を比較する。
+
+    python -m benchmarks.bench_walk
+"""
+import fnmatch
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import EXCLUDE_DIRS, EXCLUDE_FILES, SUPPORTED_EXTENSIONS  # noqa: E402
+from main import collect_files  # noqa: E402
+from benchmarks.synthetic import make_tree  # noqa: E402
+
+
+def legacy_collect_files(root_dir: Path, exclude_dirs: List[str], include_extensions: List[str],
+                         target_files: List[str]) -> List[Path]:
+    """rglob で全エントリを走査してから除外判定する従来の実装"""
+    file_paths = []
+    for path in root_dir.rglob('*'):
+        if path.is_file():
+            relative_path = path.relative_to(root_dir)
+            if not any(part in exclude_dirs for part in relative_path.parts):
+                if any(fnmatch.fnmatch(path.name, pattern) for pattern in EXCLUDE_FILES):
+                    continue
+                if path.suffix in include_extensions or path.name in target_files:
+                    file_paths.append(path)
+    return file_paths
+
+
+def measure(func, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root_dir = Path(temp_dir)
+        make_tree(root_dir)
+        args = (root_dir, EXCLUDE_DIRS, SUPPORTED_EXTENSIONS, [])
+        legacy = measure(legacy_collect_files, *args)
+        current = measure(collect_files, *args)
+        print(f"rglob:   {legacy * 1000:8.1f} ms")
+        print(f"scandir: {current * 1000:8.1f} ms ({legacy / current:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+並列ワーカー数ごとのスループット計測
+
+合成ツリーを生成し、ワーカー数 1 / 4 / 16 でファイルの読み込みと変換の
+スループットを計測する。
+
+    python -m benchmarks.bench_workers --executor thread
+"""
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from main import collect_files, render_files  # noqa: E402
+from benchmarks.synthetic import make_sized_tree  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=256, help="生成するツリーの合計サイズ (MiB)")
+    parser.add_argument("--file-kb", type=int, default=64, help="1ファイルあたりのサイズ (KiB)")
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root_dir = Path(temp_dir)
+        make_sized_tree(root_dir, args.size_mb * 1024 * 1024, args.file_kb * 1024)
+        file_paths = collect_files(root_dir, [], [".py"], [])
+        for workers in args.workers:
+            start = time.perf_counter()
+            total_bytes = sum(len(rendered.block) for rendered in
+                              render_files(root_dir, file_paths, workers, args.executor))
+            elapsed = time.perf_counter() - start
+            print(f"workers={workers:3d} {elapsed:8.2f} s  {len(file_paths) / elapsed:10.1f} files/s  "
+                  f"{total_bytes / elapsed / 1024 / 1024:8.1f} MiB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import math
+import random
+from pathlib import Path
+from typing import Dict
+
+
+def make_tree(root_dir: Path, source_files: int = 200, node_modules_packages: int = 500,
+              files_per_package: int = 20, seed: int = 0) -> None:
+    """
+    ベンチマーク用の合成ディレクトリツリーを生成する
+
+    Args:
+        root_dir: 生成先ディレクトリ
+        source_files: ソースファイル数
+        node_modules_packages: node_modules 配下のパッケージ数
+        files_per_package: パッケージごとのファイル数
+        seed: 乱数シード
+    """
+    rng = random.Random(seed)
+    for i in range(source_files):
+        package_dir = root_dir / "src" / f"pkg{i % 10}"
+        package_dir.mkdir(parents=True, exist_ok=True)
+        lines = [f"def func_{i}_{j}():\n    return {rng.randint(0, 1000)}\n" for j in range(rng.randint(1, 20))]
+        (package_dir / f"module{i}.py").write_text("".join(lines), encoding='utf-8')
+
+    for i in range(node_modules_packages):
+        package_dir = root_dir / "node_modules" / f"package{i}" / "lib"
+        package_dir.mkdir(parents=True, exist_ok=True)
+        for j in range(files_per_package):
+            (package_dir / f"file{j}.js").write_text(f"module.exports = {j};\n", encoding='utf-8')
+
+
+def make_sized_tree(root_dir: Path, total_bytes: int, file_bytes: int = 1024 * 1024, seed: int = 0) -> int:
+    """
+    合計サイズを指定してテキストファイルのツリーを生成する
+
+    Args:
+        root_dir: 生成先ディレクトリ
+        total_bytes: 生成する合計バイト数
+        file_bytes: 1ファイルあたりのバイト数
+        seed: 乱数シード
+
+    Returns:
+        int: 生成したファイル数
+    """
+    rng = random.Random(seed)
+    line = "value = {:08d}  # padding line for the memory benchmark\n"
+    lines_per_file = max(1, file_bytes // len(line.format(0)))
+    file_count = max(1, total_bytes // file_bytes)
+    for i in range(file_count):
+        package_dir = root_dir / "src" / f"pkg{i % 32}"
+        package_dir.mkdir(parents=True, exist_ok=True)
+        body = "".join(line.format(rng.randint(0, 99999999)) for _ in range(lines_per_file))
+        (package_dir / f"module{i}.py").write_text(body, encoding='utf-8')
+    return file_count
+
+
+# 合成リポジトリに含めるファイルの拡張子
+REPOSITORY_EXTENSIONS = [".py", ".ts", ".md", ".json"]
+# 除外ディレクトリとして使う名前（config.EXCLUDE_DIRS に含まれるもの）
+EXCLUDED_DIR_NAMES = ["node_modules", "__pycache__", ".venv", "dist"]
+SIZE_DISTRIBUTIONS = ["fixed", "uniform", "lognormal"]
+
+
+def make_repository(root_dir: Path, files: int = 1000, depth: int = 4, mean_bytes: int = 4096,
+                    size_distribution: str = "lognormal", excluded_share: float = 0.2, binary_share: float = 0.05,
+                    fanout: int = 4, seed: int = 0) -> Dict[str, int]:
+    """
+    条件を指定して合成リポジトリを生成する
+
+    同じ引数とシードからは常に同じツリーが生成される。バイナリファイルは収集対象の拡張子で作るため、
+    読み込み時の判定を通る。
+
+    Args:
+        root_dir: 生成先ディレクトリ
+        files: 生成するファイル数（除外ディレクトリ内のファイルを含む）
+        depth: ディレクトリの最大の深さ
+        mean_bytes: 1ファイルあたりの平均バイト数
+        size_distribution: ファイルサイズの分布（"fixed", "uniform", "lognormal"）
+        excluded_share: 除外ディレクトリの中に置くファイルの割合
+        binary_share: 除外ディレクトリ以外のファイルのうち、バイナリにする割合
+        fanout: 1ディレクトリあたりのサブディレクトリ数
+        seed: 乱数シード
+
+    Returns:
+        Dict[str, int]: 生成したファイル数（files, excluded, binary）と合計バイト数（bytes）
+
+    Raises:
+        ValueError: ファイルサイズの分布が不正な場合
+    """
+    if size_distribution not in SIZE_DISTRIBUTIONS:
+        raise ValueError(f"Unknown size distribution: {size_distribution}")
+    rng = random.Random(seed)
+    # 対数正規分布の平均が mean_bytes になるように μ を決める
+    sigma = 1.0
+    mu = math.log(max(mean_bytes, 1)) - sigma ** 2 / 2
+    summary = {"files": 0, "excluded": 0, "binary": 0, "bytes": 0}
+
+    for i in range(files):
+        parts = [f"dir{rng.randrange(fanout)}" for _ in range(rng.randint(0, depth - 1))]
+        excluded = rng.random() < excluded_share
+        if excluded:
+            parts.insert(rng.randint(0, len(parts)), rng.choice(EXCLUDED_DIR_NAMES))
+            summary["excluded"] += 1
+        is_binary = not excluded and rng.random() < binary_share
+        directory = root_dir.joinpath(*parts)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        if size_distribution == "fixed":
+            size = mean_bytes
+        elif size_distribution == "uniform":
+            size = rng.randint(1, max(1, 2 * mean_bytes - 1))
+        else:
+            size = max(1, int(rng.lognormvariate(mu, sigma)))
+        path = directory / f"file{i}{rng.choice(REPOSITORY_EXTENSIONS)}"
+        if is_binary:
+            # 先頭に NUL バイトを置き、読み込み時の判定でバイナリとみなされるようにする
+            path.write_bytes(b"\0" + rng.randbytes(size - 1))
+            summary["binary"] += 1
+        else:
+            line = f"value_{i} = {rng.randrange(10 ** 8):08d}  # synthetic line\n"
+            path.write_text((line * (size // len(line) + 1))[:size], encoding='utf-8')
+        summary["files"] += 1
+        summary["bytes"] += size
+    return summary
@@ -0,0 +1,302 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from config import CACHE_DIR_ENV, CACHE_FILENAME, CACHE_MAX_BYTES, CACHE_WRITE_BATCH
+from logging_config import get_logger
+
+try:
+    # 非暗号学的ハッシュの xxhash があれば、内容の比較用ハッシュに使う（なければ blake2b）
+    import xxhash
+except ImportError:
+    xxhash = None
+
+logger = get_logger(__name__)
+
+# (mtime_ns, size)
+StatKey = Tuple[int, int]
+# (root, path, options)
+_EntryKey = Tuple[str, str, str]
+
+
+class RenderCache:
+    """
+    ファイルごとの処理結果（マークダウンブロックと統計）を保持するディスクキャッシュ
+
+    エントリはルートディレクトリ・相対パス・処理オプションをキーに保存し、
+    mtime とサイズが一致すればファイルを読まずに再利用する。hash_contents を
+    有効にすると、mtime が変わっていても内容のハッシュが一致すれば再利用する。
+    合計サイズが max_bytes を超えた分は最終利用日時の古い順に削除する。
+
+    保存と最終利用日時の更新はメモリに溜め、write_batch 件ごとと flush・close のときに
+    1つのトランザクションでまとめて書き込む。書き込みロックはその間だけ取るため、
+    同じファイルを複数のプロセスやインスタンスで同時に使える。
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None, max_bytes: int = CACHE_MAX_BYTES,
+                 hash_contents: bool = False, write_batch: int = CACHE_WRITE_BATCH, timeout: float = 30):
+        """
+        Args:
+            cache_path: キャッシュファイルのパス。省略時はユーザーキャッシュディレクトリに作成する
+            max_bytes: キャッシュの最大サイズ（バイト）
+            hash_contents: mtime が変わった場合に内容のハッシュで再検証するか
+            write_batch: まとめてコミットする保存の件数
+            timeout: 他の接続の書き込みロックを待つ最大の秒数
+        """
+        self.cache_path = Path(cache_path) if cache_path else default_cache_dir() / CACHE_FILENAME
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hash_contents = hash_contents
+        self.write_batch = write_batch
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # まだ書き込んでいない保存（行全体）と、最終利用日時の更新（mtime_ns, size, last_used）
+        self._pending: Dict[_EntryKey, tuple] = {}
+        self._touched: Dict[_EntryKey, Tuple[int, int, float]] = {}
+        self._connection = sqlite3.connect(str(self.cache_path), timeout=timeout, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                root TEXT NOT NULL,
+                path TEXT NOT NULL,
+                options TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                digest TEXT,
+                payload TEXT NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (root, path, options)
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._connection.commit()
+
+    def __enter__(self) -> "RenderCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @staticmethod
+    def stat_key(file_path: Path) -> Optional[StatKey]:
+        """
+        キャッシュの照合に使うファイルの状態を取得する
+
+        ファイルを読み込む前に取得しておくことで、読み込み中に更新されたファイルが
+        古い内容のまま再利用されるのを防ぐ。
+
+        Args:
+            file_path: ファイルパス
+
+        Returns:
+            Optional[StatKey]: mtime とサイズ。取得できない場合は None
+        """
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, root_dir: Path, file_path: Path, stat_key: Optional[StatKey],
+            options: str) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュから処理結果を取得する
+
+        Args:
+            root_dir: ルートディレクトリ
+            file_path: ファイルパス
+            stat_key: 読み込み前に取得したファイルの状態
+            options: 処理オプションを表す文字列
+
+        Returns:
+            Optional[Dict[str, Any]]: キャッシュにヒットした場合は保存した処理結果、それ以外は None
+        """
+        if stat_key is None:
+            return None
+        key = (str(root_dir), file_path.relative_to(root_dir).as_posix(), options)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                row = pending[3:7]
+            else:
+                row = self._connection.execute(
+                    "SELECT mtime_ns, size, digest, payload FROM entries WHERE root = ? AND path = ? AND options = ?",
+                    key
+                ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        mtime_ns, size, digest, payload = row
+        if (mtime_ns, size) != stat_key:
+            if not (self.hash_contents and digest and size == stat_key[1]
+                    and _file_digest(file_path) == digest):
+                self.misses += 1
+                return None
+
+        # ヒットしただけでは書き込みロックを取らず、次の flush でまとめて更新する
+        with self._lock:
+            if key in self._pending:
+                self._pending[key] = (*key, *stat_key, *self._pending[key][5:])
+            else:
+                self._touched[key] = (*stat_key, time.time())
+        self.hits += 1
+        return json.loads(payload)
+
+    def put(self, root_dir: Path, file_path: Path, stat_key: Optional[StatKey], options: str,
+            data: Dict[str, Any], digest: Optional[str] = None) -> None:
+        """
+        処理結果をキャッシュに保存する
+
+        Args:
+            root_dir: ルートディレクトリ
+            file_path: ファイルパス
+            stat_key: 読み込み前に取得したファイルの状態
+            options: 処理オプションを表す文字列
+            data: JSONに変換可能な処理結果
+            digest: ファイル内容のハッシュ（content_digest で計算したもの）
+        """
+        if stat_key is None:
+            return
+        payload = json.dumps(data)
+        key = (str(root_dir), file_path.relative_to(root_dir).as_posix(), options)
+        with self._lock:
+            self._touched.pop(key, None)
+            self._pending[key] = (*key, *stat_key, digest if self.hash_contents else None, payload, len(payload),
+                                  time.time())
+            if len(self._pending) < self.write_batch:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        溜めている保存と最終利用日時の更新を1つのトランザクションで書き込む
+
+        他の接続が書き込み中で timeout までにロックを取れない場合は、溜めていた内容を破棄する
+        （キャッシュに保存されないだけで、処理結果には影響しない）。
+        """
+        with self._lock:
+            pending, touched = self._pending, self._touched
+            self._pending, self._touched = {}, {}
+            if not pending and not touched:
+                return
+            try:
+                with self._connection:
+                    self._connection.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                                 pending.values())
+                    self._connection.executemany(
+                        "UPDATE entries SET mtime_ns = ?, size = ?, last_used = ? "
+                        "WHERE root = ? AND path = ? AND options = ?",
+                        ((*values, *key) for key, values in touched.items())
+                    )
+            except sqlite3.OperationalError as e:
+                logger.warning(f"キャッシュに書き込めませんでした（{len(pending)} 件を破棄）: {e}")
+
+    def evict(self) -> int:
+        """
+        合計サイズが上限を超えている場合に、最終利用日時の古いエントリから削除する
+
+        Returns:
+            int: 削除したエントリ数
+        """
+        with self._lock:
+            total = self._connection.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            excess = total - self.max_bytes
+            removed = 0
+            freed = 0
+            cursor = self._connection.execute("SELECT rowid, nbytes FROM entries ORDER BY last_used")
+            stale_rowids = []
+            for rowid, nbytes in cursor:
+                if freed >= excess:
+                    break
+                stale_rowids.append((rowid,))
+                freed += nbytes
+                removed += 1
+            self._connection.executemany("DELETE FROM entries WHERE rowid = ?", stale_rowids)
+            self._connection.commit()
+        logger.info(f"Evicted {removed} cache entries ({freed:,} bytes)")
+        return removed
+
+    def clear(self) -> None:
+        """
+        すべてのエントリを削除する
+        """
+        with self._lock:
+            self._pending.clear()
+            self._touched.clear()
+            self._connection.execute("DELETE FROM entries")
+            self._connection.commit()
+
+    def close(self, evict: bool = True) -> None:
+        """
+        変更を確定し、サイズ上限を適用してからキャッシュを閉じる
+
+        Args:
+            evict: サイズ上限を適用するか。複数プロセスで共有する場合は最後に1回だけ適用すればよい
+        """
+        self.flush()
+        if evict:
+            self.evict()
+        self._connection.close()
+        logger.info(f"Cache hits: {self.hits}, misses: {self.misses}")
+
+
+def default_cache_dir() -> Path:
+    """
+    キャッシュを保存するディレクトリを返す
+
+    環境変数 CONTEXT_GENERATOR_CACHE_DIR が設定されていればそれを使い、
+    それ以外は OS ごとのユーザーキャッシュディレクトリを使う。
+
+    Returns:
+        Path: キャッシュディレクトリ
+    """
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV])
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"]) / "ContextGenerator" / "Cache"
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "context_generator"
+
+
+def content_digest(data: bytes) -> str:
+    """
+    ファイル内容のハッシュを計算する
+
+    xxhash がインストールされていれば高速な xxh3_128 を、なければ blake2b を使う。
+    どちらも128ビットのため、内容の同一性の判定に使える。
+
+    Args:
+        data: ファイルの内容（バイト列）
+
+    Returns:
+        str: 16進数のハッシュ文字列
+    """
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _file_digest(file_path: Path) -> Optional[str]:
+    """
+    ファイルを読み込んでハッシュを計算する
+
+    Args:
+        file_path: ファイルパス
+
+    Returns:
+        Optional[str]: ハッシュ文字列。読み込めない場合は None
+    """
+    try:
+        return content_digest(file_path.read_bytes())
+    except OSError:
+        return None
@@ -0,0 +1,403 @@
+"""
+Context Generator のコマンドラインインターフェース
+
+GUI を使わずにサマリーを生成する。CI やバッチ処理での利用を想定し、
+Tkinter や GUI のモジュールは読み込まない。
+
+    python cli.py /path/to/project -o summary.md --stats-json stats.json
+    python cli.py repo1 repo2 repo3 -o summaries/ --max-parallel 4 --stats-json report.json
+    python cli.py /path/to/project -o summary.md --watch
+    python cli.py /path/to/project -o summary.md --split-size 500000 --compress zip
+    python cli.py /path/to/project -o summary.md --reduce comments,docstrings,blank-lines
+    python cli.py /path/to/project -o summary.md --extensions .py,.ts --entry-files src/app.py --dependency-depth 2
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from batch import BatchJob, default_output_paths, load_manifest, summarize_repositories
+from cache import RenderCache
+from config import (
+    BATCH_MAX_PARALLEL, BUDGET_PRIORITIES, COMPRESSION_FORMATS, DEDUP_FILES, DEFAULT_BUDGET_PRIORITY,
+    DEFAULT_EXECUTOR, DEFAULT_FILE_SOURCE, DEFAULT_OUTPUT_FILENAME, DEFAULT_SPLIT_UNIT, DEFAULT_TARGET_FILES,
+    DEFAULT_TOKENIZER, DEFAULT_TRANSFORMS, DEFAULT_WORKERS, DEPENDENCY_DEPTH, EXCLUDE_DIRS, FILE_SOURCES,
+    MAX_FILE_SIZE, OVERSIZE_POLICY, PROFILE_ENV, SPLIT_UNITS, TREE_MAX_DEPTH, TREE_MAX_ENTRIES, WATCH_DEBOUNCE
+)
+from logging_config import get_logger
+from main import generate_summary
+from preset_manager import PresetManager
+from report import RunReport
+from transforms import TRANSFORMS
+
+logger = get_logger(__name__)
+
+# GUI の既定値と同じく、拡張子を指定しない場合は .md と .py を含める
+DEFAULT_EXTENSIONS = [".md", ".py"]
+
+
+def split_list(value: str) -> List[str]:
+    """
+    カンマ区切りの文字列をリストに変換する
+
+    Args:
+        value: カンマ区切りの文字列
+
+    Returns:
+        List[str]: 空の要素を除いたリスト
+    """
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    コマンドライン引数のパーサーを生成する
+
+    Returns:
+        argparse.ArgumentParser: 引数パーサー
+    """
+    parser = argparse.ArgumentParser(
+        description="プロジェクトのファイルをマークダウン形式の1ファイルにまとめます。",
+    )
+    parser.add_argument("root_dirs", type=Path, nargs="*", metavar="root_dir",
+                        help="サマリーを生成するプロジェクトのルートディレクトリ。複数指定するとバッチ処理になる")
+    parser.add_argument("-o", "--output", default=None,
+                        help="出力ファイルのパス。'-' の場合は標準出力に書き込む（既定: -）。"
+                             "バッチ処理では出力ディレクトリ（既定: カレントディレクトリ）")
+    parser.add_argument("--exclude-dirs", type=split_list, help="除外するディレクトリ（カンマ区切り）")
+    parser.add_argument("--extensions", type=split_list, help="含めるファイル拡張子（カンマ区切り）")
+    parser.add_argument("--target-files", type=split_list, help="取得対象のファイル名（カンマ区切り）")
+    parser.add_argument("--entry-files", type=split_list,
+                        help="エントリファイル（ルートからの相対パス、カンマ区切り）。指定すると、これらのファイルと "
+                             "Python / JavaScript / TypeScript の import で依存するファイルだけを出力する")
+    parser.add_argument("--dependency-depth", type=int, default=DEPENDENCY_DEPTH,
+                        help="--entry-files からたどる依存関係の深さ（0 はエントリファイルのみ。既定: 制限しない）")
+    parser.add_argument("--no-preset", action="store_true",
+                        help=f"ルートディレクトリの {PresetManager().config_filename} を読み込まない")
+
+    performance = parser.add_argument_group("実行オプション")
+    performance.add_argument("--workers", type=int, help=f"並列ワーカー数（既定: {DEFAULT_WORKERS}）")
+    performance.add_argument("--executor", choices=["thread", "process"], default=DEFAULT_EXECUTOR,
+                             help="並列処理に使うプールの種類")
+    performance.add_argument("--source", choices=FILE_SOURCES,
+                             help="ファイルの列挙方法（git は Git の管理ファイルと未追跡ファイルを列挙し、"
+                                  f"リポジトリでなければ filesystem と同じ。既定: {DEFAULT_FILE_SOURCE}）")
+    performance.add_argument("--no-cache", action="store_true", help="処理結果のキャッシュを使わない")
+    performance.add_argument("--cache-path", type=Path, help="キャッシュファイルのパス")
+    performance.add_argument("--hash-cache", action="store_true",
+                             help="mtime が変わったファイルも内容のハッシュが一致すればキャッシュを使う")
+    performance.add_argument("--profile", type=Path,
+                             help=f"cProfile の計測結果を書き出すパス（環境変数 {PROFILE_ENV} と同じ）。"
+                                  "ディレクトリを指定すると実行ごとに別のファイルに書き出す")
+
+    batch = parser.add_argument_group("バッチ処理")
+    batch.add_argument("--manifest", type=Path,
+                       help="処理するリポジトリの一覧（JSON またはテキスト）。指定するとバッチ処理になる")
+    batch.add_argument("--max-parallel", type=int, default=BATCH_MAX_PARALLEL,
+                       help=f"同時に処理するリポジトリ数（既定: {BATCH_MAX_PARALLEL}）")
+
+    watch = parser.add_argument_group("監視モード")
+    watch.add_argument("--watch", action="store_true",
+                       help="ファイルの変更を監視し、変更のあった部分だけを出力ファイルに反映し続ける（Ctrl+C で終了）")
+    watch.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE,
+                       help="連続した変更をまとめるための待ち時間（秒）")
+
+    tree = parser.add_argument_group("ディレクトリ構造")
+    tree.add_argument("--tree-depth", type=int, default=TREE_MAX_DEPTH, help="表示する深さ（0で非表示）")
+    tree.add_argument("--tree-max-entries", type=int, default=TREE_MAX_ENTRIES,
+                      help="1ディレクトリあたりに表示する最大エントリ数")
+
+    budget = parser.add_argument_group("サイズ制限")
+    budget.add_argument("--tokenizer", default=DEFAULT_TOKENIZER, help="トークナイザー（approx または tiktoken）")
+    budget.add_argument("--max-tokens", type=int, help="出力全体のトークン数の上限")
+    budget.add_argument("--budget-priority", choices=BUDGET_PRIORITIES, default=DEFAULT_BUDGET_PRIORITY,
+                        help="トークン数の上限がある場合のファイルの選び方")
+    budget.add_argument("--max-file-size", type=int, default=MAX_FILE_SIZE,
+                        help="全体を読み込む最大のファイルサイズ（バイト）")
+    budget.add_argument("--oversize-policy", choices=["truncate", "skip"], default=OVERSIZE_POLICY,
+                        help="上限を超えるファイルの扱い")
+    budget.add_argument("--dedup", action="store_true", default=DEDUP_FILES,
+                        help="同じ内容のファイルを、最初に出力したファイルへの参照に置き換える")
+    budget.add_argument("--reduce", type=split_list,
+                        help=f"出力前に内容を縮小する変換（カンマ区切り: {', '.join(TRANSFORMS)}）。"
+                             "signatures は Python のトップレベルの定義行だけを出力する")
+
+    split = parser.add_argument_group("出力の分割・圧縮")
+    split.add_argument("--split-size", type=int,
+                       help="出力をファイルの境界で分割する場合の、分割ファイル1つあたりの上限")
+    split.add_argument("--split-unit", choices=SPLIT_UNITS, default=DEFAULT_SPLIT_UNIT,
+                       help="--split-size の単位")
+    split.add_argument("--compress", choices=COMPRESSION_FORMATS,
+                       help="出力の圧縮形式（gzip はファイルごと、zip は1つのアーカイブ）")
+
+    parser.add_argument("--stats-json", help="統計情報とフェーズごとの所要時間を JSON で書き込むパス（'-' で標準出力）")
+    parser.add_argument("-v", "--verbose", action="store_true", help="詳細なログを出力する")
+    return parser
+
+
+def resolve_settings(args: argparse.Namespace, root_dir: Path) -> Dict[str, Any]:
+    """
+    既定値・プリセット・コマンドライン引数の順に設定を重ねる
+
+    Args:
+        args: 解析済みの引数
+        root_dir: プリセットを読み込むルートディレクトリ
+
+    Returns:
+        Dict[str, Any]: 実行に使う設定
+    """
+    settings = {
+        'exclude_dirs': EXCLUDE_DIRS,
+        'include_extensions': DEFAULT_EXTENSIONS,
+        'target_files': DEFAULT_TARGET_FILES,
+        'workers': DEFAULT_WORKERS,
+        'use_cache': True,
+        'source': DEFAULT_FILE_SOURCE,
+        'transforms': DEFAULT_TRANSFORMS,
+        'entry_files': [],
+    }
+    preset_data = None if args.no_preset else PresetManager().load_preset(root_dir)
+    if preset_data:
+        for key in ('exclude_dirs', 'target_files', 'entry_files'):
+            if key in preset_data:
+                settings[key] = split_list(preset_data[key])
+        for key in ('include_extensions', 'workers', 'use_cache', 'source', 'transforms'):
+            if key in preset_data:
+                settings[key] = preset_data[key]
+
+    for key, value in (('exclude_dirs', args.exclude_dirs), ('include_extensions', args.extensions),
+                       ('target_files', args.target_files), ('workers', args.workers),
+                       ('source', args.source), ('transforms', args.reduce), ('entry_files', args.entry_files)):
+        if value is not None:
+            settings[key] = value
+    if args.no_cache:
+        settings['use_cache'] = False
+    return settings
+
+
+def summary_options(args: argparse.Namespace, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    generate_summary に渡すキーワード引数を組み立てる
+
+    Args:
+        args: 解析済みの引数
+        settings: resolve_settings で決めた設定
+
+    Returns:
+        Dict[str, Any]: generate_summary のキーワード引数
+    """
+    return {
+        'workers': settings['workers'],
+        'executor': args.executor,
+        'source': settings['source'],
+        'tree_depth': args.tree_depth,
+        'tree_max_entries': args.tree_max_entries,
+        'tokenizer': args.tokenizer,
+        'max_tokens': args.max_tokens,
+        'budget_priority': args.budget_priority,
+        'max_file_size': args.max_file_size,
+        'oversize_policy': args.oversize_policy,
+        'split_limit': args.split_size,
+        'split_unit': args.split_unit,
+        'compression': args.compress,
+        'dedup': args.dedup,
+        'transforms': settings['transforms'],
+        'entry_files': settings['entry_files'],
+        'dependency_depth': args.dependency_depth,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    解析済みの引数で1つのプロジェクトのサマリーを生成する
+
+    Args:
+        args: 解析済みの引数
+
+    Returns:
+        Dict[str, Any]: JSON に変換可能な実行記録
+    """
+    root_dir = args.root_dirs[0].resolve()
+    settings = resolve_settings(args, root_dir)
+    to_stdout = args.output in (None, "-")
+    output_path = Path(DEFAULT_OUTPUT_FILENAME) if to_stdout else Path(args.output).resolve()
+
+    report = RunReport()
+    cache = RenderCache(args.cache_path, hash_contents=args.hash_cache) if settings['use_cache'] else None
+    start = time.perf_counter()
+    try:
+        generate_summary(
+            root_dir,
+            settings['exclude_dirs'],
+            settings['include_extensions'],
+            output_path.name,
+            output_path.parent,
+            settings['target_files'],
+            sink=sys.stdout if to_stdout else None,
+            cache=cache,
+            report=report,
+            **summary_options(args, settings),
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+    report.add_time("total", time.perf_counter() - start)
+    return {"root": str(root_dir), **report.to_dict(root_dir)}
+
+
+def run_watch(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    解析済みの引数で1つのプロジェクトのサマリーを生成し、Ctrl+C が押されるまで変更を反映し続ける
+
+    Args:
+        args: 解析済みの引数
+
+    Returns:
+        Dict[str, Any]: JSON に変換可能な最終的な統計情報
+    """
+    # 監視モードでのみ使うため、起動時間に影響しないようにここで読み込む
+    from watcher import WatchSession, watch
+
+    root_dir = args.root_dirs[0].resolve()
+    settings = resolve_settings(args, root_dir)
+    output_path = Path(args.output).resolve()
+    options = summary_options(args, settings)
+    for key in ('max_tokens', 'budget_priority', 'split_limit', 'split_unit', 'compression'):
+        options.pop(key)
+
+    cache = RenderCache(args.cache_path, hash_contents=args.hash_cache) if settings['use_cache'] else None
+    updates = 0
+
+    def on_update(session: WatchSession) -> None:
+        nonlocal updates
+        updates += 1
+        print(f"更新しました: {output_path} ({len(session.file_paths)} ファイル)", file=sys.stderr)
+
+    try:
+        session = WatchSession(root_dir, settings['exclude_dirs'], settings['include_extensions'],
+                               settings['target_files'], output_path, cache=cache, **options)
+        session.build()
+        print(f"監視を開始しました: {root_dir} -> {output_path}（Ctrl+C で終了）", file=sys.stderr)
+        try:
+            watch(session, debounce=args.debounce, on_update=on_update)
+        except KeyboardInterrupt:
+            pass
+    finally:
+        if cache is not None:
+            cache.close()
+
+    file_stats, _ = session.stats()
+    return {
+        "root": str(root_dir),
+        "output": str(output_path),
+        "files": len(session.file_paths),
+        "updates": updates,
+        "stats": file_stats,
+    }
+
+
+def run_batch(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    解析済みの引数で複数のリポジトリのサマリーを生成する
+
+    各リポジトリのプリセットはリポジトリごとに読み込む。
+
+    Args:
+        args: 解析済みの引数
+
+    Returns:
+        Dict[str, Any]: 集計したレポート
+    """
+    output_dir = Path(args.output or ".").resolve()
+    entries = [{"root": root_dir, "output": None} for root_dir in args.root_dirs]
+    if args.manifest:
+        entries.extend(load_manifest(args.manifest))
+    root_dirs = [entry["root"].resolve() for entry in entries]
+    defaults = default_output_paths(root_dirs, output_dir)
+
+    jobs = []
+    for root_dir, entry, default_output in zip(root_dirs, entries, defaults):
+        settings = resolve_settings(args, root_dir)
+        jobs.append(BatchJob(
+            root_dir=root_dir,
+            output_path=entry["output"] or default_output,
+            exclude_dirs=settings['exclude_dirs'],
+            include_extensions=settings['include_extensions'],
+            target_files=settings['target_files'],
+            options=summary_options(args, settings),
+            use_cache=settings['use_cache'],
+        ))
+    return summarize_repositories(jobs, args.max_parallel, use_cache=not args.no_cache, cache_path=args.cache_path,
+                                  hash_cache=args.hash_cache)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    コマンドラインのエントリーポイント
+
+    Args:
+        argv: コマンドライン引数。None の場合は sys.argv を使う
+
+    Returns:
+        int: 終了コード
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    is_batch = args.manifest is not None or len(args.root_dirs) > 1
+    if not args.root_dirs and args.manifest is None:
+        parser.error("ルートディレクトリまたは --manifest を指定してください")
+    if is_batch and args.output == "-":
+        parser.error("バッチ処理では --output に出力ディレクトリを指定してください")
+    if args.stats_json == "-" and not is_batch and args.output in (None, "-"):
+        parser.error("--stats-json - は --output でファイルを指定した場合のみ使えます")
+    if args.watch and (is_batch or args.output in (None, "-")):
+        parser.error("--watch は1つのディレクトリと --output の出力ファイルを指定した場合のみ使えます")
+    if args.watch and args.max_tokens is not None:
+        parser.error("--watch と --max-tokens は同時に指定できません")
+    if args.watch and (args.split_size is not None or args.compress is not None):
+        parser.error("--watch と --split-size / --compress は同時に指定できません")
+    if (args.split_size is not None or args.compress is not None) and not is_batch and args.output in (None, "-"):
+        parser.error("--split-size と --compress は --output でファイルを指定した場合のみ使えます")
+    if args.split_size is not None and args.split_size <= 0:
+        parser.error("--split-size には正の整数を指定してください")
+    if args.dependency_depth is not None and args.dependency_depth < 0:
+        parser.error("--dependency-depth には0以上の整数を指定してください")
+    unknown = [name for name in args.reduce or [] if name not in TRANSFORMS]
+    if unknown:
+        parser.error(f"--reduce に不明な変換が指定されました: {', '.join(unknown)}")
+    for root_dir in args.root_dirs:
+        if not root_dir.is_dir():
+            parser.error(f"ディレクトリが見つかりません: {root_dir}")
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    if args.profile is not None:
+        # バッチ処理のワーカープロセスにも引き継ぐため、環境変数で渡す
+        os.environ[PROFILE_ENV] = str(args.profile)
+
+    try:
+        if is_batch:
+            result = run_batch(args)
+        elif args.watch:
+            result = run_watch(args)
+        else:
+            result = run(args)
+    except Exception as e:
+        logger.error(f"サマリーの生成中にエラーが発生しました: {e}")
+        return 1
+
+    if args.stats_json:
+        stats_json = json.dumps(result, ensure_ascii=False, indent=2)
+        if args.stats_json == "-":
+            print(stats_json)
+        else:
+            Path(args.stats_json).write_text(stats_json + "\n", encoding='utf-8')
+    if is_batch and result["totals"]["failed"]:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
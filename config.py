@@ -45,5 +45,85 @@ SUPPORTED_EXTENSIONS = [
     ".conf", ".toml", ".jsx", ".tsx", ".vue",".svelte", ".sass", ".scss"
 ]
 
+# ディレクトリ構造を表示する深さと、1ディレクトリあたりに表示する最大エントリ数
+TREE_MAX_DEPTH = 4
+TREE_MAX_ENTRIES = 100
+
+# ディレクトリ構造に表示しない名前のパターン
+TREE_IGNORE = ["__pycache__", "*.pyc"]
+
+# ファイルの読み込みと変換を並列に行うワーカー数（1の場合は逐次処理）
+DEFAULT_WORKERS = 1
+
+# 並列処理に使うプールの種類（"thread" または "process"）
+DEFAULT_EXECUTOR = "thread"
+
+# ファイルの列挙方法（"filesystem" はディレクトリを走査し、"git" は Git の管理ファイルと .gitignore で
+# 除外されていない未追跡ファイルを列挙する。Git リポジトリでない場合は "filesystem" と同じ）
+DEFAULT_FILE_SOURCE = "filesystem"
+FILE_SOURCES = ["filesystem", "git"]
+
+# git コマンドのタイムアウト（秒）
+GIT_TIMEOUT = 30
+
+# 監視モードで、連続した保存をまとめるための待ち時間（秒）と、inotify が使えない場合のポーリング間隔（秒）
+WATCH_DEBOUNCE = 0.3
+WATCH_POLL_INTERVAL = 1.0
+
+# バイナリ判定のために読む先頭のバイト数
+BINARY_SNIFF_BYTES = 8192
+
+# 全体を読み込む最大のファイルサイズ（バイト）と、超えた場合の扱い（"truncate" または "skip"）
+MAX_FILE_SIZE = 2 * 1024 * 1024
+OVERSIZE_POLICY = "truncate"
+
+# "truncate" の場合に先頭と末尾からそれぞれ取り出すバイト数
+TRUNCATE_BYTES = 32 * 1024
+
+# トークン数の計算に使うトークナイザー（"approx" は外部ライブラリ不要の近似、"tiktoken" は BPE）
+DEFAULT_TOKENIZER = "approx"
+
+# トークン数の上限がある場合のファイルの選び方（"order", "small-first", "targets-first"）
+DEFAULT_BUDGET_PRIORITY = "order"
+BUDGET_PRIORITIES = ["order", "small-first", "targets-first"]
+
+# 同じ内容のファイルを、最初に出力したファイルへの参照に置き換えるか（有効にすると出力が変わり、
+# 全ファイルの内容のハッシュを計算するため既定では無効）
+DEDUP_FILES = False
+
+# 出力前に内容を縮小する変換（"signatures", "docstrings", "license", "comments", "blank-lines"）
+DEFAULT_TRANSFORMS = []
+# 「縮小して出力」を選んだ場合に適用する変換
+REDUCE_TRANSFORMS = ["docstrings", "license", "comments", "blank-lines"]
+
+# エントリファイルを指定した場合にたどる依存関係の深さ（0 はエントリファイルのみ、None は制限しない）
+DEPENDENCY_DEPTH = None
+
+# 出力を分割する場合の上限の単位（"bytes" は UTF-8 のバイト数）と、出力の圧縮形式
+DEFAULT_SPLIT_UNIT = "bytes"
+SPLIT_UNITS = ["bytes", "chars", "tokens"]
+COMPRESSION_FORMATS = ["gzip", "zip"]
+
+# バッチ処理で同時に処理するリポジトリ数
+BATCH_MAX_PARALLEL = 4
+
+# 処理結果キャッシュのファイル名と最大サイズ（バイト）
+CACHE_FILENAME = "render_cache.sqlite3"
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# 書き込みをまとめてコミットするエントリ数。書き込みロックはコミットの間だけ取るため、
+# 同じキャッシュファイルを使う他のプロセス（バッチ処理・監視モード・GUI）を待たせない
+CACHE_WRITE_BATCH = 64
+
+# キャッシュディレクトリを上書きする環境変数
+CACHE_DIR_ENV = "CONTEXT_GENERATOR_CACHE_DIR"
+
+# 常駐サーバーの既定の待ち受けアドレスと、メモリ上に保持する処理結果の合計サイズの上限（バイト）
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+DAEMON_MAX_BYTES = 256 * 1024 * 1024
+
+# 設定すると generate_summary を cProfile で計測し、結果をこのパスに書き出す環境変数
+PROFILE_ENV = "CONTEXT_GENERATOR_PROFILE"
+
 # デフォルトの出力ディレクトリ
 DEFAULT_OUTPUT_DIR = Path.home() / "Desktop"
\ No newline at end of file
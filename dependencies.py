@@ -0,0 +1,267 @@
+"""
+依存関係に基づくファイルの選択
+
+エントリファイルから import / require をたどり、推移的に依存するファイルだけを選ぶ。
+Python は ast で import 文を、JavaScript / TypeScript は正規表現で import・export・require・動的 import の
+モジュール指定子を取り出す。収集済みのファイルに解決できるものだけを依存関係とみなし、
+標準ライブラリや外部パッケージ（node_modules など）は無視する。
+
+ファイルごとに取り出した import はキャッシュ（RenderCache）に mtime とサイズで保存するため、
+2回目以降は変更のあったファイルだけを読み直す。
+"""
+import ast
+import json
+import os
+import posixpath
+import re
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from cache import RenderCache
+from config import DEPENDENCY_DEPTH
+from file_reader import STATUS_OK, read_file
+from logging_config import get_logger
+from report import RunReport
+
+logger = get_logger(__name__)
+
+PYTHON_EXTENSIONS = frozenset({".py", ".pyi"})
+# 拡張子を省略した指定子を解決するときに試す順
+SCRIPT_EXTENSIONS = (".ts", ".tsx", ".mts", ".cts", ".js", ".jsx", ".mjs", ".cjs")
+# import を取り出すファイル（Vue と Svelte は <script> 内の import を対象にする）
+SCRIPT_SOURCE_EXTENSIONS = frozenset(SCRIPT_EXTENSIONS + (".vue", ".svelte"))
+# TypeScript では出力後の拡張子（.js）で import を書くため、ソースの拡張子に読み替える
+_TYPESCRIPT_SOURCES = {".js": (".ts", ".tsx"), ".jsx": (".tsx",), ".mjs": (".mts",), ".cjs": (".cts",)}
+# Python の絶対 import を探す、ルートからのディレクトリ（src レイアウトに対応）
+PYTHON_SOURCE_ROOTS = ("", "src")
+
+# キャッシュキーに使うオプション文字列（取り出し方を変えた場合は version を上げる）
+_CACHE_OPTIONS = json.dumps({"index": "dependencies", "version": 1})
+
+# from 'x' / import 'x' / require('x') / import('x') のモジュール指定子
+_SCRIPT_IMPORT = re.compile(r"""(?:\bfrom|\bimport|\brequire\s*\(|\bimport\s*\()\s*(['"])([^'"\n]+)\1""")
+
+
+def python_imports(source: str) -> List[List[Any]]:
+    """
+    Python のソースから import 文を取り出す
+
+    関数内や try 内の import も含める。
+
+    Args:
+        source: ソースコード
+
+    Returns:
+        List[List[Any]]: [相対 import のレベル, モジュール名, from で import した名前のリスト] のリスト。
+            構文エラーの場合は空のリスト
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend([0, alias.name, []] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append([node.level, node.module or "", [alias.name for alias in node.names if alias.name != "*"]])
+    return imports
+
+
+def script_imports(source: str) -> List[str]:
+    """
+    JavaScript / TypeScript のソースからモジュール指定子を取り出す
+
+    構文は解析しないため、コメントや文字列の中の import も含まれることがある。
+
+    Args:
+        source: ソースコード
+
+    Returns:
+        List[str]: 出現順のモジュール指定子
+    """
+    return [match.group(2) for match in _SCRIPT_IMPORT.finditer(source)]
+
+
+class DependencyIndex:
+    """
+    収集済みのファイルについて、ファイルごとの依存先を求めるクラス
+
+    import はファイルを初めて参照したときに取り出し、キャッシュがあればそこに保存する。
+    """
+
+    def __init__(self, root_dir: Path, file_paths: Iterable[Path], cache: Optional[RenderCache] = None):
+        """
+        Args:
+            root_dir: ルートディレクトリ
+            file_paths: 依存先の候補になる収集済みのファイルパス
+            cache: import を保存するキャッシュ。None の場合は毎回読み込む
+        """
+        self.root_dir = root_dir
+        self.cache = cache
+        # ルートからの相対パス（/ 区切り） -> ファイルパス
+        self.files: Dict[str, Path] = {file_path.relative_to(root_dir).as_posix(): file_path
+                                       for file_path in file_paths}
+        self._dependencies: Dict[str, List[str]] = {}
+        self.parsed = 0
+
+    def dependencies(self, rel_path: str) -> List[str]:
+        """
+        ファイルが直接依存する収集済みのファイルを返す
+
+        Args:
+            rel_path: ルートからの相対パス
+
+        Returns:
+            List[str]: 依存先の相対パス（出現順、重複なし）
+        """
+        if rel_path not in self._dependencies:
+            extension = posixpath.splitext(rel_path)[1]
+            imports = self._imports(rel_path)
+            if extension in PYTHON_EXTENSIONS:
+                resolved = [path for spec in imports for path in self._resolve_python(rel_path, *spec)]
+            else:
+                resolved = [path for spec in imports for path in self._resolve_script(rel_path, spec)]
+            self._dependencies[rel_path] = [path for path in dict.fromkeys(resolved) if path != rel_path]
+        return self._dependencies[rel_path]
+
+    def _imports(self, rel_path: str) -> List[Any]:
+        """
+        ファイルの import を取り出す（キャッシュにあれば読み込まない）
+        """
+        extension = posixpath.splitext(rel_path)[1]
+        if extension not in PYTHON_EXTENSIONS and extension not in SCRIPT_SOURCE_EXTENSIONS:
+            return []
+        file_path = self.files[rel_path]
+        stat_key = self.cache.stat_key(file_path) if self.cache is not None else None
+        if self.cache is not None:
+            data = self.cache.get(self.root_dir, file_path, stat_key, _CACHE_OPTIONS)
+            if data is not None:
+                return data["imports"]
+
+        try:
+            content = read_file(file_path)
+        except OSError as e:
+            logger.warning(f"依存関係を読み取れませんでした: {file_path}: {e}")
+            return []
+        if content.status != STATUS_OK:
+            return []
+        imports = python_imports(content.text) if extension in PYTHON_EXTENSIONS else script_imports(content.text)
+        self.parsed += 1
+        if self.cache is not None:
+            self.cache.put(self.root_dir, file_path, stat_key, _CACHE_OPTIONS, {"imports": imports})
+        return imports
+
+    def _resolve_python(self, rel_path: str, level: int, module: str, names: List[str]) -> List[str]:
+        """
+        Python の import 文を収集済みのファイルに解決する
+
+        `import a.b` は a/__init__.py と a/b.py（または a/b/__init__.py）に、`from a import b` はそれに加えて
+        b がサブモジュールであれば a/b.py に解決する。絶対 import はルート・src・import したファイルの
+        ディレクトリの順に探す。
+        """
+        if level:
+            package = posixpath.dirname(rel_path).split("/") if posixpath.dirname(rel_path) else []
+            if level - 1 > len(package):
+                return []
+            package = package[:len(package) - (level - 1)]
+            bases = ["/".join(package)]
+        else:
+            bases = list(PYTHON_SOURCE_ROOTS) + [posixpath.dirname(rel_path)]
+
+        parts = module.split(".") if module else []
+        for base in bases:
+            resolved = []
+            for index in range(1, len(parts) + 1):
+                resolved.extend(self._python_module(base, parts[:index]))
+            # モジュール自体が見つからない場合は、この場所からの import ではない
+            if parts and not resolved:
+                continue
+            for name in names:
+                resolved.extend(self._python_module(base, parts + [name]))
+            if resolved:
+                return resolved
+        return []
+
+    def _python_module(self, base: str, parts: List[str]) -> List[str]:
+        path = posixpath.join(base, *parts)
+        for candidate in (path + ".py", path + ".pyi", path + "/__init__.py"):
+            if candidate in self.files:
+                return [candidate]
+        return []
+
+    def _resolve_script(self, rel_path: str, specifier: str) -> List[str]:
+        """
+        JavaScript / TypeScript の相対パスのモジュール指定子を収集済みのファイルに解決する
+
+        拡張子の省略、ディレクトリの index、.js で書いた TypeScript のファイルに対応する。
+        パッケージ名の指定子は解決しない。
+        """
+        if not specifier.startswith(("./", "../")) and specifier not in (".", ".."):
+            return []
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(rel_path), specifier.split("?")[0]))
+        if path == ".." or path.startswith("../"):
+            return []
+        stem, extension = posixpath.splitext(path)
+        candidates = [path]
+        candidates.extend(stem + source for source in _TYPESCRIPT_SOURCES.get(extension, ()))
+        candidates.extend(path + extension for extension in SCRIPT_EXTENSIONS)
+        directory = "" if path == "." else path + "/"
+        candidates.extend(directory + "index" + extension for extension in SCRIPT_EXTENSIONS)
+        for candidate in candidates:
+            if candidate in self.files:
+                return [candidate]
+        return []
+
+
+def select_dependencies(root_dir: Path, file_paths: List[Path], entry_files: Sequence[str],
+                        max_depth: Optional[int] = DEPENDENCY_DEPTH, cache: Optional[RenderCache] = None,
+                        report: Optional[RunReport] = None) -> List[Path]:
+    """
+    エントリファイルと、そこから推移的に依存するファイルだけを選ぶ
+
+    Args:
+        root_dir: ルートディレクトリ
+        file_paths: 収集済みのファイルパスのリスト
+        entry_files: エントリファイルのパス（ルートからの相対パスまたは絶対パス）
+        max_depth: たどる依存関係の深さ（0 はエントリファイルのみ、1 は直接の依存先まで）。None の場合は制限しない
+        cache: import を保存するキャッシュ。None の場合は毎回読み込む
+        report: 指定した場合、選んだファイル数と読み込んだファイル数をカウンターに加える
+
+    Returns:
+        List[Path]: 選んだファイルパス（収集順）
+
+    Raises:
+        ValueError: エントリファイルが収集済みのファイルに含まれない場合
+    """
+    index = DependencyIndex(root_dir, file_paths, cache)
+    entries = []
+    for entry_file in entry_files:
+        entry_path = Path(os.path.normpath(root_dir / entry_file))
+        try:
+            rel_path = entry_path.relative_to(root_dir).as_posix()
+        except ValueError:
+            rel_path = None
+        if rel_path not in index.files:
+            raise ValueError(f"Entry file is not among the collected files: {entry_file}")
+        entries.append(rel_path)
+
+    depths = dict.fromkeys(entries, 0)
+    queue = deque(entries)
+    while queue:
+        rel_path = queue.popleft()
+        if max_depth is not None and depths[rel_path] >= max_depth:
+            continue
+        for dependency in index.dependencies(rel_path):
+            if dependency not in depths:
+                depths[dependency] = depths[rel_path] + 1
+                queue.append(dependency)
+
+    selected = [file_path for rel_path, file_path in index.files.items() if rel_path in depths]
+    logger.info(f"Selected {len(selected)} of {len(file_paths)} files from {len(entries)} entry files "
+                f"({index.parsed} files parsed)")
+    if report is not None:
+        report.count("dependency_selected", len(selected))
+        report.count("dependency_parsed", index.parsed)
+    return selected
@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import TREE_IGNORE, TREE_MAX_DEPTH, TREE_MAX_ENTRIES
+from matcher import compile_matcher
+
+
+def render_tree(root_dir: Path, listing: Dict[str, List[Tuple[str, bool]]], max_depth: int = TREE_MAX_DEPTH,
+                max_entries: Optional[int] = TREE_MAX_ENTRIES, ignore: Optional[List[str]] = None) -> str:
+    """
+    ディレクトリ一覧から `tree -N -L <max_depth>` と同じ形式のツリーを生成する
+
+    Args:
+        root_dir: ルートディレクトリ
+        listing: DirectoryWalker が記録したディレクトリ一覧
+        max_depth: 表示する最大の深さ（ルート直下が1）
+        max_entries: 1ディレクトリあたりに表示する最大エントリ数。None の場合は制限しない
+        ignore: 表示しない名前のパターン。None の場合は TREE_IGNORE を使う
+
+    Returns:
+        str: ツリーの文字列表現
+    """
+    ignored = compile_matcher(tuple(TREE_IGNORE if ignore is None else ignore))
+    lines = [str(root_dir)]
+    counts = {'directories': 0, 'files': 0}
+
+    def render(dir_path: str, prefix: str, level: int) -> None:
+        entries = [(name, is_dir) for name, is_dir in listing.get(dir_path, []) if not ignored.matches(name, is_dir)]
+        shown = entries if max_entries is None else entries[:max_entries]
+        hidden = len(entries) - len(shown)
+        for index, (name, is_dir) in enumerate(shown):
+            is_last = index == len(shown) - 1 and not hidden
+            lines.append(f"{prefix}{'└── ' if is_last else '├── '}{name}")
+            if is_dir:
+                counts['directories'] += 1
+                if level < max_depth:
+                    render(os.path.join(dir_path, name), prefix + ('    ' if is_last else '│   '), level + 1)
+            else:
+                counts['files'] += 1
+        if hidden:
+            lines.append(f"{prefix}└── ... ({hidden} more entries)")
+
+    render(os.fspath(root_dir), "", 1)
+    directories = f"{counts['directories']} director{'y' if counts['directories'] == 1 else 'ies'}"
+    files = f"{counts['files']} file{'' if counts['files'] == 1 else 's'}"
+    return "\n".join(lines) + f"\n\n{directories}, {files}\n"
+
+
+def format_directory_structure(tree_output: str) -> str:
+    """
+    ツリーの文字列をマークダウンの見出し付きブロックに変換する
+
+    Args:
+        tree_output: ツリーの文字列表現
+
+    Returns:
+        str: マークダウン形式のディレクトリ構造
+    """
+    if not tree_output:
+        return ""
+    return f"""## ディレクトリ構造\n\n```\n{tree_output}```\n\n"""
@@ -0,0 +1,152 @@
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from cache import content_digest
+from config import BINARY_SNIFF_BYTES, MAX_FILE_SIZE, OVERSIZE_POLICY, TRUNCATE_BYTES
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 読み込み結果の状態
+STATUS_OK = "ok"
+STATUS_TRUNCATED = "truncated"
+STATUS_BINARY = "binary"
+STATUS_TOO_LARGE = "too_large"
+STATUS_DECODE_ERROR = "decode_error"
+# 同じ内容のファイルが先に出力されているため、参照に置き換えた
+STATUS_DUPLICATE = "duplicate"
+
+# 出力に含めないファイルの状態
+SKIPPED_STATUSES = (STATUS_BINARY, STATUS_TOO_LARGE, STATUS_DECODE_ERROR)
+
+# テキストファイルに通常含まれる制御文字（タブ、改行、フォームフィードなど）
+_TEXT_CONTROL_BYTES = {7, 8, 9, 10, 12, 13, 27}
+
+
+@dataclass
+class FileContent:
+    """
+    ファイルの読み込み結果
+
+    Attributes:
+        text: デコードしたファイルの内容。出力しないファイルの場合は空文字列
+        status: 読み込み結果の状態（STATUS_*）
+        size: ファイルサイズ（バイト）
+        digest: 読み込んだバイト列のハッシュ（要求された場合のみ）
+    """
+    text: str
+    status: str
+    size: int
+    digest: Optional[str] = None
+
+
+def is_binary(sample: bytes) -> bool:
+    """
+    先頭のバイト列からバイナリファイルかどうかを判定する
+
+    NUL バイトを含む場合、または制御文字の割合が30%を超える場合にバイナリとみなす。
+
+    Args:
+        sample: ファイル先頭のバイト列
+
+    Returns:
+        bool: バイナリファイルの場合はTrue
+    """
+    if not sample:
+        return False
+    if b"\x00" in sample:
+        return True
+    control_bytes = sum(1 for byte in sample if byte < 32 and byte not in _TEXT_CONTROL_BYTES)
+    return control_bytes / len(sample) > 0.3
+
+
+def read_file(file_path: Path, max_file_size: Optional[int] = MAX_FILE_SIZE,
+              oversize_policy: str = OVERSIZE_POLICY, truncate_bytes: int = TRUNCATE_BYTES,
+              with_digest: bool = False) -> FileContent:
+    """
+    ファイルを分類しながら1回で読み込む
+
+    先頭 BINARY_SNIFF_BYTES バイトを読んでバイナリかどうかを判定し、テキストの場合は
+    同じファイルハンドルから残りを読む。max_file_size を超えるファイルは oversize_policy に従い、
+    "skip" なら読み込まず、"truncate" なら mmap で先頭と末尾の truncate_bytes バイトだけを取り出す。
+
+    Args:
+        file_path: ファイルパス
+        max_file_size: 全体を読み込む最大のファイルサイズ。None の場合は制限しない
+        oversize_policy: 上限を超えるファイルの扱い（"skip" または "truncate"）
+        truncate_bytes: "truncate" の場合に先頭と末尾からそれぞれ取り出すバイト数
+        with_digest: 読み込んだバイト列のハッシュも計算するか
+
+    Returns:
+        FileContent: ファイルの読み込み結果
+    """
+    with open(file_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if max_file_size is not None and size > max_file_size:
+            if oversize_policy == "skip":
+                logger.warning(f"Skipped oversized file ({size:,} bytes): {file_path}")
+                return FileContent("", STATUS_TOO_LARGE, size)
+            return _read_sampled(file, file_path, size, truncate_bytes, with_digest)
+
+        head = file.read(BINARY_SNIFF_BYTES)
+        if is_binary(head):
+            logger.warning(f"Skipped binary file: {file_path}")
+            return FileContent("", STATUS_BINARY, size)
+        data = head + file.read()
+
+    digest = content_digest(data) if with_digest else None
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        logger.error(f"UnicodeDecodeError: {file_path}")
+        return FileContent("", STATUS_DECODE_ERROR, size, digest)
+    return FileContent(_normalize_newlines(text), STATUS_OK, size, digest)
+
+
+def _read_sampled(file, file_path: Path, size: int, truncate_bytes: int, with_digest: bool) -> FileContent:
+    """
+    巨大なファイルの先頭と末尾だけを mmap で取り出す
+
+    Args:
+        file: バイナリモードで開いたファイル
+        file_path: ファイルパス
+        size: ファイルサイズ
+        truncate_bytes: 先頭と末尾からそれぞれ取り出すバイト数
+        with_digest: 取り出したバイト列のハッシュも計算するか
+
+    Returns:
+        FileContent: ファイルの読み込み結果
+    """
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        head = mapped[:truncate_bytes]
+        tail = mapped[max(truncate_bytes, size - truncate_bytes):]
+    if is_binary(head[:BINARY_SNIFF_BYTES]):
+        logger.warning(f"Skipped binary file: {file_path}")
+        return FileContent("", STATUS_BINARY, size)
+
+    omitted = size - len(head) - len(tail)
+    # 切り出した境界で分断されたマルチバイト文字は捨てる
+    text = (f"{head.decode('utf-8', errors='ignore')}\n"
+            f"... ({omitted:,} bytes omitted) ...\n"
+            f"{tail.decode('utf-8', errors='ignore')}")
+    logger.warning(f"Truncated oversized file ({size:,} bytes): {file_path}")
+    digest = content_digest(head + tail + str(size).encode()) if with_digest else None
+    return FileContent(_normalize_newlines(text), STATUS_TRUNCATED, size, digest)
+
+
+def _normalize_newlines(text: str) -> str:
+    """
+    改行コードを \\n に統一する（read_text のユニバーサル改行と同じ扱い）
+
+    Args:
+        text: 文字列
+
+    Returns:
+        str: 改行コードを統一した文字列
+    """
+    if '\r' not in text:
+        return text
+    return text.replace('\r\n', '\n').replace('\r', '\n')
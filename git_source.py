@@ -0,0 +1,311 @@
+"""
+Git リポジトリからファイルを列挙するモジュール
+
+`git ls-files` で管理ファイルと .gitignore で除外されていない未追跡ファイルを取得し、
+ディレクトリを走査せずに DirectoryWalker と同じ順序でエントリを返す。
+git コマンドが使えない場合は .git/index を直接読み、管理ファイルだけを列挙する。
+"""
+import os
+import struct
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from config import DEFAULT_FILE_SOURCE, GIT_TIMEOUT
+from logging_config import get_logger
+from walker import DirectoryWalker
+
+logger = get_logger(__name__)
+
+# インデックスのエントリで、ファイル名より前の固定長部分のバイト数
+_INDEX_ENTRY_HEADER = 62
+# サブモジュール（gitlink）のファイルモード
+_GITLINK_MODE = 0o160000
+
+
+class GitEntry(NamedTuple):
+    """
+    os.DirEntry の代わりに返すファイルエントリ
+
+    Attributes:
+        name: ファイル名
+        path: ファイルパス
+    """
+    name: str
+    path: str
+
+
+class GitWalker(DirectoryWalker):
+    """
+    Git から得たファイルの一覧を、DirectoryWalker と同じ順序で走査するクラス
+
+    ディレクトリは一覧に含まれるファイルのパスから組み立てるため、.gitignore で除外された
+    ビルド成果物などのディレクトリには一切触れない。除外パターンも DirectoryWalker と同様に適用する。
+    """
+
+    def __init__(self, exclude_dirs: List[str], paths: List[str], listing_depth: Optional[int] = None):
+        """
+        Args:
+            exclude_dirs: 除外するディレクトリ名またはgitignore形式のパターンのリスト
+            paths: ルートからの相対パス（区切りは `/`）のリスト
+            listing_depth: ディレクトリ一覧を記録する深さ（ルートが0）。None の場合は記録しない
+        """
+        super().__init__(exclude_dirs, listing_depth=listing_depth)
+        self.paths = paths
+
+    def walk(self, root_dir: Path, max_depth: Optional[int] = None) -> Iterator[GitEntry]:
+        """
+        ファイルの一覧をディレクトリごとに名前順に並べて返す
+
+        Args:
+            root_dir: ルートディレクトリ
+            max_depth: 列挙するエントリの最大の深さ（ルート直下が1）。None の場合は制限しない
+
+        Yields:
+            GitEntry: 収集対象候補のファイルエントリ
+        """
+        matcher = self.matcher
+        stack = [(os.fspath(root_dir), "", _build_tree(self.paths), 0)]
+        while stack:
+            current, prefix, node, depth = stack.pop()
+            self.directories.append(current)
+            sub_dirs = []
+            listing = [] if self.listing_depth is not None and depth < self.listing_depth else None
+            for name in sorted(node):
+                child = node[name]
+                is_dir = child is not None
+                rel_path = prefix + name
+                if matcher and matcher.matches(rel_path, is_dir):
+                    self.excluded += 1
+                    continue
+                path = os.path.join(current, name)
+                if is_dir:
+                    sub_dirs.append((path, rel_path + "/", child, depth + 1))
+                elif os.path.isfile(path):
+                    # サブモジュール（gitlink）やディレクトリへのシンボリックリンクはファイルとして返さない
+                    yield GitEntry(name, path)
+                if listing is not None:
+                    listing.append((name, is_dir))
+            if listing is not None:
+                self.listing[current] = listing
+            if max_depth is not None and depth + 1 >= max_depth:
+                continue
+            stack.extend(reversed(sub_dirs))
+
+
+def create_walker(root_dir: Path, exclude_dirs: List[str], listing_depth: Optional[int] = None,
+                  source: str = DEFAULT_FILE_SOURCE) -> DirectoryWalker:
+    """
+    ファイルの列挙方法に応じた walker を生成する
+
+    Args:
+        root_dir: ルートディレクトリ
+        exclude_dirs: 除外するディレクトリリスト
+        listing_depth: ディレクトリ一覧を記録する深さ
+        source: ファイルの列挙方法（"filesystem" または "git"）
+
+    Returns:
+        DirectoryWalker: "git" で Git リポジトリの場合は GitWalker、それ以外は DirectoryWalker
+    """
+    if source == "git":
+        paths = list_git_files(root_dir)
+        if paths is not None:
+            logger.info(f"Listed {len(paths)} files from git: {root_dir}")
+            return GitWalker(exclude_dirs, paths, listing_depth=listing_depth)
+        logger.info(f"Not a git repository, falling back to the filesystem: {root_dir}")
+    elif source != "filesystem":
+        raise ValueError(f"Unknown file source: {source}")
+    return DirectoryWalker(exclude_dirs, listing_depth=listing_depth)
+
+
+def list_git_files(root_dir: Path) -> Optional[List[str]]:
+    """
+    Git の管理ファイルと、.gitignore で除外されていない未追跡ファイルを取得する
+
+    削除済みの管理ファイルは含めない。git コマンドが見つからない場合は .git/index から
+    管理ファイルだけを読み取る。
+
+    Args:
+        root_dir: ルートディレクトリ（リポジトリのサブディレクトリでもよい）
+
+    Returns:
+        Optional[List[str]]: ルートからの相対パス（区切りは `/`）のリスト。Git リポジトリでない場合は None
+    """
+    try:
+        listed = _git_ls_files(root_dir, "--cached", "--others", "--exclude-standard")
+        if listed is None:
+            return None
+        deleted = set(_git_ls_files(root_dir, "--deleted") or [])
+    except FileNotFoundError:
+        return read_index_files(root_dir)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"git ls-files に失敗しました: {root_dir}: {e}")
+        return None
+    return [path for path in dict.fromkeys(listed) if path not in deleted]
+
+
+def _git_ls_files(root_dir: Path, *options: str) -> Optional[List[str]]:
+    """
+    ルートディレクトリで git ls-files を実行する
+
+    Args:
+        root_dir: ルートディレクトリ
+        options: git ls-files のオプション
+
+    Returns:
+        Optional[List[str]]: ルートからの相対パスのリスト。Git リポジトリでない場合は None
+    """
+    result = subprocess.run(["git", "-c", "core.quotepath=off", "ls-files", "-z", *options],
+                            cwd=root_dir, capture_output=True, timeout=GIT_TIMEOUT)
+    if result.returncode != 0:
+        return None
+    output = result.stdout.decode("utf-8", "surrogateescape")
+    return [path for path in output.split("\0") if path]
+
+
+def read_index_files(root_dir: Path) -> Optional[List[str]]:
+    """
+    .git/index を直接読み、ルート以下の管理ファイルを取得する
+
+    Args:
+        root_dir: ルートディレクトリ（リポジトリのサブディレクトリでもよい）
+
+    Returns:
+        Optional[List[str]]: ルートからの相対パスのリスト。Git リポジトリでない場合や読み取れない場合は None
+    """
+    root_dir = Path(root_dir).resolve()
+    for work_tree in (root_dir, *root_dir.parents):
+        git_dir = _find_git_dir(work_tree)
+        if git_dir is not None:
+            break
+    else:
+        return None
+
+    try:
+        names = parse_index((git_dir / "index").read_bytes())
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as e:
+        logger.warning(f"Git のインデックスを読み取れませんでした: {git_dir}: {e}")
+        return None
+
+    prefix = root_dir.relative_to(work_tree).as_posix()
+    if prefix == ".":
+        return [name for name in names if os.path.lexists(work_tree / name)]
+    prefix += "/"
+    return [name[len(prefix):] for name in names
+            if name.startswith(prefix) and os.path.lexists(work_tree / name)]
+
+
+def parse_index(data: bytes) -> List[str]:
+    """
+    Git のインデックスファイル（バージョン2〜4）からファイルのパスを取り出す
+
+    サブモジュールは含めず、競合中のファイルは1回だけ返す。
+
+    Args:
+        data: インデックスファイルの内容
+
+    Returns:
+        List[str]: リポジトリのルートからの相対パスのリスト
+
+    Raises:
+        ValueError: インデックスの形式が不正な場合
+    """
+    if len(data) < 12 or data[:4] != b"DIRC":
+        raise ValueError("Not a git index file")
+    version, count = struct.unpack(">II", data[4:12])
+    if version not in (2, 3, 4):
+        raise ValueError(f"Unsupported index version: {version}")
+
+    names: Dict[str, None] = {}
+    offset = 12
+    previous = b""
+    for _ in range(count):
+        start = offset
+        mode = struct.unpack(">I", data[offset + 24:offset + 28])[0]
+        flags = struct.unpack(">H", data[offset + 60:offset + 62])[0]
+        offset += _INDEX_ENTRY_HEADER
+        if version >= 3 and flags & 0x4000:
+            offset += 2
+
+        if version == 4:
+            strip, offset = _read_varint(data, offset)
+            end = data.index(b"\0", offset)
+            name = previous[:len(previous) - strip] + data[offset:end]
+            offset = end + 1
+        else:
+            end = data.index(b"\0", offset)
+            name = data[offset:end]
+            # エントリは8バイト境界まで NUL で埋められる（最低1バイト）
+            offset = start + ((end - start) // 8 + 1) * 8
+        previous = name
+
+        if mode & 0o170000 != _GITLINK_MODE:
+            names[name.decode("utf-8", "surrogateescape")] = None
+    return list(names)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """
+    インデックスのバージョン4で使われる可変長整数を読む
+
+    Args:
+        data: インデックスファイルの内容
+        offset: 読み始める位置
+
+    Returns:
+        Tuple[int, int]: (値, 次の位置)
+    """
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def _find_git_dir(work_tree: Path) -> Optional[Path]:
+    """
+    作業ツリーの .git ディレクトリを探す（ワークツリーの `.git` ファイルにも対応する）
+
+    Args:
+        work_tree: 作業ツリーの候補
+
+    Returns:
+        Optional[Path]: .git ディレクトリ。見つからない場合は None
+    """
+    dot_git = work_tree / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    if dot_git.is_file():
+        content = dot_git.read_text(encoding="utf-8", errors="replace").strip()
+        if content.startswith("gitdir:"):
+            git_dir = Path(content[len("gitdir:"):].strip())
+            return git_dir if git_dir.is_absolute() else work_tree / git_dir
+    return None
+
+
+def _build_tree(paths: List[str]) -> dict:
+    """
+    相対パスのリストから、名前 -> 子の辞書（ファイルは None）の入れ子構造を組み立てる
+
+    Args:
+        paths: ルートからの相対パスのリスト
+
+    Returns:
+        dict: ルートディレクトリの入れ子構造
+    """
+    tree: dict = {}
+    for path in paths:
+        node = tree
+        *dirs, name = path.split("/")
+        for dir_name in dirs:
+            child = node.get(dir_name)
+            if child is None:
+                child = node[dir_name] = {}
+            node = child
+        node.setdefault(name, None)
+    return tree
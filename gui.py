@@ -1,15 +1,21 @@
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from pathlib import Path
+import io
+import queue
 import subprocess
+import threading
 
 from logging_config import setup_logging,get_logger
 from preset_manager import PresetManager
 from config import (
     EXCLUDE_DIRS, DEFAULT_TARGET_FILES,
-    SUPPORTED_EXTENSIONS, DEFAULT_OUTPUT_DIR
+    SUPPORTED_EXTENSIONS, DEFAULT_OUTPUT_DIR, DEFAULT_WORKERS, DEFAULT_FILE_SOURCE, DEFAULT_TRANSFORMS,
+    REDUCE_TRANSFORMS
 )
-from main import generate_summary
+from main import GenerationCancelled, generate_summary
+from cache import RenderCache
+from watcher import WatchSession, watch
 
 setup_logging()
 logger = get_logger(__name__)
@@ -17,7 +23,7 @@ logger = get_logger(__name__)
 def main():
     window = tk.Tk()
     window.title("Context Generator")
-    window.geometry("820x450")
+    window.geometry("900x600")
 
     preset_manager = PresetManager()
     # 起動時のディレクトリを取得
@@ -40,18 +46,34 @@ def main():
             exclude_dirs.set(preset_data.get('exclude_dirs', exclude_dirs.get()))
             output_dir.set(preset_data.get('output_dir', output_dir.get()))
             target_files.set(preset_data.get('target_files', target_files.get()))
+            entry_files.set(preset_data.get('entry_files', ""))
             preset_extensions = preset_data.get('include_extensions', [])
             for ext, var in extension_vars.items():
                 var.set(ext in preset_extensions)
             output_format.set(preset_data.get('output_format', output_format.get()))
             copy_to_clipboard.set(preset_data.get('copy_to_clipboard', False))
+            workers.set(preset_data.get('workers', workers.get()))
+            use_cache.set(preset_data.get('use_cache', True))
+            use_git.set(preset_data.get('source', DEFAULT_FILE_SOURCE) == "git")
+            watch_changes.set(preset_data.get('watch', False))
+            reduce_output.set(bool(preset_data.get('transforms', DEFAULT_TRANSFORMS)))
 
     root_dir = tk.StringVar(value=str(initial_dir))
     exclude_dirs = tk.StringVar(value=", ".join(EXCLUDE_DIRS))
     output_dir = tk.StringVar(value=str(DEFAULT_OUTPUT_DIR))
     output_format = tk.StringVar(value=".md")  # デフォルト値を .md に設定
     target_files = tk.StringVar(value=", ".join(DEFAULT_TARGET_FILES))
+    entry_files = tk.StringVar(value="")
     copy_to_clipboard = tk.BooleanVar(value=False)
+    workers = tk.IntVar(value=DEFAULT_WORKERS)
+    use_cache = tk.BooleanVar(value=True)
+    use_git = tk.BooleanVar(value=DEFAULT_FILE_SOURCE == "git")
+    watch_changes = tk.BooleanVar(value=False)
+    reduce_output = tk.BooleanVar(value=bool(DEFAULT_TRANSFORMS))
+    # 監視中のスレッドを止めるためのイベント
+    watch_state = {'stop': None}
+    # 生成中のワーカーを中断するためのイベント
+    generation_state = {'cancel': None}
 
     extension_vars = {ext: tk.BooleanVar(value=ext in [".md", ".py"]) for ext in SUPPORTED_EXTENSIONS}
 
@@ -79,15 +101,69 @@ def main():
 
     ttk.Label(window, text="対象ファイル (カンマ区切り):").grid(row=4, column=0, sticky=tk.W, padx=10, pady=5)
     ttk.Entry(window, textvariable=target_files, width=50).grid(row=4, column=1, padx=10, pady=5)
+
+    # 指定すると、エントリファイルから import をたどって依存するファイルだけを出力する
+    ttk.Label(window, text="エントリファイル (カンマ区切り):").grid(row=5, column=0, sticky=tk.W, padx=10, pady=5)
+    ttk.Entry(window, textvariable=entry_files, width=50).grid(row=5, column=1, padx=10, pady=5)
     # ファイル形式選択のラジオボタンを追加
-    ttk.Label(window, text="出力ファイル形式:").grid(row=5, column=0, sticky=tk.W, padx=10, pady=5)
+    ttk.Label(window, text="出力ファイル形式:").grid(row=6, column=0, sticky=tk.W, padx=10, pady=5)
     format_frame = ttk.Frame(window)
-    format_frame.grid(row=5, column=1, sticky=tk.W, padx=10, pady=5)
+    format_frame.grid(row=6, column=1, sticky=tk.W, padx=10, pady=5)
     ttk.Radiobutton(format_frame, text=".md", variable=output_format, value=".md").pack(side=tk.LEFT, padx=5)
     ttk.Radiobutton(format_frame, text=".txt", variable=output_format, value=".txt").pack(side=tk.LEFT, padx=5)
     ttk.Radiobutton(format_frame, text="クリップボードにコピー", 
                     variable=output_format, value="clipboard").pack(side=tk.LEFT, padx=5)
 
+    ttk.Label(window, text="実行オプション:").grid(row=7, column=0, sticky=tk.W, padx=10, pady=5)
+    option_frame = ttk.Frame(window)
+    option_frame.grid(row=7, column=1, sticky=tk.W, padx=10, pady=5)
+    ttk.Label(option_frame, text="並列ワーカー数").pack(side=tk.LEFT, padx=5)
+    ttk.Spinbox(option_frame, from_=1, to=64, textvariable=workers, width=5).pack(side=tk.LEFT, padx=5)
+    ttk.Checkbutton(option_frame, text="キャッシュを使用", variable=use_cache).pack(side=tk.LEFT, padx=5)
+    ttk.Checkbutton(option_frame, text="Git の管理ファイルのみ", variable=use_git).pack(side=tk.LEFT, padx=5)
+    ttk.Checkbutton(option_frame, text="コメント等を削除", variable=reduce_output).pack(side=tk.LEFT, padx=5)
+    ttk.Checkbutton(option_frame, text="変更を監視して更新", variable=watch_changes,
+                    command=lambda: on_watch_toggled()).pack(side=tk.LEFT, padx=5)
+
+    def on_watch_toggled():
+        # チェックを外したら監視を止める（開始はサマリーの生成時）
+        if not watch_changes.get():
+            stop_watching()
+
+    def stop_watching():
+        if watch_state['stop'] is not None:
+            watch_state['stop'].set()
+            watch_state['stop'] = None
+
+    def start_watching(session_args: dict, output_path: Path):
+        # 生成直後のキャッシュを使うため、最初の build はほとんど読み込みを伴わない
+        stop_watching()
+        stop_event = threading.Event()
+        watch_state['stop'] = stop_event
+        # Tk の変数はメインスレッドでしか読めないため、先に値を取り出しておく
+        use_cache_value = use_cache.get()
+
+        def run():
+            cache = RenderCache() if use_cache_value else None
+            try:
+                session = WatchSession(output_path=output_path, cache=cache, **session_args)
+                session.build()
+                watch(session, stop_event)
+            except Exception as e:
+                logger.error(f"Failed to watch changes: {e}")
+            finally:
+                if cache is not None:
+                    cache.close()
+
+        threading.Thread(target=run, name="summary-watcher", daemon=True).start()
+
+    def on_close():
+        stop_watching()
+        cancel_generation()
+        window.destroy()
+
+    window.protocol("WM_DELETE_WINDOW", on_close)
+
     def open_output_directory(path: Path):
         if path.exists():
             if Path.cwd().drive:  # Windows
@@ -97,6 +173,32 @@ def main():
         else:
             messagebox.showerror("エラー", f"ディレクトリが見つかりません：\n{path}")
 
+    def format_stats_message(file_stats) -> str:
+        # ファイル統計情報を整形
+        stats_message = ""
+        for ext, data in file_stats.items():
+            stats_message += f"{ext}: {data['count']}個, {data['chars']}文字, {data['tokens']}トークン"
+            if data.get('reduced_chars', data['chars']) < data['chars']:
+                stats_message += f"（縮小後 {data['reduced_chars']}文字）"
+            if data['skipped']:
+                stats_message += f", {data['skipped']}個スキップ"
+            if data.get('duplicates'):
+                stats_message += f", {data['duplicates']}個重複"
+            stats_message += "\n"
+        return stats_message
+
+    def set_running(running: bool):
+        generate_button.config(state=tk.DISABLED if running else tk.NORMAL)
+        cancel_button.config(state=tk.NORMAL if running else tk.DISABLED)
+        if not running:
+            progress.set(0)
+            progress_label.set("")
+
+    def cancel_generation():
+        if generation_state['cancel'] is not None:
+            generation_state['cancel'].set()
+            progress_label.set("キャンセルしています...")
+
     def generate_summary_callback():
         if not root_dir.get():
             messagebox.showerror("エラー", "ルートディレクトリを選択してください。")
@@ -111,34 +213,106 @@ def main():
             'include_extensions': selected_extensions,
             'output_dir': output_dir.get(),
             'target_files': target_files.get(),
-            'output_format': output_format.get()
+            'entry_files': entry_files.get(),
+            'output_format': output_format.get(),
+            'workers': workers.get(),
+            'use_cache': use_cache.get(),
+            'source': "git" if use_git.get() else "filesystem",
+            'transforms': REDUCE_TRANSFORMS if reduce_output.get() else [],
+            'watch': watch_changes.get()
         }
         preset_manager.save_preset(Path(root_dir.get()), preset_data)
 
-        try:
-            file_stats, total_chars = generate_summary(
-                Path(root_dir.get()),
-                [dir.strip() for dir in exclude_dirs.get().split(",")],
-                selected_extensions,
-                output_filename if output_format.get() != "clipboard" else "temp.md",
-                Path(output_dir.get()),
-                [file.strip() for file in target_files.get().split(",")]
-            )
-
-            # ファイル統計情報を整形
-            stats_message = ""
-            for ext, data in file_stats.items():
-                stats_message += f"{ext}: {data['count']}個, {data['chars']}文字\n"
+        to_clipboard = output_format.get() == "clipboard"
+        if watch_changes.get() and to_clipboard:
+            messagebox.showerror("エラー", "変更の監視はファイルに出力する場合のみ使えます。")
+            return
+
+        session_args = {
+            'root_dir': Path(root_dir.get()),
+            'exclude_dirs': [dir.strip() for dir in exclude_dirs.get().split(",")],
+            'include_extensions': selected_extensions,
+            'target_files': [file.strip() for file in target_files.get().split(",")],
+            'workers': workers.get(),
+            'source': preset_data['source'],
+            'transforms': preset_data['transforms'],
+            'entry_files': [file.strip() for file in entry_files.get().split(",") if file.strip()],
+        }
+        output_path = Path(output_dir.get()) / output_filename
+        # Tk の変数はメインスレッドでしか読めないため、先に値を取り出しておく
+        use_cache_value = use_cache.get()
+        cancel_event = threading.Event()
+        generation_state['cancel'] = cancel_event
+        # Tk はメインスレッドからしか操作できないため、ワーカーの結果はキューで受け渡す
+        messages = queue.Queue()
+
+        def on_progress(done: int, total: int, file_path: Path):
+            messages.put(("progress", done, total, file_path))
+
+        def run():
+            cache = RenderCache() if use_cache_value else None
+            # クリップボードに送る場合は一時ファイルを使わずメモリ上に書き込む
+            sink = io.StringIO() if to_clipboard else None
+            try:
+                file_stats, total_chars = generate_summary(
+                    session_args['root_dir'],
+                    session_args['exclude_dirs'],
+                    session_args['include_extensions'],
+                    output_path.name,
+                    output_path.parent,
+                    session_args['target_files'],
+                    sink=sink,
+                    workers=session_args['workers'],
+                    cache=cache,
+                    source=session_args['source'],
+                    transforms=session_args['transforms'],
+                    entry_files=session_args['entry_files'],
+                    progress_callback=on_progress,
+                    cancel_event=cancel_event
+                )
+                messages.put(("done", file_stats, total_chars, sink.getvalue() if sink is not None else None))
+            except GenerationCancelled:
+                messages.put(("cancelled",))
+            except Exception as e:
+                logger.error(f"Failed to generate summary: {e}")
+                messages.put(("error", e))
+            finally:
+                if cache is not None:
+                    cache.close()
+
+        def poll_messages():
+            try:
+                while True:
+                    message = messages.get_nowait()
+                    if message[0] == "progress":
+                        _, done, total, file_path = message
+                        progress.set(done * 100 / total if total else 100)
+                        progress_label.set(f"{done}/{total} {file_path.name}")
+                    else:
+                        finish(message)
+                        return
+            except queue.Empty:
+                pass
+            window.after(100, poll_messages)
 
+        def finish(message):
+            generation_state['cancel'] = None
+            set_running(False)
+            if message[0] == "cancelled":
+                messagebox.showinfo("キャンセル", "サマリーの生成をキャンセルしました。")
+                return
+            if message[0] == "error":
+                messagebox.showerror("エラー", f"サマリーの生成中にエラーが発生しました：\n{str(message[1])}")
+                return
+
+            _, file_stats, total_chars, content = message
+            stats_message = format_stats_message(file_stats)
             # クリップボードにコピーする場合
-            if output_format.get() == "clipboard":
+            if to_clipboard:
                 try:
-                    output_path = Path(output_dir.get()) / "temp.md"
-                    content = output_path.read_text(encoding='utf-8')
                     window.clipboard_clear()
                     window.clipboard_append(content)
                     window.update()  # クリップボードの更新を確実にする
-                    output_path.unlink()  # 一時ファイルを削除
                     logger.info("Summary content copied to clipboard")
                     messagebox.showinfo("成功",
                                     f"サマリーがクリップボードにコピーされました。\n\n"
@@ -149,19 +323,33 @@ def main():
                     messagebox.showerror("エラー", 
                                     f"クリップボードへのコピー中にエラーが発生しました：\n{str(e)}")
             else:
+                if watch_changes.get():
+                    start_watching(session_args, output_path)
                 # 成功メッセージとファイル統計情報を表示
                 messagebox.showinfo("成功",
                                 f"サマリーが生成されました。\n\n"
                                 f"{stats_message}\n"
                                 f"合計文字数: {total_chars}文字\n\n"
-                                f"保存先: {Path(output_dir.get()) / output_filename}"
+                                f"保存先: {output_path}"
                                 )
-                open_output_directory(Path(output_dir.get()))
+                open_output_directory(output_path.parent)
+
+        set_running(True)
+        progress_label.set("ファイルを収集しています...")
+        threading.Thread(target=run, name="summary-generator", daemon=True).start()
+        window.after(100, poll_messages)
 
-        except Exception as e:
-            messagebox.showerror("エラー", f"サマリーの生成中にエラーが発生しました：\n{str(e)}")
+    button_frame = ttk.Frame(window)
+    button_frame.grid(row=8, column=1, pady=(20, 5))
+    generate_button = ttk.Button(button_frame, text="サマリーを生成", command=generate_summary_callback)
+    generate_button.pack(side=tk.LEFT, padx=5)
+    cancel_button = ttk.Button(button_frame, text="キャンセル", command=cancel_generation, state=tk.DISABLED)
+    cancel_button.pack(side=tk.LEFT, padx=5)
 
-    ttk.Button(window, text="サマリーを生成", command=generate_summary_callback).grid(row=6, column=1, pady=20)
+    progress = tk.DoubleVar(value=0)
+    progress_label = tk.StringVar(value="")
+    ttk.Progressbar(window, variable=progress, maximum=100, length=400).grid(row=9, column=1, padx=10)
+    ttk.Label(window, textvariable=progress_label).grid(row=10, column=1, padx=10, pady=(0, 10))
 
     window.mainloop()
 
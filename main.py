@@ -1,23 +1,127 @@
 import platform
-import re
-import fnmatch
-from collections import defaultdict
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, field, fields, replace
+from itertools import islice
 from pathlib import Path
-import subprocess
-from typing import List, Dict, Tuple
-
-from config import EXCLUDE_FILES
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Sequence, TextIO, Tuple, Union
+
+from cache import RenderCache, StatKey
+from config import (
+    DEDUP_FILES, DEFAULT_BUDGET_PRIORITY, DEFAULT_EXECUTOR, DEFAULT_FILE_SOURCE, DEFAULT_SPLIT_UNIT, DEFAULT_TOKENIZER,
+    DEFAULT_TRANSFORMS, DEFAULT_WORKERS, DEPENDENCY_DEPTH, EXCLUDE_FILES,
+    MAX_FILE_SIZE, OVERSIZE_POLICY, TREE_MAX_DEPTH, TREE_MAX_ENTRIES, TRUNCATE_BYTES
+)
+from dependencies import select_dependencies
+from directory_tree import format_directory_structure, render_tree
+from file_reader import SKIPPED_STATUSES, STATUS_DUPLICATE, STATUS_OK, STATUS_TRUNCATED, read_file
+from git_source import create_walker
 from logging_config import get_logger, setup_logging
+from matcher import compile_matcher
+from output_writer import OutputWriter, SectionWriter, StreamWriter
+from profiling import profiled
+from report import RunReport
+from tokenizer import get_tokenizer
+from transforms import get_pipeline, validate_transforms
+from walker import DirectoryWalker
 
 setup_logging()
 logger = get_logger(__name__)
 
+# ファイル一覧の見出し
+FILE_LIST_HEADER = '## ファイル一覧\n\n'
+
+# 処理済みのファイル数・全体のファイル数・処理したファイルパスを受け取る進捗の通知先
+ProgressCallback = Callable[[int, int, Path], None]
+
+
+class GenerationCancelled(Exception):
+    """
+    cancel_event によってサマリーの生成が中断されたことを表す例外
+    """
+
+
+@dataclass
+class RenderedFile:
+    """
+    1回の読み込みで得られるファイルごとの処理結果
+
+    Attributes:
+        path: ファイルパス
+        extension: 拡張子
+        chars: 元の内容の文字数
+        reduced_chars: 変換後の内容の文字数
+        block: マークダウンに書き出すブロック
+        tokens: ブロックのトークン数
+        status: 読み込み結果の状態（"ok", "truncated", "binary", "too_large", "decode_error"）
+        digest: ファイル内容のハッシュ（必要な場合のみ計算する）
+        read_seconds: 読み込みにかかった時間（キャッシュには保存しない）
+        render_seconds: 変換にかかった時間（キャッシュには保存しない）
+    """
+    path: Path
+    extension: str
+    chars: int
+    block: str
+    reduced_chars: int = 0
+    tokens: int = 0
+    status: str = STATUS_OK
+    digest: Optional[str] = None
+    read_seconds: float = field(default=0.0, metadata={'cache': False})
+    render_seconds: float = field(default=0.0, metadata={'cache': False})
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    """
+    ファイルごとの処理結果に影響するオプション
 
+    プロセスプールのワーカーに渡すため、pickle 可能な値だけを持つ。
+
+    Attributes:
+        tokenizer: トークン数の計算に使うトークナイザー名
+        max_file_size: 全体を読み込む最大のファイルサイズ。None の場合は制限しない
+        oversize_policy: 上限を超えるファイルの扱い（"truncate" または "skip"）
+        truncate_bytes: "truncate" の場合に先頭と末尾からそれぞれ取り出すバイト数
+        with_digest: ファイル内容のハッシュも計算するか
+        transforms: 出力前に内容を縮小する変換名（transforms.TRANSFORMS のキー）
+    """
+    tokenizer: str = DEFAULT_TOKENIZER
+    max_file_size: Optional[int] = MAX_FILE_SIZE
+    oversize_policy: str = OVERSIZE_POLICY
+    truncate_bytes: int = TRUNCATE_BYTES
+    with_digest: bool = False
+    transforms: Tuple[str, ...] = ()
+
+
+@profiled
 def generate_summary(root_dir: Path, exclude_dirs: List[str], include_extensions: List[str], output_file: str,
-                     output_dir: Path, target_files: List[str]) -> Tuple[Dict[str, Dict[str, int]], str]:
+                     output_dir: Path, target_files: List[str], *,
+                     sink: Optional[TextIO] = None, workers: int = DEFAULT_WORKERS,
+                     executor: str = DEFAULT_EXECUTOR,
+                     cache: Optional[RenderCache] = None, tree_depth: int = TREE_MAX_DEPTH,
+                     tree_max_entries: Optional[int] = TREE_MAX_ENTRIES, tokenizer: str = DEFAULT_TOKENIZER,
+                     max_tokens: Optional[int] = None,
+                     budget_priority: str = DEFAULT_BUDGET_PRIORITY, max_file_size: Optional[int] = MAX_FILE_SIZE,
+                     oversize_policy: str = OVERSIZE_POLICY, source: str = DEFAULT_FILE_SOURCE,
+                     split_limit: Optional[int] = None, split_unit: str = DEFAULT_SPLIT_UNIT,
+                     compression: Optional[str] = None, dedup: bool = DEDUP_FILES,
+                     transforms: Sequence[str] = DEFAULT_TRANSFORMS, entry_files: Optional[Sequence[str]] = None,
+                     dependency_depth: Optional[int] = DEPENDENCY_DEPTH, walker: Optional[DirectoryWalker] = None,
+                     report: Optional[RunReport] = None, progress_callback: Optional[ProgressCallback] = None,
+                     cancel_event: Optional[threading.Event] = None) -> Tuple[Dict[str, Dict[str, int]], str]:
     """
     サマリーを生成する
 
+    出力はファイルごとに逐次書き込まれるため、メモリ使用量は最大のファイルサイズ程度に収まる。
+    max_tokens を指定すると、出力全体のトークン数がその値を超えないようにファイルを選ぶ。
+    環境変数 CONTEXT_GENERATOR_PROFILE を設定すると、実行を cProfile で計測する（profiling モジュールを参照）。
+
     Args:
         root_dir: ルートディレクトリ
         exclude_dirs: 除外するディレクトリリスト
@@ -25,90 +129,237 @@ def generate_summary(root_dir: Path, exclude_dirs: List[str], include_extensions
         output_file: 出力ファイル名
         output_dir: 出力フォルダ
         target_files: 取得対象のファイル名リスト
+        sink: 書き込み先のテキストストリーム。指定した場合は output_dir / output_file の代わりに書き込む
+        workers: ファイルの読み込みと変換を並列に行うワーカー数。1の場合は逐次処理する
+        executor: 並列処理に使うプールの種類（"thread" または "process"）
+        cache: 変更のないファイルの処理結果を再利用するキャッシュ。None の場合は使わない
+        tree_depth: ディレクトリ構造を表示する深さ。0の場合は表示しない
+        tree_max_entries: ディレクトリ構造で1ディレクトリあたりに表示する最大エントリ数
+        tokenizer: トークン数の計算に使うトークナイザー名（"approx" または "tiktoken"）
+        max_tokens: 出力全体のトークン数の上限。None の場合は制限しない
+        budget_priority: 上限がある場合のファイルの選び方
+            "order": 収集順に含め、上限に達した時点で打ち切る
+            "small-first": 小さいファイルから優先して含める
+            "targets-first": 対象ファイル（target_files）を優先し、残りは収集順に含める
+        max_file_size: 全体を読み込む最大のファイルサイズ（バイト）。None の場合は制限しない
+        oversize_policy: 上限を超えるファイルの扱い
+            "truncate": 先頭と末尾だけを出力する
+            "skip": 出力しない
+        source: ファイルの列挙方法
+            "filesystem": ディレクトリを走査する
+            "git": Git の管理ファイルと .gitignore で除外されていない未追跡ファイルを列挙する。
+                Git リポジトリでない場合は "filesystem" と同じ
+        split_limit: 指定した場合、出力をファイルの境界で分割ファイル1つあたりこの大きさまでに分け、
+            マニフェスト（`<名前>.manifest.json`）に分割ファイルごとの内容を記録する
+        split_unit: split_limit の単位（"bytes", "chars", "tokens"）
+        compression: 出力の圧縮形式（"gzip" はファイルごとに .gz、"zip" は1つの .zip）。None の場合は圧縮しない
+        dedup: 同じ内容のファイルを、最初に出力したファイルへの参照に置き換えるか
+        transforms: 出力前に内容を縮小する変換名のリスト（"signatures", "docstrings", "license", "comments",
+            "blank-lines"）。拡張子ごとに適用できるものだけを行う
+        entry_files: 指定した場合、収集したファイルのうち、これらのファイル（ルートからの相対パス）と
+            Python / JavaScript / TypeScript の import で推移的に依存するファイルだけを出力する。
+            ファイルごとの import は cache に保存する
+        dependency_depth: entry_files からたどる依存関係の深さ。None の場合は制限しない
+        walker: 走査に使う DirectoryWalker（listing_depth は tree_depth にしておくこと）。
+            None の場合は source に応じて生成する
+        report: 指定した場合、フェーズごとの所要時間やスキップしたファイルなどの実行記録を書き込む
+        progress_callback: ファイルを1つ処理するたびに (処理済みのファイル数, 全体のファイル数, ファイルパス) で呼び出す関数
+        cancel_event: セットされると、次のファイルを処理する前に生成を中断する
 
     Returns:
-        Tuple[Dict[str, Dict[str, int]], str]: ファイル統計情報と合計文字数
+        Tuple[Dict[str, Dict[str, int]], str]: ファイル統計情報と合計文字数。
+            バイナリや上限超過で出力しなかったファイルは拡張子ごとの 'skipped' に、
+            先頭と末尾だけを出力したファイルは 'truncated' に、参照に置き換えたファイルは 'duplicates' に数える。
+            変換前後の文字数は 'chars' と 'reduced_chars' に数える
+
+    Raises:
+        GenerationCancelled: cancel_event によって中断された場合。出力ファイルは削除される
+        ValueError: sink と分割・圧縮を同時に指定した場合、未登録の変換名を指定した場合、
+            またはエントリファイルが収集したファイルに含まれない場合
     """
+    if sink is not None and (split_limit is not None or compression is not None):
+        raise ValueError("split_limit and compression require an output file, not a sink")
+    validate_transforms(transforms)
 
-    # ディレクトリ構造を取得
-    directory_structure = get_directory_structure(root_dir, exclude_dirs)
-
-    # ファイル収集
-    file_paths = collect_files(root_dir, exclude_dirs, include_extensions, target_files)
+    report = report if report is not None else RunReport()
 
-    # ファイル統計計算
-    file_stats, total_chars = calculate_file_stats(file_paths)
+    # ファイル収集（ディレクトリ構造の表示に使う一覧も同じ走査で記録する）
+    with report.phase("walk"):
+        if walker is None:
+            walker = create_walker(root_dir, exclude_dirs, listing_depth=tree_depth, source=source)
+        file_paths = collect_files(root_dir, exclude_dirs, include_extensions, target_files, walker=walker,
+                                   report=report)
 
-    # マークダウン出力生成
-    output_content = generate_markdown_output(root_dir, file_paths, directory_structure)
+    # エントリファイルを指定した場合は、依存するファイルだけに絞り込む
+    if entry_files:
+        with report.phase("deps"):
+            file_paths = select_dependencies(root_dir, file_paths, entry_files, dependency_depth, cache, report)
 
-    # ファイル出力
-    output_path = output_dir / output_file
-    output_path.write_text(output_content, encoding='utf-8')
-    logger.info(f"Summary generated successfully: {output_path}")
+    # ディレクトリ構造を取得
+    with report.phase("tree"):
+        directory_structure = get_directory_structure(root_dir, exclude_dirs, tree_depth, tree_max_entries, walker)
+    _check_cancelled(cancel_event)
+
+    # トークン数の上限がある場合は、優先順位に従って含めるファイルを絞り込む
+    if max_tokens is not None:
+        file_paths = prioritize_files(root_dir, file_paths, max_tokens, budget_priority, target_files)
+
+    # 各ファイルを1回だけ読み込み、統計を集計しながらマークダウンを逐次書き込む
+    options = RenderOptions(tokenizer=tokenizer, max_file_size=max_file_size, oversize_policy=oversize_policy,
+                            with_digest=dedup, transforms=tuple(transforms))
+    # 出力ファイルに書き込む場合、例外で中断したら途中までの出力ファイルは削除される
+    writer = StreamWriter(sink) if sink is not None else \
+        OutputWriter(output_dir / output_file, split_limit=split_limit, split_unit=split_unit,
+                     compression=compression, tokenizer=tokenizer)
+    report.output_path = writer.main_path if sink is None else None
+    try:
+        # 読み込み・変換・書き込みはファイルごとに交互に行われるため、メモリはまとめて計測する
+        with nullcontext(writer) if sink is not None else writer, report.track_memory("output"):
+            file_stats, total_chars = write_markdown_output(writer, root_dir, file_paths, directory_structure,
+                                                            workers=workers, executor=executor, cache=cache,
+                                                            options=options, max_tokens=max_tokens,
+                                                            budget_priority=budget_priority, report=report,
+                                                            progress_callback=progress_callback,
+                                                            cancel_event=cancel_event, dedup=dedup)
+    except GenerationCancelled:
+        logger.info("Summary generation cancelled")
+        raise
+    if split_limit is not None:
+        report.count("parts", len(writer.parts))
+    logger.info(f"Summary generated successfully: {report.output_path or 'sink'}")
 
     return file_stats, total_chars
 
 
-def get_directory_structure(root_dir: Path, exclude_dirs: List[str]) -> str:
+def get_directory_structure(root_dir: Path, exclude_dirs: List[str], max_depth: int = TREE_MAX_DEPTH,
+                            max_entries: Optional[int] = TREE_MAX_ENTRIES,
+                            walker: Optional[DirectoryWalker] = None) -> str:
     """
     ディレクトリ構造を取得する関数
 
+    tree コマンドは使わず、Python でツリーを生成する。ファイル収集で使った walker を
+    渡した場合は、その走査で記録したディレクトリ一覧を再利用する。
+
     Args:
         root_dir: ルートディレクトリ
         exclude_dirs: 除外するディレクトリリスト
+        max_depth: 表示する最大の深さ
+        max_entries: 1ディレクトリあたりに表示する最大エントリ数
+        walker: ディレクトリ一覧を記録済みの DirectoryWalker
 
     Returns:
         str: ディレクトリ構造の文字列表現
     """
-    if is_windows():
-        logger.warning("Windows環境では tree コマンドを使用しません。")
+    if max_depth <= 0:
         return ""
+    if walker is None:
+        walker = DirectoryWalker(exclude_dirs, listing_depth=max_depth)
+        for _ in walker.walk(root_dir, max_depth=max_depth):
+            pass
+    tree_output = render_tree(root_dir, walker.listing, max_depth, max_entries)
+    return format_directory_structure(tree_output)
 
-    exclude_pattern = "|".join(exclude_dirs + ["__pycache__", "*.pyc"])
-    try:
-        tree_output = subprocess.check_output(
-            ["tree", "-N", "-L", "4", "-I", exclude_pattern, str(root_dir)],
-            encoding='utf-8'
-        )
-        if not tree_output:
-            logger.warning("ディレクトリ構造が取得できませんでした。")
-            return ""
-        directory_structure = f"""## ディレクトリ構造\n\n```\n{tree_output}```\n\n"""
-        return directory_structure
-    except subprocess.CalledProcessError as e:
-        logger.error(f"tree コマンドの実行中にエラーが発生しました treeをインストールしてください。: {e}")
-        return ""
 
-
-def collect_files(root_dir: Path, exclude_dirs: List[str], include_extensions: List[str], target_files: List[str]) -> \
-List[Path]:
+def collect_files(root_dir: Path, exclude_dirs: List[str], include_extensions: List[str], target_files: List[str],
+                  walker: Optional[DirectoryWalker] = None, report: Optional[RunReport] = None) -> List[Path]:
     """
     指定された条件に基づいてファイルを収集する
 
+    除外ディレクトリは走査前に枝刈りされる。除外パターンと対象ファイルは gitignore 形式で、
+    globパターン（例: `*.egg-info`, `*.config.ts`）やルートからのパス（例: `docs/**/*.md`）にも一致する。
+
     Args:
         root_dir: ルートディレクトリ
         exclude_dirs: 除外するディレクトリリスト
         include_extensions: 含めるファイル拡張子リスト
-        target_files: 取得対象のファイル名リスト
+        target_files: 取得対象のファイル名またはパターンのリスト
+        walker: 走査に使う DirectoryWalker。ディレクトリ一覧を記録させたい場合に渡す
+        report: 指定した場合、除外したエントリ数をカウンターに加える
 
     Returns:
         List[Path]: 収集されたファイルパスのリスト
     """
     file_paths = []
-    for path in root_dir.rglob('*'):
-        if path.is_file():
-            relative_path = path.relative_to(root_dir)
-            if not any(part in exclude_dirs for part in relative_path.parts):
-                if any(fnmatch.fnmatch(path.name, pattern) for pattern in EXCLUDE_FILES):
-                    logger.info(f"Excluded: {path}")
-                    continue
-                if path.suffix in include_extensions or path.name in target_files:
-                    file_paths.append(path)
-    logger.info(f'Collected {len(file_paths)} files')
+    excluded = 0
+    walker = walker or DirectoryWalker(exclude_dirs)
+    excluded_files = compile_matcher(tuple(EXCLUDE_FILES))
+    targets = compile_matcher(tuple(target_files))
+    extensions = frozenset(include_extensions)
+    prefix_length = len(os.path.join(os.fspath(root_dir), ""))
+    for entry in walker.walk(root_dir):
+        rel_path = entry.path[prefix_length:]
+        if os.sep != "/":
+            rel_path = rel_path.replace(os.sep, "/")
+        if excluded_files.matches(rel_path):
+            excluded += 1
+            continue
+        if os.path.splitext(entry.name)[1] in extensions or targets.matches(rel_path):
+            file_paths.append(Path(entry.path))
+    logger.info(f'Collected {len(file_paths)} files ({excluded} files and {walker.excluded} entries excluded)')
+    if report is not None:
+        report.count("excluded_files", excluded)
+        report.count("excluded_entries", walker.excluded)
     return file_paths
 
 
+def prioritize_files(root_dir: Path, file_paths: List[Path], max_tokens: int, budget_priority: str,
+                     target_files: List[str]) -> List[Path]:
+    """
+    トークン数の上限に収まるように、優先順位に従ってファイルを選ぶ
+
+    ファイルを読まずに済むよう、トークン数はファイルサイズから見積もる（4バイトで1トークン）。
+    見積もりは目安で、実際の上限は書き込み時に処理結果のトークン数で判定する。
+    選んだファイルは元の収集順のまま返す。
+
+    Args:
+        root_dir: ルートディレクトリ（ターゲットファイルはルートからの相対パスで判定する）
+        file_paths: 収集されたファイルパスのリスト
+        max_tokens: トークン数の上限
+        budget_priority: 優先順位の規則（"order", "small-first", "targets-first"）
+        target_files: 取得対象のファイル名またはパターンのリスト
+
+    Returns:
+        List[Path]: 選ばれたファイルパスのリスト
+    """
+    if budget_priority == "order":
+        return file_paths
+    sizes = {file_path: _file_size(file_path) for file_path in file_paths}
+    if budget_priority == "small-first":
+        ordered = sorted(file_paths, key=lambda file_path: sizes[file_path])
+    elif budget_priority == "targets-first":
+        targets = compile_matcher(tuple(target_files))
+        ordered = sorted(file_paths,
+                         key=lambda file_path: not targets.matches(file_path.relative_to(root_dir).as_posix()))
+    else:
+        raise ValueError(f"Unknown budget priority: {budget_priority}")
+
+    selected = set()
+    estimated_tokens = 0
+    for file_path in ordered:
+        file_tokens = sizes[file_path] // 4
+        if estimated_tokens + file_tokens > max_tokens:
+            continue
+        selected.add(file_path)
+        estimated_tokens += file_tokens
+    return [file_path for file_path in file_paths if file_path in selected]
+
+
+def _file_size(file_path: Path) -> int:
+    """
+    ファイルサイズを取得する。取得できない場合は0を返す
+
+    Args:
+        file_path: ファイルパス
+
+    Returns:
+        int: ファイルサイズ（バイト）
+    """
+    try:
+        return file_path.stat().st_size
+    except OSError:
+        return 0
+
+
 def calculate_file_stats(file_paths: List[Path]) -> Tuple[Dict[str, Dict[str, int]], int]:
     """
     ファイル統計情報を計算する
@@ -130,6 +381,131 @@ def calculate_file_stats(file_paths: List[Path]) -> Tuple[Dict[str, Dict[str, in
     return file_stats, format_number_with_commas(total_chars)
 
 
+def accumulate_file_stats(rendered_files: Iterable[RenderedFile]) -> Tuple[Dict[str, Dict[str, int]], str]:
+    """
+    処理済みファイルからファイル統計情報を集計する
+
+    Args:
+        rendered_files: 処理済みファイルのイテラブル
+
+    Returns:
+        Tuple[Dict[str, Dict[str, int]], str]: ファイル統計情報と合計文字数
+    """
+    collector = FileStatsCollector()
+    for rendered in rendered_files:
+        collector.add(rendered)
+    return collector.result()
+
+
+class FileStatsCollector:
+    """
+    処理済みファイルを受け取りながらファイル統計情報を集計するクラス
+    """
+
+    def __init__(self):
+        self.file_stats = defaultdict(lambda: {'count': 0, 'chars': 0, 'reduced_chars': 0, 'tokens': 0,
+                                               'skipped': 0, 'truncated': 0, 'duplicates': 0})
+        self.total_chars = 0
+        self.total_tokens = 0
+        # 出力しなかったファイルのパスと理由
+        self.skipped_files: List[Tuple[Path, str]] = []
+
+    def add(self, rendered: RenderedFile) -> None:
+        """
+        処理済みファイルを集計に加える
+
+        Args:
+            rendered: 処理済みファイル
+        """
+        if rendered.status in SKIPPED_STATUSES:
+            self.file_stats[rendered.extension]['skipped'] += 1
+            self.skipped_files.append((rendered.path, rendered.status))
+            return
+        if rendered.status == STATUS_DUPLICATE:
+            # 参照だけを出力したので、文字数には数えずトークン数だけを加える
+            self.file_stats[rendered.extension]['duplicates'] += 1
+            self.file_stats[rendered.extension]['tokens'] += rendered.tokens
+            self.total_tokens += rendered.tokens
+            return
+        if rendered.status == STATUS_TRUNCATED:
+            self.file_stats[rendered.extension]['truncated'] += 1
+        self.file_stats[rendered.extension]['count'] += 1
+        self.file_stats[rendered.extension]['chars'] += rendered.chars
+        self.file_stats[rendered.extension]['reduced_chars'] += rendered.reduced_chars
+        self.file_stats[rendered.extension]['tokens'] += rendered.tokens
+        self.total_chars += rendered.chars
+        self.total_tokens += rendered.tokens
+
+    def result(self) -> Tuple[Dict[str, Dict[str, int]], str]:
+        """
+        集計結果を返す
+
+        Returns:
+            Tuple[Dict[str, Dict[str, int]], str]: ファイル統計情報と合計文字数
+        """
+        return self.file_stats, format_number_with_commas(self.total_chars)
+
+
+class ContentDeduplicator:
+    """
+    同じ内容のファイルを、最初に出力したファイルへの参照に置き換えるクラス
+
+    内容の比較には読み込み時に計算したハッシュ（RenderedFile.digest）を使うため、
+    ファイルを読み直すことはない。参照先になるのは、record で出力済みと記録したファイルだけである
+    （トークン数の上限で出力しなかったファイルを参照しないようにするため）。
+    """
+
+    def __init__(self, root_dir: Path, tokenizer: str = DEFAULT_TOKENIZER):
+        """
+        Args:
+            root_dir: ルートディレクトリ
+            tokenizer: 参照のトークン数の計算に使うトークナイザー名
+        """
+        self.root_dir = root_dir
+        self._tokenizer = get_tokenizer(tokenizer)
+        # (状態, ハッシュ) -> 最初に全体を出力したファイルのパス
+        self._first: Dict[Tuple[str, str], Path] = {}
+        self.duplicates = 0
+        self.saved_bytes = 0
+
+    def apply(self, rendered: RenderedFile) -> RenderedFile:
+        """
+        既に同じ内容のファイルを出力していれば、参照に置き換えた処理結果を返す
+
+        出力するかどうかが決まってから、結果を record に渡すこと。
+
+        Args:
+            rendered: 処理済みファイル
+
+        Returns:
+            RenderedFile: 重複の場合は参照に置き換えた処理結果、それ以外は rendered そのもの
+        """
+        if rendered.digest is None or rendered.status not in (STATUS_OK, STATUS_TRUNCATED):
+            return rendered
+        first = self._first.get((rendered.status, rendered.digest))
+        if first is None or first == rendered.path:
+            return rendered
+        block = render_duplicate_block(self.root_dir, rendered.path, first)
+        # 空のファイルなど、参照の方が長くなる場合はそのまま出力する
+        if len(block.encode('utf-8')) >= len(rendered.block.encode('utf-8')):
+            return rendered
+        return replace(rendered, block=block, tokens=self._tokenizer.count(block), status=STATUS_DUPLICATE)
+
+    def record(self, rendered: RenderedFile, written: RenderedFile) -> None:
+        """
+        出力したファイルを記録する。全体を出力したファイルは、以降の同じ内容のファイルの参照先になる
+
+        Args:
+            rendered: apply に渡した処理済みファイル
+            written: 実際に出力した apply の結果
+        """
+        if written.status == STATUS_DUPLICATE:
+            self.duplicates += 1
+            self.saved_bytes += len(rendered.block.encode('utf-8')) - len(written.block.encode('utf-8'))
+        elif written.digest is not None and written.status in (STATUS_OK, STATUS_TRUNCATED):
+            self._first.setdefault((written.status, written.digest), written.path)
+
+
 def generate_markdown_output(root_dir: Path, file_paths: List[Path], directory_structure: str) -> str:
     """
     マークダウン形式の出力を生成する
@@ -143,33 +519,351 @@ def generate_markdown_output(root_dir: Path, file_paths: List[Path], directory_s
         str: マークダウン形式の出力
     """
 
-    file_content = '## ファイル一覧\n\n'
-    for file_path in file_paths:
-        content = read_file_content(file_path)
-        # python -m で始まるコマンドを python に変換(Claude Projectエラー対策)
-        content = re.sub(r'python -m', 'python', content, flags=re.MULTILINE)
-        # コードブロックの開始記号 ``` がマークダウンの区切りとして誤認識されるのを防ぐため、
-        content = re.sub(r'^```', '``````', content, flags=re.MULTILINE)
-        file_content += f"{file_path.relative_to(root_dir)}\n\n```{file_path.suffix}\n{content}\n```\n\n"
+    return "".join(iter_markdown_output(directory_structure, render_files(root_dir, file_paths)))
+
+
+def iter_markdown_output(directory_structure: str, rendered_files: Iterable[RenderedFile]) -> Iterator[str]:
+    """
+    マークダウン形式の出力を断片ごとに生成する
+
+    Args:
+        directory_structure: ディレクトリ構造の文字列
+        rendered_files: 処理済みファイルのイテラブル
+
+    Yields:
+        str: 出力の断片
+    """
+    yield directory_structure
+    yield FILE_LIST_HEADER
+    for rendered in rendered_files:
+        yield rendered.block
+
+
+def write_markdown_output(sink: Union[TextIO, SectionWriter], root_dir: Path, file_paths: List[Path], directory_structure: str,
+                          workers: int = DEFAULT_WORKERS,
+                          executor: str = DEFAULT_EXECUTOR,
+                          cache: Optional[RenderCache] = None, options: Optional[RenderOptions] = None,
+                          max_tokens: Optional[int] = None,
+                          budget_priority: str = DEFAULT_BUDGET_PRIORITY,
+                          report: Optional[RunReport] = None, progress_callback: Optional[ProgressCallback] = None,
+                          cancel_event: Optional[threading.Event] = None,
+                          dedup: bool = False) -> Tuple[Dict[str, Dict[str, int]], str]:
+    """
+    マークダウン形式の出力を書き込み先へ逐次書き込み、ファイル統計情報を集計する
 
-    return f"{directory_structure}{file_content}"
+    出力はディレクトリ構造・見出し・ファイルごとのブロックの断片ごとに書き込む。sink が SectionWriter の場合は
+    断片ごとにファイルの相対パスとトークン数も渡すため、ファイルの境界で出力を分割できる。
+    max_tokens を指定した場合、上限を超えるファイルは書き込まない。budget_priority が "order" の場合は
+    最初に上限を超えた時点で打ち切り、それ以外の場合は収まるファイルだけを書き込み続ける。
+
+    Args:
+        sink: 書き込み先のテキストストリームまたは SectionWriter
+        root_dir: ルートディレクトリ
+        file_paths: ファイルパスのリスト
+        directory_structure: ディレクトリ構造の文字列
+        workers: 並列ワーカー数
+        executor: 並列処理に使うプールの種類（"thread" または "process"）
+        cache: 処理結果のキャッシュ
+        options: ファイルごとの処理オプション
+        max_tokens: 出力全体のトークン数の上限
+        budget_priority: 上限がある場合のファイルの選び方
+        report: 所要時間と集計結果を書き込む実行記録
+        progress_callback: ファイルを1つ処理するたびに (処理済みのファイル数, 全体のファイル数, ファイルパス) で呼び出す関数
+        cancel_event: セットされると、次のファイルを処理する前に書き込みを中断する
+        dedup: 同じ内容のファイルを、最初に出力したファイルへの参照に置き換えるか。
+            ハッシュを比較するため、options.with_digest を有効にしておくこと
+
+    Returns:
+        Tuple[Dict[str, Dict[str, int]], str]: ファイル統計情報と合計文字数
+
+    Raises:
+        GenerationCancelled: cancel_event によって中断された場合
+    """
+    options = options or RenderOptions()
+    report = report if report is not None else RunReport()
+    collector = FileStatsCollector()
+    writer = sink if isinstance(sink, SectionWriter) else StreamWriter(sink)
+    tokenizer = get_tokenizer(options.tokenizer)
+    header_tokens = tokenizer.count(directory_structure + FILE_LIST_HEADER)
+    deduplicator = ContentDeduplicator(root_dir, options.tokenizer) if dedup else None
+
+    def collected() -> Iterator[RenderedFile]:
+        omitted = 0
+        for index, rendered in enumerate(render_files(root_dir, file_paths, workers, executor, cache, options)):
+            _check_cancelled(cancel_event)
+            report.add_time("read", rendered.read_seconds)
+            report.add_time("render", rendered.render_seconds)
+            if progress_callback is not None:
+                progress_callback(index + 1, len(file_paths), rendered.path)
+            written = deduplicator.apply(rendered) if deduplicator is not None else rendered
+            if max_tokens is not None and header_tokens + collector.total_tokens + written.tokens > max_tokens:
+                if budget_priority == "order":
+                    omitted = len(file_paths) - index
+                    break
+                omitted += 1
+                continue
+            collector.add(written)
+            yield written
+            # 書き込んだあとで記録するため、上限で出力しなかったファイルが参照先になることはない
+            if deduplicator is not None:
+                deduplicator.record(rendered, written)
+        if omitted:
+            logger.warning(f"Token budget {max_tokens:,} reached: omitted {omitted} files")
+            report.count("budget_omitted", omitted)
+
+    cache_hits = cache.hits if cache is not None else 0
+    def write(text: str, path: Optional[str] = None, tokens: Optional[int] = None) -> None:
+        start = time.perf_counter()
+        writer.write_section(text, path, tokens)
+        report.add_time("write", time.perf_counter() - start)
+
+    write(directory_structure)
+    write(FILE_LIST_HEADER)
+    for rendered in collected():
+        write(rendered.block, rendered.path.relative_to(root_dir).as_posix(), rendered.tokens)
+
+    file_stats, total_chars = collector.result()
+    report.file_stats = file_stats
+    report.file_count = sum(data['count'] for data in file_stats.values())
+    report.total_chars = collector.total_chars
+    report.total_tokens = collector.total_tokens
+    report.skipped_files.extend(collector.skipped_files)
+    if cache is not None:
+        report.count("cache_hits", cache.hits - cache_hits)
+    if deduplicator is not None and deduplicator.duplicates:
+        logger.info(f"Deduplicated {deduplicator.duplicates} files ({deduplicator.saved_bytes:,} bytes saved)")
+        report.count("duplicates", deduplicator.duplicates)
+        report.count("dedup_saved_bytes", deduplicator.saved_bytes)
+    return file_stats, total_chars
+
+
+def _check_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    """
+    中断が要求されていれば GenerationCancelled を送出する
+
+    Args:
+        cancel_event: 中断を要求するイベント
+
+    Raises:
+        GenerationCancelled: cancel_event がセットされている場合
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise GenerationCancelled()
+
+
+def render_files(root_dir: Path, file_paths: List[Path], workers: int = DEFAULT_WORKERS,
+                 executor: str = DEFAULT_EXECUTOR, cache: Optional[RenderCache] = None,
+                 options: Optional[RenderOptions] = None) -> Iterator[RenderedFile]:
+    """
+    ファイルを1回ずつ読み込み、処理結果を file_paths の順に返す
+
+    workers が2以上の場合はプールで並列に処理する。先読みするファイル数を
+    ワーカー数の2倍までに制限するため、メモリ使用量は逐次処理と同程度に収まる。
+    cache を指定した場合、変更のないファイルは読み込まずにキャッシュから返す。
+
+    Args:
+        root_dir: ルートディレクトリ
+        file_paths: ファイルパスのリスト
+        workers: 並列ワーカー数
+        executor: 並列処理に使うプールの種類（"thread" または "process"）
+        cache: 処理結果のキャッシュ
+        options: ファイルごとの処理オプション
+
+    Yields:
+        RenderedFile: ファイルごとの処理結果
+    """
+    options = options or RenderOptions()
+    if cache is not None and cache.hash_contents:
+        options = replace(options, with_digest=True)
+    options_key = render_options_key(options) if cache is not None else ""
+
+    if workers <= 1:
+        for file_path in file_paths:
+            stat_key, rendered = _load_cached(cache, root_dir, file_path, options_key)
+            if rendered is None:
+                rendered = render_file(root_dir, file_path, options)
+                _store_cached(cache, root_dir, rendered, stat_key, options_key)
+            yield rendered
+        return
+
+    remaining = iter(file_paths)
+    with create_executor(executor, workers) as pool:
+        def schedule(file_path: Path) -> Tuple[Optional[StatKey], Any]:
+            stat_key, rendered = _load_cached(cache, root_dir, file_path, options_key)
+            if rendered is not None:
+                return stat_key, rendered
+            return stat_key, pool.submit(render_file, root_dir, file_path, options)
+
+        pending = deque(schedule(file_path) for file_path in islice(remaining, workers * 2))
+        while pending:
+            stat_key, item = pending.popleft()
+            if isinstance(item, Future):
+                rendered = item.result()
+                _store_cached(cache, root_dir, rendered, stat_key, options_key)
+            else:
+                rendered = item
+            for file_path in islice(remaining, 1):
+                pending.append(schedule(file_path))
+            yield rendered
+
+
+def render_options_key(options: RenderOptions) -> str:
+    """
+    処理結果に影響するオプションからキャッシュキー用の文字列を生成する
+
+    RenderedFile のフィールド構成も含めるため、保存形式が変わると古いエントリは使われなくなる。
+
+    Args:
+        options: ファイルごとの処理オプション
+
+    Returns:
+        str: キャッシュキー用の文字列
+    """
+    schema = [item.name for item in fields(RenderedFile) if item.metadata.get('cache', True)]
+    return json.dumps({"schema": schema, **asdict(options)}, sort_keys=True, default=str)
+
+
+def _load_cached(cache: Optional[RenderCache], root_dir: Path, file_path: Path,
+                 options: str) -> Tuple[Optional[StatKey], Optional[RenderedFile]]:
+    """
+    キャッシュから処理結果を取得する
+
+    Args:
+        cache: 処理結果のキャッシュ
+        root_dir: ルートディレクトリ
+        file_path: ファイルパス
+        options: キャッシュキー用のオプション文字列
+
+    Returns:
+        Tuple[Optional[StatKey], Optional[RenderedFile]]: 読み込み前のファイル状態と、ヒットした場合の処理結果
+    """
+    if cache is None:
+        return None, None
+    stat_key = cache.stat_key(file_path)
+    data = cache.get(root_dir, file_path, stat_key, options)
+    if data is None:
+        return stat_key, None
+    return stat_key, RenderedFile(path=file_path, **data)
+
+
+def _store_cached(cache: Optional[RenderCache], root_dir: Path, rendered: RenderedFile,
+                  stat_key: Optional[StatKey], options: str) -> None:
+    """
+    処理結果をキャッシュに保存する
+
+    Args:
+        cache: 処理結果のキャッシュ
+        root_dir: ルートディレクトリ
+        rendered: 処理結果
+        stat_key: 読み込み前のファイル状態
+        options: キャッシュキー用のオプション文字列
+    """
+    if cache is None:
+        return
+    data = {item.name: getattr(rendered, item.name) for item in fields(RenderedFile)
+            if item.name != 'path' and item.metadata.get('cache', True)}
+    cache.put(root_dir, rendered.path, stat_key, options, data, rendered.digest)
+
+
+def create_executor(executor: str, workers: int) -> Executor:
+    """
+    並列処理用のプールを生成する
+
+    Args:
+        executor: プールの種類（"thread" または "process"）
+        workers: ワーカー数
+
+    Returns:
+        Executor: 生成したプール
+    """
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    if executor == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    raise ValueError(f"Unknown executor: {executor}")
+
+
+def render_file(root_dir: Path, file_path: Path, options: Optional[RenderOptions] = None) -> RenderedFile:
+    """
+    ファイルを1回読み込み、統計用の文字数・トークン数とマークダウンブロックを生成する
+
+    Args:
+        root_dir: ルートディレクトリ
+        file_path: ファイルパス
+        options: ファイルごとの処理オプション
+
+    Returns:
+        RenderedFile: ファイルの処理結果
+    """
+    options = options or RenderOptions()
+    start = time.perf_counter()
+    file_content = read_file(file_path, options.max_file_size, options.oversize_policy, options.truncate_bytes,
+                             options.with_digest)
+    read_seconds = time.perf_counter() - start
+    if file_content.status in SKIPPED_STATUSES:
+        return RenderedFile(path=file_path, extension=file_path.suffix, chars=0, block="",
+                            status=file_content.status, digest=file_content.digest, read_seconds=read_seconds)
+    start = time.perf_counter()
+    content = get_pipeline(file_path.suffix, options.transforms)(file_content.text)
+    block = format_markdown_block(root_dir, file_path, content)
+    tokens = get_tokenizer(options.tokenizer).count(block)
+    return RenderedFile(
+        path=file_path,
+        extension=file_path.suffix,
+        chars=len(file_content.text),
+        reduced_chars=len(content),
+        block=block,
+        tokens=tokens,
+        status=file_content.status,
+        digest=file_content.digest,
+        read_seconds=read_seconds,
+        render_seconds=time.perf_counter() - start,
+    )
+
+
+def format_markdown_block(root_dir: Path, file_path: Path, content: str) -> str:
+    """
+    変換済みの内容をマークダウンのブロックで囲む
+
+    Args:
+        root_dir: ルートディレクトリ
+        file_path: ファイルパス
+        content: 変換済みのファイルの内容
+
+    Returns:
+        str: マークダウンのブロック
+    """
+    return f"{file_path.relative_to(root_dir)}\n\n```{file_path.suffix}\n{content}\n```\n\n"
+
+
+def render_duplicate_block(root_dir: Path, file_path: Path, first_path: Path) -> str:
+    """
+    先に出力したファイルと同じ内容のファイルを、参照のブロックに変換する
+
+    Args:
+        root_dir: ルートディレクトリ
+        file_path: ファイルパス
+        first_path: 同じ内容で先に出力したファイルのパス
+
+    Returns:
+        str: マークダウンのブロック
+    """
+    return f"{file_path.relative_to(root_dir)}\n\n（{first_path.relative_to(root_dir)} と同じ内容のため省略）\n\n"
 
 
 def read_file_content(file_path: Path) -> str:
     """
     ファイルの内容を読み取る
 
+    バイナリファイルや UTF-8 としてデコードできないファイルの場合は空文字列を返す。
+
     Args:
         file_path: ファイルパス
 
     Returns:
         str: ファイルの内容
     """
-    try:
-        return file_path.read_text(encoding='utf-8')
-    except UnicodeDecodeError:
-        logger.error(f"UnicodeDecodeError: {file_path}")
-        return ""
+    return read_file(file_path, max_file_size=None).text
 
 
 def is_windows():
@@ -193,15 +887,7 @@ def format_number_with_commas(number: int) -> str:
 
 
 if __name__ == '__main__':
-    root_dir = Path("./")  # ルートディレクトリを指定
-    exclude_dirs = [".venv", ".git"]  # 除外するディレクトリ
-    include_extensions = [".md", ".yaml", ".yml",
-                          ".txt", ".py", ".html"]  # 含めるファイル拡張子
-    output_file = "summary.md"
-    output_dir = Path.home() / "Desktop"  # 出力フォルダを指定
-    target_files = ["README.md", "requirements.txt",
-                    "config.yaml", "Dockerfile"]  # 取得対象のファイル名を指定
-    file_stats = generate_summary(root_dir, exclude_dirs, include_extensions,
-                                  output_file, output_dir, target_files)
-    print("Summary generated successfully!")
-    print("File statistics:")
+    # コマンドラインからの実行は cli.py に委譲する
+    from cli import main as cli_main
+
+    sys.exit(cli_main())
@@ -0,0 +1,268 @@
+"""
+gitignore 形式のパターンをまとめて判定するパスマッチャー
+
+パターンは実行ごとに1回だけコンパイルし、種類ごとに最も速い判定方法に振り分ける。
+
+- ワイルドカードを含まない名前（例: `node_modules`）: 名前のセット
+- `*.ext` 形式（例: `*.pyc`, `*.min.js`）: 接尾辞のセット
+- その他の名前のパターン（例: `*secret*`）: 1つにまとめた正規表現
+- `/` を含むパターン（例: `/build`, `docs/**/*.md`）: ルートからの相対パスに対する正規表現
+
+gitignore と同様に、`/` で終わるパターンはディレクトリだけに一致し、`!` で始まるパターンは
+それより前のパターンで除外したものを再び含める。
+"""
+import re
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Optional, Pattern, Tuple
+
+
+class _RuleSet:
+    """
+    否定パターンを含まないパターンの集合を、判定方法ごとに振り分けて保持するクラス
+    """
+
+    def __init__(self, rules: List[Tuple[str, bool]]):
+        """
+        Args:
+            rules: (パターン, ルートからのパスに対するパターンか) のリスト
+        """
+        names = set()
+        suffixes = set()
+        name_globs = []
+        path_globs = []
+        for pattern, anchored in rules:
+            if anchored:
+                path_globs.append(pattern)
+            elif not _has_magic(pattern):
+                names.add(pattern)
+            elif pattern.startswith("*") and not _has_magic(pattern[1:]) and pattern[1:2] == ".":
+                suffixes.add(pattern[1:])
+            else:
+                name_globs.append(pattern)
+        self.names: FrozenSet[str] = frozenset(names)
+        self.suffixes: FrozenSet[str] = frozenset(suffixes)
+        self.name_regex = _compile(name_globs)
+        self.path_regex = _compile(path_globs)
+
+    def __bool__(self) -> bool:
+        return bool(self.names or self.suffixes or self.name_regex or self.path_regex)
+
+    def match(self, name: str, rel_path: str) -> bool:
+        """
+        名前または相対パスがいずれかのパターンに一致するかを判定する
+
+        Args:
+            name: ファイル名またはディレクトリ名
+            rel_path: ルートからの相対パス（区切りは `/`）
+
+        Returns:
+            bool: 一致する場合はTrue
+        """
+        if name in self.names:
+            return True
+        if self.suffixes:
+            index = name.find(".")
+            while index != -1:
+                if name[index:] in self.suffixes:
+                    return True
+                index = name.find(".", index + 1)
+        if self.name_regex is not None and self.name_regex.fullmatch(name):
+            return True
+        return self.path_regex is not None and self.path_regex.fullmatch(rel_path) is not None
+
+
+class PathMatcher:
+    """
+    gitignore 形式のパターンの集合に対してパスを判定するクラス
+
+    compile_matcher で生成すると、同じパターンの組み合わせはプロセス内で使い回される。
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Args:
+            patterns: gitignore 形式のパターン。空行と `#` で始まる行は無視する
+        """
+        # (パターン, ルートからのパスに対するパターンか, ディレクトリのみか, 否定か)
+        self._rules: List[Tuple[str, bool, bool, bool]] = []
+        for raw in patterns:
+            rule = _parse(raw)
+            if rule is not None:
+                self._rules.append(rule)
+        self._has_negation = any(negated for _, _, _, negated in self._rules)
+        self._any_kind = _RuleSet([(pattern, anchored) for pattern, anchored, dir_only, _ in self._rules
+                                   if not dir_only])
+        self._dirs_only = _RuleSet([(pattern, anchored) for pattern, anchored, dir_only, _ in self._rules
+                                    if dir_only])
+        self._ordered = [(_RuleSet([(pattern, anchored)]), dir_only, negated)
+                         for pattern, anchored, dir_only, negated in self._rules] if self._has_negation else []
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def matches(self, rel_path: str, is_dir: bool = False) -> bool:
+        """
+        相対パスがパターンに一致するかを判定する（親ディレクトリは判定しない）
+
+        Args:
+            rel_path: ルートからの相対パス（区切りは `/`）
+            is_dir: パスがディレクトリかどうか
+
+        Returns:
+            bool: 一致する場合はTrue
+        """
+        name = rel_path.rsplit("/", 1)[-1]
+        if not self._has_negation:
+            return self._any_kind.match(name, rel_path) or (is_dir and self._dirs_only.match(name, rel_path))
+
+        matched = False
+        for rule_set, dir_only, negated in self._ordered:
+            if (is_dir or not dir_only) and rule_set.match(name, rel_path):
+                matched = not negated
+        return matched
+
+    def matches_path(self, rel_path: str) -> bool:
+        """
+        ファイルの相対パスが、自身または親ディレクトリのいずれかでパターンに一致するかを判定する
+
+        ディレクトリを走査せずにパスの一覧を得た場合（git ls-files など）に使う。
+
+        Args:
+            rel_path: ファイルのルートからの相対パス（区切りは `/`）
+
+        Returns:
+            bool: 自身または親ディレクトリが一致する場合はTrue
+        """
+        index = rel_path.find("/")
+        while index != -1:
+            if self.matches(rel_path[:index], is_dir=True):
+                return True
+            index = rel_path.find("/", index + 1)
+        return self.matches(rel_path)
+
+
+@lru_cache(maxsize=128)
+def compile_matcher(patterns: Tuple[str, ...]) -> PathMatcher:
+    """
+    パターンのタプルから PathMatcher を生成する
+
+    同じパターンの組み合わせはプロセス内で使い回すため、実行ごと・リポジトリごとに
+    何度呼び出してもコンパイルは1回で済む。
+
+    Args:
+        patterns: gitignore 形式のパターンのタプル
+
+    Returns:
+        PathMatcher: コンパイル済みのマッチャー
+    """
+    return PathMatcher(patterns)
+
+
+def _parse(raw: str) -> Optional[Tuple[str, bool, bool, bool]]:
+    """
+    gitignore 形式の1行を解析する
+
+    Args:
+        raw: パターン文字列
+
+    Returns:
+        Optional[Tuple[str, bool, bool, bool]]: (パターン, ルートからのパスに対するパターンか, ディレクトリのみか, 否定か)。
+            空行やコメントの場合は None
+    """
+    pattern = raw.strip() if raw else ""
+    if not pattern or pattern.startswith("#"):
+        return None
+    negated = pattern.startswith("!")
+    if negated:
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+    # 途中または先頭に / を含むパターンはルートからのパスに対して判定する
+    anchored = "/" in pattern
+    if pattern.startswith("/"):
+        pattern = pattern[1:]
+    elif pattern.startswith("**/") and "/" not in pattern[3:]:
+        # `**/name` はどの階層の name にも一致するので名前のパターンとして扱う
+        pattern = pattern[3:]
+        anchored = False
+    return pattern, anchored, dir_only, negated
+
+
+def _compile(globs: List[str]) -> Optional[Pattern]:
+    """
+    globパターンのリストを1つの正規表現にまとめる
+
+    Args:
+        globs: globパターンのリスト
+
+    Returns:
+        Optional[Pattern]: まとめた正規表現。パターンがない場合は None
+    """
+    if not globs:
+        return None
+    return re.compile("|".join(f"(?:{_translate(glob)})" for glob in globs), re.DOTALL)
+
+
+def _translate(glob: str) -> str:
+    """
+    gitignore 形式のglobを正規表現に変換する
+
+    `*` と `?` は `/` に一致せず、`**` は任意の階層に一致する。
+
+    Args:
+        glob: globパターン
+
+    Returns:
+        str: 正規表現の文字列
+    """
+    output = []
+    index = 0
+    length = len(glob)
+    while index < length:
+        char = glob[index]
+        if glob.startswith("**/", index):
+            output.append("(?:.*/)?")
+            index += 3
+            continue
+        if glob.startswith("**", index):
+            output.append(".*")
+            index += 2
+            continue
+        if char == "*":
+            output.append("[^/]*")
+        elif char == "?":
+            output.append("[^/]")
+        elif char == "[":
+            end = glob.find("]", index + 2)
+            if end == -1:
+                output.append(re.escape(char))
+            else:
+                content = glob[index + 1:end]
+                if content.startswith("!"):
+                    content = "^" + content[1:]
+                output.append("[" + content.replace("\\", "\\\\") + "]")
+                index = end + 1
+                continue
+        elif char == "\\" and index + 1 < length:
+            output.append(re.escape(glob[index + 1]))
+            index += 2
+            continue
+        else:
+            output.append(re.escape(char))
+        index += 1
+    return "".join(output)
+
+
+def _has_magic(pattern: str) -> bool:
+    """
+    globの特殊文字を含むかを判定する
+
+    Args:
+        pattern: パターン文字列
+
+    Returns:
+        bool: 特殊文字を含む場合はTrue
+    """
+    return any(char in pattern for char in "*?[\\")
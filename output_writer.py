@@ -0,0 +1,225 @@
+"""
+サマリーの書き込み先
+
+write_markdown_output は出力を「断片」（ディレクトリ構造・見出し・ファイルごとのブロック）単位で書き込む。
+OutputWriter は断片の境界でファイルを分割し、どのファイルがどの分割ファイルに入ったかを
+マニフェストに記録する。分割ファイルは書き込みながら閉じていくため、出力全体をメモリに持つことはない。
+"""
+import gzip
+import io
+import json
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+from config import DEFAULT_SPLIT_UNIT, DEFAULT_TOKENIZER
+from logging_config import get_logger
+from tokenizer import get_tokenizer
+
+logger = get_logger(__name__)
+
+# 2つ目以降の分割ファイルの先頭に付ける見出し
+CONTINUATION_HEADER = '## ファイル一覧（続き）\n\n'
+
+
+class SectionWriter:
+    """
+    出力の断片を受け取る書き込み先の基底クラス
+    """
+
+    def write_section(self, text: str, path: Optional[str] = None, tokens: Optional[int] = None) -> None:
+        """
+        出力の断片を書き込む
+
+        Args:
+            text: 出力の断片
+            path: ファイルのブロックの場合は、ルートからの相対パス
+            tokens: 断片のトークン数（計算済みの場合）
+        """
+        raise NotImplementedError
+
+
+class StreamWriter(SectionWriter):
+    """
+    テキストストリームにそのまま書き込む SectionWriter
+    """
+
+    def __init__(self, stream: TextIO):
+        """
+        Args:
+            stream: 書き込み先のテキストストリーム
+        """
+        self.stream = stream
+
+    def write_section(self, text: str, path: Optional[str] = None, tokens: Optional[int] = None) -> None:
+        self.stream.write(text)
+
+
+class OutputWriter(SectionWriter):
+    """
+    出力ファイルへ書き込む SectionWriter
+
+    split_limit を指定すると、ファイルのブロックの境界で `<名前>.part001.md` のように分割し、
+    `<名前>.manifest.json` に分割ファイルごとのサイズと含まれるファイルを記録する。
+    1つのブロックが上限を超える場合は、そのブロックだけで1つの分割ファイルになる。
+    compression を指定すると、"gzip" はファイルごとに `.gz` を付けて圧縮し、
+    "zip" は出力全体を1つの `.zip` にまとめる。
+    """
+
+    def __init__(self, output_path: Path, split_limit: Optional[int] = None, split_unit: str = DEFAULT_SPLIT_UNIT,
+                 compression: Optional[str] = None, tokenizer: str = DEFAULT_TOKENIZER):
+        """
+        Args:
+            output_path: 出力ファイルのパス
+            split_limit: 分割ファイル1つあたりの上限。None の場合は分割しない
+            split_unit: 上限の単位（"bytes"（UTF-8 のバイト数）, "chars", "tokens"）
+            compression: 圧縮形式（None, "gzip", "zip"）
+            tokenizer: split_unit が "tokens" の場合に使うトークナイザー名
+
+        Raises:
+            ValueError: 上限の単位または圧縮形式が不正な場合
+        """
+        if split_unit not in ("bytes", "chars", "tokens"):
+            raise ValueError(f"Unknown split unit: {split_unit}")
+        if compression not in (None, "gzip", "zip"):
+            raise ValueError(f"Unknown compression: {compression}")
+        self.output_path = Path(output_path)
+        self.split_limit = split_limit
+        self.split_unit = split_unit
+        self.compression = compression
+        self._tokenizer = get_tokenizer(tokenizer)
+
+        # 作成したファイル（分割ファイル・アーカイブ・マニフェスト）
+        self.paths: List[Path] = []
+        self.parts: List[Dict[str, Any]] = []
+        self._archive: Optional[zipfile.ZipFile] = None
+        self._stream: Optional[TextIO] = None
+
+    @property
+    def main_path(self) -> Path:
+        """
+        結果として参照するファイル（分割する場合はマニフェスト、zip の場合はアーカイブ）
+        """
+        if self.split_limit is not None:
+            return self._sibling(".manifest.json")
+        if self.compression == "zip":
+            return self._sibling(".zip")
+        if self.compression == "gzip":
+            return self.output_path.with_name(self.output_path.name + ".gz")
+        return self.output_path
+
+    def write_section(self, text: str, path: Optional[str] = None, tokens: Optional[int] = None) -> None:
+        size = self._measure(text, tokens)
+        part = self.parts[-1] if self.parts else None
+        if part is None or (self.split_limit is not None and part["files"]
+                            and part["size"] + size > self.split_limit):
+            part = self._start_part()
+        if self.split_limit is not None and path is not None and not part["files"] and \
+                part["size"] + size > self.split_limit:
+            logger.warning(f"{path} exceeds the split limit ({size:,} > {self.split_limit:,} {self.split_unit})")
+        self._stream.write(text)
+        part["size"] += size
+        if path is not None:
+            part["files"].append(path)
+
+    def close(self) -> None:
+        """
+        開いているファイルを閉じ、分割した場合はマニフェストを書き込む
+        """
+        if not self.parts:
+            self._start_part()
+        self._close_stream()
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+        if self.split_limit is not None:
+            manifest = {
+                "unit": self.split_unit,
+                "limit": self.split_limit,
+                "compression": self.compression,
+                "archive": self._sibling(".zip").name if self.compression == "zip" else None,
+                "parts": self.parts,
+            }
+            manifest_path = self.main_path
+            manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+            self.paths.append(manifest_path)
+
+    def discard(self) -> None:
+        """
+        ファイルを閉じ、作成したファイルをすべて削除する
+        """
+        self._close_stream()
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+        for path in self.paths:
+            path.unlink(missing_ok=True)
+        self.paths = []
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def _start_part(self) -> Dict[str, Any]:
+        """
+        次の分割ファイルを開く
+
+        Returns:
+            Dict[str, Any]: マニフェストに記録する分割ファイルの情報
+        """
+        self._close_stream()
+        index = len(self.parts) + 1
+        name = self.output_path.name if self.split_limit is None else \
+            f"{self.output_path.stem}.part{index:03d}{self.output_path.suffix}"
+        if self.compression == "zip":
+            if self._archive is None:
+                archive_path = self._sibling(".zip")
+                self._archive = zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED)
+                self.paths.append(archive_path)
+            self._stream = io.TextIOWrapper(self._archive.open(name, "w"), encoding="utf-8")
+        elif self.compression == "gzip":
+            name += ".gz"
+            path = self.output_path.with_name(name)
+            self._stream = gzip.open(path, "wt", encoding="utf-8")
+            self.paths.append(path)
+        else:
+            path = self.output_path.with_name(name)
+            self._stream = path.open("w", encoding="utf-8")
+            self.paths.append(path)
+
+        part = {"name": name, "size": 0, "files": []}
+        self.parts.append(part)
+        if index > 1:
+            self._stream.write(CONTINUATION_HEADER)
+            part["size"] += self._measure(CONTINUATION_HEADER, None)
+        return part
+
+    def _close_stream(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _measure(self, text: str, tokens: Optional[int]) -> int:
+        """
+        断片の大きさを上限の単位で測る
+
+        Args:
+            text: 出力の断片
+            tokens: 計算済みのトークン数
+
+        Returns:
+            int: 断片の大きさ
+        """
+        if self.split_unit == "chars":
+            return len(text)
+        if self.split_unit == "tokens":
+            return tokens if tokens is not None else self._tokenizer.count(text)
+        return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+    def _sibling(self, suffix: str) -> Path:
+        return self.output_path.with_name(self.output_path.stem + suffix)
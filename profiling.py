@@ -0,0 +1,74 @@
+"""
+cProfile による計測
+
+環境変数 CONTEXT_GENERATOR_PROFILE にパスを設定すると、generate_summary の1回の実行を cProfile で計測し、
+結果を pstats 形式で書き出す。ディレクトリを指定した場合は実行ごとに別のファイルに書き出すため、
+バッチ処理のワーカープロセスでも結果が上書きされない。
+
+    CONTEXT_GENERATOR_PROFILE=summary.prof python cli.py /path/to/project -o summary.md
+    python -m pstats summary.prof
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar, Union
+
+from config import PROFILE_ENV
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+# ログに表示する関数の数
+PROFILE_TOP_FUNCTIONS = 20
+
+
+@contextmanager
+def profile_run(output_path: Optional[Union[str, Path]]) -> Iterator[None]:
+    """
+    ブロックを cProfile で計測し、結果をファイルに書き出す
+
+    Args:
+        output_path: 結果を書き出すパス。ディレクトリの場合はその中に `summary-<pid>-<時刻>.prof` を作る。
+            None または空文字列の場合は計測しない
+    """
+    if not output_path:
+        yield
+        return
+    output_path = Path(output_path)
+    if output_path.is_dir():
+        output_path = output_path / f"summary-{os.getpid()}-{time.time_ns()}.prof"
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(output_path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        logger.info(f"Profile written to {output_path}\n{summary.getvalue()}")
+
+
+def profiled(func: F) -> F:
+    """
+    環境変数 CONTEXT_GENERATOR_PROFILE が設定されている場合だけ、関数の実行を cProfile で計測するデコレーター
+
+    Args:
+        func: 計測する関数
+
+    Returns:
+        F: 計測を行う関数
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with profile_run(os.environ.get(PROFILE_ENV)):
+            return func(*args, **kwargs)
+
+    return wrapper
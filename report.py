@@ -0,0 +1,114 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 計測するフェーズ（walk: ファイル収集, tree: ディレクトリ構造, read: 読み込み, render: 変換, write: 書き込み）
+PHASES = ("walk", "tree", "read", "render", "write")
+
+
+@dataclass
+class RunReport:
+    """
+    generate_summary の1回の実行に関する機械可読な記録
+
+    Attributes:
+        timings: フェーズごとの所要時間（秒）。read と render は全ファイルの合計
+        counters: 実行中に数えたカウンター（キャッシュのヒット数など）
+        skipped_files: 出力しなかったファイルのパスと理由
+        output_path: 出力先のパス（ファイルに書き込んだ場合のみ）
+        file_count: 出力したファイル数
+        total_chars: 出力したファイルの合計文字数
+        total_tokens: 出力したファイルの合計トークン数
+        file_stats: 拡張子ごとのファイル統計情報
+        memory_peaks: 区間ごとのピークメモリ（バイト）。tracemalloc で計測中の場合のみ記録する
+    """
+    timings: Dict[str, float] = field(default_factory=lambda: {phase: 0.0 for phase in PHASES})
+    counters: Dict[str, int] = field(default_factory=dict)
+    skipped_files: List[Tuple[Path, str]] = field(default_factory=list)
+    output_path: Optional[Path] = None
+    file_count: int = 0
+    total_chars: int = 0
+    total_tokens: int = 0
+    file_stats: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    memory_peaks: Dict[str, int] = field(default_factory=dict)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        ブロックの所要時間をフェーズに加算する
+
+        Args:
+            name: フェーズ名
+        """
+        start = time.perf_counter()
+        try:
+            with self.track_memory(name):
+                yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    @contextmanager
+    def track_memory(self, name: str) -> Iterator[None]:
+        """
+        tracemalloc で計測中であれば、ブロックの間のピークメモリを記録する
+
+        Args:
+            name: 区間名
+        """
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            self.memory_peaks[name] = max(self.memory_peaks.get(name, 0), peak)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """
+        フェーズの所要時間を加算する
+
+        Args:
+            name: フェーズ名
+            seconds: 加算する秒数
+        """
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        カウンターを加算する
+
+        Args:
+            name: カウンター名
+            amount: 加算する値
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self, root_dir: Optional[Path] = None) -> Dict[str, Any]:
+        """
+        JSON に変換可能な辞書を返す
+
+        Args:
+            root_dir: 指定した場合、スキップしたファイルのパスをこのディレクトリからの相対パスで表す
+
+        Returns:
+            Dict[str, Any]: 実行記録
+        """
+        def display(path: Path) -> str:
+            return path.relative_to(root_dir).as_posix() if root_dir else str(path)
+
+        return {
+            "output": str(self.output_path) if self.output_path else None,
+            "files": self.file_count,
+            "total_chars": self.total_chars,
+            "total_tokens": self.total_tokens,
+            "stats": {extension: dict(data) for extension, data in sorted(self.file_stats.items())},
+            "skipped": [{"path": display(path), "reason": reason} for path, reason in self.skipped_files],
+            "timings": {name: round(seconds, 6) for name, seconds in self.timings.items()},
+            "counters": dict(self.counters),
+            "memory_peaks": dict(self.memory_peaks),
+        }
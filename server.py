@@ -0,0 +1,629 @@
+"""
+サマリーを返す常駐サーバー
+
+エディタや外部ツールから繰り返しサマリーを取得する用途を想定し、ルートディレクトリごとに
+ディレクトリ一覧とファイルごとの処理結果をメモリ上に保持する。2回目以降のリクエストでは、
+mtime が変わったディレクトリだけを読み直し、mtime とサイズが変わったファイルだけを処理し直す。
+保持する処理結果の合計サイズが上限を超えると、最後に使われてから時間の経ったルートから破棄する。
+
+localhost の HTTP または Unix ドメインソケットで待ち受ける。
+
+    python server.py --port 8765
+    python server.py --socket /tmp/context-generator.sock
+    curl -s localhost:8765/summary -d '{"root_dir": "/path/to/project", "include_extensions": [".py"]}'
+
+エンドポイント:
+    POST /summary: generate_summary と同じパラメーター（root_dir 以外は省略可）でサマリーと統計情報を返す
+    POST /invalidate: 指定したルート（root_dir を省略した場合はすべて）の保持内容を破棄する
+    GET /status: 保持しているルートとサイズを返す
+
+TCP では、Host ヘッダーが localhost・127.0.0.1・[::1]（と待ち受けているホスト）以外のリクエストを 403 で拒否する。
+"""
+import argparse
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from cache import RenderCache, StatKey
+from config import (
+    DAEMON_HOST, DAEMON_MAX_BYTES, DAEMON_PORT, DEFAULT_OUTPUT_FILENAME, DEFAULT_TARGET_FILES, EXCLUDE_DIRS,
+    TREE_MAX_DEPTH
+)
+from git_source import create_walker
+from logging_config import get_logger, setup_logging
+from main import generate_summary
+from report import RunReport
+from walker import DirectoryWalker
+
+logger = get_logger(__name__)
+
+# /summary で受け付ける generate_summary のパラメーター
+SUMMARY_PARAMETERS = frozenset({
+    "exclude_dirs", "include_extensions", "target_files", "workers", "executor", "tree_depth", "tree_max_entries",
+    "tokenizer", "max_tokens", "budget_priority", "max_file_size", "oversize_policy", "source", "dedup", "transforms",
+    "entry_files", "dependency_depth",
+})
+# 拡張子を指定しない場合に含める拡張子（cli.py と同じ）
+DEFAULT_EXTENSIONS = [".md", ".py"]
+# リクエスト本文の最大サイズ（バイト）
+MAX_REQUEST_BYTES = 1024 * 1024
+# TCP で受け付ける Host ヘッダーのホスト名。DNS リバインディングでブラウザから読み取られないように、
+# これ以外（と待ち受けているホスト）を指定したリクエストは拒否する
+LOOPBACK_HOSTS = frozenset({"localhost", "127.0.0.1", "::1"})
+# この時間内に変更されたディレクトリは、同じ mtime のまま再び変更される可能性があるため一覧を使い回さない
+RACY_WINDOW_NS = 2 * 10 ** 9
+# サイズの見積もりに使う、処理結果1件とディレクトリのエントリ1件あたりの固定のバイト数
+_ENTRY_OVERHEAD = 256
+_LISTING_OVERHEAD = 128
+
+
+class SnapshotEntry(NamedTuple):
+    """
+    os.DirEntry の代わりに返すファイルエントリ
+
+    Attributes:
+        name: ファイル名
+        path: ファイルパス
+        is_dir: ディレクトリかどうか（シンボリックリンクはたどらない）
+        is_file: ファイルかどうか
+    """
+    name: str
+    path: str
+    is_dir: bool
+    is_file: bool
+
+
+class DirectorySnapshot:
+    """
+    ディレクトリごとのエントリの一覧を、そのディレクトリの mtime とともに保持するクラス
+
+    ディレクトリの mtime はエントリの追加・削除・名前の変更で更新されるため、mtime が変わっていなければ
+    保持している一覧をそのまま使う。
+    """
+
+    def __init__(self):
+        # ディレクトリのパス -> (mtime_ns, 読み取った時刻, 名前順のエントリ)
+        self._directories: Dict[str, Tuple[int, int, List[SnapshotEntry]]] = {}
+        self.reused = 0
+        self.rescanned = 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        保持している一覧のおおよそのサイズ（バイト）
+        """
+        return sum(len(entries) for _, _, entries in self._directories.values()) * _LISTING_OVERHEAD
+
+    def entries(self, path: str) -> Optional[List[SnapshotEntry]]:
+        """
+        ディレクトリのエントリの一覧を返す
+
+        Args:
+            path: ディレクトリのパス
+
+        Returns:
+            Optional[List[SnapshotEntry]]: 名前順のエントリ。ディレクトリを読み取れない場合は None
+        """
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError as e:
+            logger.warning(f"ディレクトリを読み取れませんでした: {path}: {e}")
+            self._directories.pop(path, None)
+            return None
+        cached = self._directories.get(path)
+        if cached is not None and cached[0] == mtime_ns and cached[1] - mtime_ns > RACY_WINDOW_NS:
+            self.reused += 1
+            return cached[2]
+
+        scanned_at = time.time_ns()
+        try:
+            with os.scandir(path) as iterator:
+                entries = sorted((_snapshot_entry(entry) for entry in iterator), key=lambda entry: entry.name)
+        except OSError as e:
+            logger.warning(f"ディレクトリを読み取れませんでした: {path}: {e}")
+            self._directories.pop(path, None)
+            return None
+        self._directories[path] = (mtime_ns, scanned_at, entries)
+        self.rescanned += 1
+        return entries
+
+
+def _snapshot_entry(entry: os.DirEntry) -> SnapshotEntry:
+    try:
+        is_dir = entry.is_dir(follow_symlinks=False)
+        is_file = not is_dir and entry.is_file()
+    except OSError:
+        is_dir = is_file = False
+    return SnapshotEntry(entry.name, entry.path, is_dir, is_file)
+
+
+class SnapshotWalker(DirectoryWalker):
+    """
+    DirectorySnapshot の一覧を使い、DirectoryWalker と同じ順序で走査するクラス
+    """
+
+    def __init__(self, exclude_dirs: List[str], snapshot: DirectorySnapshot, listing_depth: Optional[int] = None):
+        """
+        Args:
+            exclude_dirs: 除外するディレクトリ名またはgitignore形式のパターンのリスト
+            snapshot: ディレクトリ一覧の保持先
+            listing_depth: ディレクトリ一覧を記録する深さ（ルートが0）。None の場合は記録しない
+        """
+        super().__init__(exclude_dirs, listing_depth=listing_depth)
+        self.snapshot = snapshot
+
+    def walk(self, root_dir: Path, max_depth: Optional[int] = None) -> Iterator[SnapshotEntry]:
+        """
+        ルートディレクトリ以下のファイルを走査する
+
+        Args:
+            root_dir: ルートディレクトリ
+            max_depth: 列挙するエントリの最大の深さ（ルート直下が1）。None の場合は制限しない
+
+        Yields:
+            SnapshotEntry: 収集対象候補のファイルエントリ
+        """
+        matcher = self.matcher
+        stack = [(os.fspath(root_dir), "", 0)]
+        while stack:
+            current, prefix, depth = stack.pop()
+            entries = self.snapshot.entries(current)
+            if entries is None:
+                continue
+            self.directories.append(current)
+
+            sub_dirs = []
+            listing = [] if self.listing_depth is not None and depth < self.listing_depth else None
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if matcher and matcher.matches(rel_path, entry.is_dir):
+                    self.excluded += 1
+                    continue
+                if entry.is_dir:
+                    sub_dirs.append((entry.path, rel_path + "/", depth + 1))
+                elif entry.is_file:
+                    yield entry
+                if listing is not None:
+                    listing.append((entry.name, entry.is_dir))
+            if listing is not None:
+                self.listing[current] = listing
+            if max_depth is not None and depth + 1 >= max_depth:
+                continue
+            stack.extend(reversed(sub_dirs))
+
+
+class MemoryRenderCache:
+    """
+    ファイルごとの処理結果をメモリ上に保持するキャッシュ
+
+    RenderCache と同じインターフェースを持ち、generate_summary の cache にそのまま渡せる。
+    エントリは最後に使われた順に並べ、trim で古いものから削除する。
+    """
+    hash_contents = False
+    stat_key = staticmethod(RenderCache.stat_key)
+
+    def __init__(self):
+        # (相対パス, 処理オプション) -> (ファイルの状態, 処理結果, 見積もりサイズ)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[StatKey, Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, root_dir: Path, file_path: Path, stat_key: Optional[StatKey],
+            options: str) -> Optional[Dict[str, Any]]:
+        """
+        処理結果を取得する
+
+        Args:
+            root_dir: ルートディレクトリ
+            file_path: ファイルパス
+            stat_key: 読み込み前に取得したファイルの状態
+            options: 処理オプションを表す文字列
+
+        Returns:
+            Optional[Dict[str, Any]]: ファイルの状態が一致した場合は保存した処理結果、それ以外は None
+        """
+        if stat_key is None:
+            return None
+        key = (file_path.relative_to(root_dir).as_posix(), options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != stat_key:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, root_dir: Path, file_path: Path, stat_key: Optional[StatKey], options: str,
+            data: Dict[str, Any], digest: Optional[str] = None) -> None:
+        """
+        処理結果を保存する
+
+        Args:
+            root_dir: ルートディレクトリ
+            file_path: ファイルパス
+            stat_key: 読み込み前に取得したファイルの状態
+            options: 処理オプションを表す文字列
+            data: 処理結果
+            digest: ファイル内容のハッシュ（使わない）
+        """
+        if stat_key is None:
+            return
+        key = (file_path.relative_to(root_dir).as_posix(), options)
+        nbytes = len(data.get("block", "")) + _ENTRY_OVERHEAD
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[2]
+            self._entries[key] = (stat_key, data, nbytes)
+            self.nbytes += nbytes
+
+    def trim(self, max_bytes: int) -> int:
+        """
+        合計サイズが上限に収まるまで、最後に使われてから時間の経ったエントリを削除する
+
+        Args:
+            max_bytes: 合計サイズの上限
+
+        Returns:
+            int: 削除したエントリ数
+        """
+        removed = 0
+        with self._lock:
+            while self._entries and self.nbytes > max_bytes:
+                _, (_, _, nbytes) = self._entries.popitem(last=False)
+                self.nbytes -= nbytes
+                removed += 1
+        return removed
+
+    def flush(self) -> None:
+        """
+        RenderCache と同じインターフェースのためのメソッド（メモリ上に保持するため何もしない）
+        """
+
+    def close(self, evict: bool = True) -> None:
+        """
+        RenderCache と同じインターフェースのためのメソッド（保持内容はそのまま残す）
+        """
+
+
+class RootIndex:
+    """
+    1つのルートディレクトリについて保持する内容
+    """
+
+    def __init__(self, root_dir: Path):
+        """
+        Args:
+            root_dir: ルートディレクトリ
+        """
+        self.root_dir = root_dir
+        self.cache = MemoryRenderCache()
+        self.snapshot = DirectorySnapshot()
+        # 同じルートへのリクエストは1つずつ処理する
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        保持している内容のおおよそのサイズ（バイト）
+        """
+        return self.cache.nbytes + self.snapshot.nbytes
+
+
+class WarmIndex:
+    """
+    ルートディレクトリごとの RootIndex を、合計サイズの上限まで保持するクラス
+    """
+
+    def __init__(self, max_bytes: int = DAEMON_MAX_BYTES):
+        """
+        Args:
+            max_bytes: 保持する内容の合計サイズの上限（バイト）
+        """
+        self.max_bytes = max_bytes
+        # 最後に使われた順に並べる
+        self._roots: "OrderedDict[Path, RootIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def summarize(self, root_dir: Union[str, Path], **params: Any) -> Dict[str, Any]:
+        """
+        保持している内容を使ってサマリーを生成する
+
+        Args:
+            root_dir: ルートディレクトリ
+            params: generate_summary のキーワード引数（SUMMARY_PARAMETERS のいずれか）。
+                exclude_dirs, include_extensions, target_files を省略した場合は既定値を使う
+
+        Returns:
+            Dict[str, Any]: サマリー（"summary"）と、RunReport.to_dict の実行記録
+
+        Raises:
+            ValueError: ルートディレクトリが存在しない場合、または不明なパラメーターを指定した場合
+        """
+        unknown = sorted(set(params) - SUMMARY_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(unknown)}")
+        root_dir = Path(root_dir).resolve()
+        if not root_dir.is_dir():
+            raise ValueError(f"Not a directory: {root_dir}")
+
+        exclude_dirs = params.pop("exclude_dirs", EXCLUDE_DIRS)
+        include_extensions = params.pop("include_extensions", DEFAULT_EXTENSIONS)
+        target_files = params.pop("target_files", DEFAULT_TARGET_FILES)
+        tree_depth = params.get("tree_depth", TREE_MAX_DEPTH)
+        index = self._acquire(root_dir)
+        sink = io.StringIO()
+        report = RunReport()
+        with index.lock:
+            if params.get("source") == "git":
+                walker = create_walker(root_dir, exclude_dirs, listing_depth=tree_depth, source="git")
+            else:
+                walker = SnapshotWalker(exclude_dirs, index.snapshot, listing_depth=tree_depth)
+            reused = index.snapshot.reused
+            generate_summary(root_dir, exclude_dirs, include_extensions, DEFAULT_OUTPUT_FILENAME, root_dir,
+                             target_files, sink=sink, cache=index.cache, walker=walker, report=report, **params)
+            report.count("directories_reused", index.snapshot.reused - reused)
+            index.requests += 1
+        self._evict(keep=root_dir)
+        return {"root": str(root_dir), "summary": sink.getvalue(), **report.to_dict(root_dir)}
+
+    def invalidate(self, root_dir: Optional[Union[str, Path]] = None) -> int:
+        """
+        保持している内容を破棄する
+
+        Args:
+            root_dir: 破棄するルートディレクトリ。None の場合はすべて破棄する
+
+        Returns:
+            int: 破棄したルートの数
+        """
+        with self._lock:
+            if root_dir is None:
+                count = len(self._roots)
+                self._roots.clear()
+                return count
+            return 1 if self._roots.pop(Path(root_dir).resolve(), None) is not None else 0
+
+    def status(self) -> Dict[str, Any]:
+        """
+        保持している内容の一覧を返す
+
+        Returns:
+            Dict[str, Any]: ルートごとのサイズ・エントリ数・リクエスト数と、合計サイズ
+        """
+        with self._lock:
+            roots = list(self._roots.values())
+        return {
+            "max_bytes": self.max_bytes,
+            "bytes": sum(index.nbytes for index in roots),
+            "roots": [{"root": str(index.root_dir), "bytes": index.nbytes, "files": len(index.cache),
+                       "requests": index.requests} for index in roots],
+        }
+
+    def _acquire(self, root_dir: Path) -> RootIndex:
+        """
+        ルートの RootIndex を取得し、最後に使われたものとして並べ替える（なければ作る）
+        """
+        with self._lock:
+            index = self._roots.get(root_dir)
+            if index is None:
+                index = self._roots[root_dir] = RootIndex(root_dir)
+            self._roots.move_to_end(root_dir)
+            return index
+
+    def _evict(self, keep: Path) -> None:
+        """
+        合計サイズが上限を超えていれば、最後に使われてから時間の経ったルートから破棄する
+
+        keep のルートだけで上限を超える場合は、そのルートの処理結果を古いものから削除する。
+
+        Args:
+            keep: 直前に使ったルート
+        """
+        with self._lock:
+            total = sum(index.nbytes for index in self._roots.values())
+            for root_dir in list(self._roots):
+                if total <= self.max_bytes:
+                    break
+                if root_dir == keep:
+                    continue
+                total -= self._roots.pop(root_dir).nbytes
+                logger.info(f"Evicted warm index: {root_dir}")
+            index = self._roots.get(keep)
+            if index is not None and total > self.max_bytes:
+                removed = index.cache.trim(max(0, self.max_bytes - index.snapshot.nbytes))
+                logger.info(f"Trimmed {removed} entries from {keep}")
+
+
+class SummaryRequestHandler(BaseHTTPRequestHandler):
+    """
+    /summary, /invalidate, /status のリクエストを処理するハンドラー
+    """
+    server_version = "ContextGenerator"
+
+    def do_GET(self) -> None:
+        if not self._host_allowed():
+            self._send_json(403, {"error": "Forbidden host"})
+        elif self.path == "/status":
+            self._send_json(200, self.server.index.status())
+        else:
+            self._send_json(404, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self) -> None:
+        if not self._host_allowed():
+            self._send_json(403, {"error": "Forbidden host"})
+            return
+        if self.path not in ("/summary", "/invalidate"):
+            self._send_json(404, {"error": f"Not found: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_REQUEST_BYTES:
+                raise ValueError("Request body is too large")
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("Request body must be a JSON object")
+            if self.path == "/invalidate":
+                self._send_json(200, {"invalidated": self.server.index.invalidate(body.get("root_dir"))})
+                return
+            if "root_dir" not in body:
+                raise ValueError("root_dir is required")
+            self._send_json(200, self.server.index.summarize(**body))
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"サマリーの生成中にエラーが発生しました: {e}")
+            self._send_json(500, {"error": str(e)})
+
+    def _host_allowed(self) -> bool:
+        """
+        Host ヘッダーが待ち受けているアドレスを指しているかを確認する
+
+        Web ページが DNS リバインディングで localhost のサーバーにリクエストを送ると、Host ヘッダーには
+        そのページのホスト名が入るため、ここで拒否できる。Unix ドメインソケットにはブラウザから
+        接続できないため確認しない。
+
+        Returns:
+            bool: リクエストを受け付ける場合はTrue
+        """
+        if not isinstance(self.client_address, tuple):
+            return True
+        host = self.headers.get("Host", "").strip().lower()
+        if host.startswith("["):
+            name, _, rest = host[1:].partition("]")
+            if rest and not rest.startswith(":"):
+                return False
+            port = rest[1:] if rest else None
+        else:
+            name, separator, port = host.partition(":")
+            port = port if separator else None
+        return name in self.server.allowed_hosts and port in (None, str(self.server.server_address[1]))
+
+    def address_string(self) -> str:
+        # Unix ドメインソケットでは接続元のアドレスがない
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class SummaryServer(ThreadingHTTPServer):
+    """
+    TCP で待ち受けるサーバー
+    """
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], index: WarmIndex):
+        self.index = index
+        self.allowed_hosts = LOOPBACK_HOSTS | {address[0].lower()}
+        # `::1` などの IPv6 アドレスで待ち受ける場合は、既定の AF_INET では bind できない
+        if ":" in address[0]:
+            self.address_family = socket.AF_INET6
+        super().__init__(address, SummaryRequestHandler)
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class UnixSummaryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """
+        Unix ドメインソケットで待ち受けるサーバー
+        """
+        daemon_threads = True
+
+        def __init__(self, socket_path: str, index: WarmIndex):
+            self.index = index
+            super().__init__(socket_path, SummaryRequestHandler)
+
+        def server_close(self) -> None:
+            super().server_close()
+            if os.path.exists(self.server_address):
+                os.unlink(self.server_address)
+
+
+def create_server(host: str = DAEMON_HOST, port: int = DAEMON_PORT, socket_path: Optional[str] = None,
+                  max_bytes: int = DAEMON_MAX_BYTES) -> socketserver.BaseServer:
+    """
+    サーバーを生成する（待ち受けは serve_forever で開始する）
+
+    Args:
+        host: 待ち受けるホスト
+        port: 待ち受けるポート。0 の場合は空いているポートを使う
+        socket_path: 指定した場合は、TCP の代わりにこのパスの Unix ドメインソケットで待ち受ける
+        max_bytes: 保持する内容の合計サイズの上限（バイト）
+
+    Returns:
+        socketserver.BaseServer: サーバー
+
+    Raises:
+        ValueError: Unix ドメインソケットに対応していない環境で socket_path を指定した場合
+    """
+    index = WarmIndex(max_bytes)
+    if socket_path is not None:
+        if not hasattr(socketserver, "UnixStreamServer"):
+            raise ValueError("Unix domain sockets are not supported on this platform")
+        return UnixSummaryServer(socket_path, index)
+    if host not in ("127.0.0.1", "localhost", "::1"):
+        logger.warning(f"{host} で待ち受けます。サーバーはこのマシンのファイルを返すため、信頼できるネットワークでのみ使ってください")
+    return SummaryServer((host, port), index)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    サーバーを起動し、Ctrl+C が押されるまで待ち受ける
+
+    Args:
+        argv: コマンドライン引数。None の場合は sys.argv を使う
+
+    Returns:
+        int: 終了コード
+    """
+    parser = argparse.ArgumentParser(description="サマリーを返す常駐サーバーを起動します。")
+    parser.add_argument("--host", default=DAEMON_HOST, help=f"待ち受けるホスト（既定: {DAEMON_HOST}）")
+    parser.add_argument("--port", type=int, default=DAEMON_PORT, help=f"待ち受けるポート（既定: {DAEMON_PORT}）")
+    parser.add_argument("--socket", help="TCP の代わりに待ち受ける Unix ドメインソケットのパス")
+    parser.add_argument("--max-bytes", type=int, default=DAEMON_MAX_BYTES,
+                        help="メモリ上に保持する処理結果の合計サイズの上限（バイト）")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    try:
+        server = create_server(args.host, args.port, args.socket, args.max_bytes)
+    except (OSError, ValueError) as e:
+        logger.error(f"サーバーを起動できませんでした: {e}")
+        return 1
+    address = args.socket or "http://{}:{}".format(*server.server_address[:2])
+    print(f"待ち受けを開始しました: {address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
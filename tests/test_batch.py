@@ -0,0 +1,100 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import cli
+from cache import RenderCache
+from batch import BatchJob, default_output_paths, load_manifest, summarize_repositories
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.repos = [self.test_dir / "a" / "app", self.test_dir / "b" / "app", self.test_dir / "lib"]
+        for index, repo in enumerate(self.repos):
+            repo.mkdir(parents=True)
+            (repo / "main.py").write_text(f"value = {index}")
+        self.output_dir = self.test_dir / "out"
+        self.cache_path = self.test_dir / "cache.sqlite3"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_summarizes_repositories_in_a_process_pool(self):
+        output_paths = default_output_paths(self.repos, self.output_dir)
+        self.assertEqual(["app.md", "app-2.md", "lib.md"], [path.name for path in output_paths])
+        jobs = [BatchJob(repo, output_path, [], [".py"], []) for repo, output_path in zip(self.repos, output_paths)]
+
+        report = summarize_repositories(jobs, max_parallel=2, cache_path=self.cache_path)
+
+        self.assertEqual({"repositories": 3, "succeeded": 3, "failed": 0, "files": 3},
+                         {key: report["totals"][key] for key in ("repositories", "succeeded", "failed", "files")})
+        self.assertEqual([str(repo) for repo in self.repos], [result["root"] for result in report["repositories"]])
+        for index, output_path in enumerate(output_paths):
+            self.assertIn(f"value = {index}", output_path.read_text(encoding='utf-8'))
+
+    def test_parallel_repositories_share_the_cache(self):
+        repos = [self.test_dir / "x", self.test_dir / "y"]
+        for repo in repos:
+            repo.mkdir()
+            for index in range(300):
+                (repo / f"module_{index}.py").write_text(f"value = {index}\n" * 20)
+        jobs = [BatchJob(repo, self.output_dir / f"{repo.name}.md", [], [".py"], []) for repo in repos]
+
+        # 同じキャッシュファイルに書き込み中の別の接続（GUI や監視モード）があっても待たされない
+        other = RenderCache(self.cache_path)
+        other.put(repos[0], repos[0] / "module_0.py", RenderCache.stat_key(repos[0] / "module_0.py"), "other", {})
+        try:
+            first = summarize_repositories(jobs, max_parallel=2, cache_path=self.cache_path)
+        finally:
+            other.close()
+        second = summarize_repositories(jobs, max_parallel=2, cache_path=self.cache_path)
+
+        self.assertEqual([], [result.get("error") for result in first["repositories"] if result["status"] != "ok"])
+        self.assertEqual(2, first["totals"]["succeeded"])
+        # 並列に書き込んだ両方のリポジトリの処理結果がキャッシュに残っている
+        self.assertEqual([300, 300], [result["counters"]["cache_hits"] for result in second["repositories"]])
+
+    def test_cache_errors_are_reported_per_repository(self):
+        # ディレクトリはキャッシュファイルとして開けない
+        self.cache_path.mkdir()
+        jobs = [BatchJob(repo, self.output_dir / f"{index}.md", [], [".py"], [])
+                for index, repo in enumerate(self.repos)]
+        jobs[2].use_cache = False
+
+        report = summarize_repositories(jobs, max_parallel=2, cache_path=self.cache_path)
+
+        self.assertEqual(["error", "error", "ok"], [result["status"] for result in report["repositories"]])
+        self.assertIn("value = 2", (self.output_dir / "2.md").read_text(encoding='utf-8'))
+
+    def test_cli_batch_honors_preset_use_cache(self):
+        (self.repos[2] / "summary.config.json").write_text(json.dumps({"use_cache": False}))
+        report_path = self.test_dir / "report.json"
+        args = [*map(str, self.repos), "-o", str(self.output_dir), "--extensions", ".py",
+                "--cache-path", str(self.cache_path), "--stats-json", str(report_path)]
+        for _ in range(2):
+            self.assertEqual(0, cli.main(args))
+
+        report = json.loads(report_path.read_text(encoding='utf-8'))
+        self.assertEqual([1, 1, 0], [result["counters"].get("cache_hits", 0) for result in report["repositories"]])
+
+    def test_cli_batch_with_manifest(self):
+        manifest_path = self.test_dir / "repos.json"
+        manifest_path.write_text(json.dumps(["a/app", {"root": "lib", "output": "out/library.md"}]))
+        self.assertEqual(self.test_dir / "lib", load_manifest(manifest_path)[1]["root"])
+        report_path = self.test_dir / "report.json"
+
+        exit_code = cli.main(["--manifest", str(manifest_path), "-o", str(self.output_dir), "--extensions", ".py",
+                              "--cache-path", str(self.cache_path), "--stats-json", str(report_path)])
+
+        self.assertEqual(0, exit_code)
+        self.assertTrue((self.output_dir / "app.md").exists())
+        self.assertTrue((self.output_dir / "library.md").exists())
+        report = json.loads(report_path.read_text(encoding='utf-8'))
+        self.assertEqual(2, report["totals"]["succeeded"])
+
+
+if __name__ == '__main__':
+    unittest.main()
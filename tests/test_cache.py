@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import main
+from cache import RenderCache
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.root_dir = self.test_dir / "project"
+        self.root_dir.mkdir()
+        (self.root_dir / "a.py").write_text("print('a')")
+        (self.root_dir / "b.py").write_text("print('b')")
+        self.cache_path = self.test_dir / "cache.sqlite3"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def render(self, cache):
+        file_paths = main.collect_files(self.root_dir, [], [".py"], [])
+        with mock.patch("main.read_file", wraps=main.read_file) as read_mock:
+            rendered_files = main.render_files(self.root_dir, file_paths, cache=cache)
+            output = "".join(main.iter_markdown_output("", rendered_files))
+        return output, [call.args[0].name for call in read_mock.call_args_list]
+
+    def test_unchanged_files_are_not_read_again(self):
+        expected, _ = self.render(None)
+        with RenderCache(self.cache_path) as cache:
+            first, first_reads = self.render(cache)
+        stat = (self.root_dir / "b.py").stat()
+        (self.root_dir / "b.py").write_text("print('B')")
+        os.utime(self.root_dir / "b.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        with RenderCache(self.cache_path) as cache:
+            second, second_reads = self.render(cache)
+            self.assertEqual(1, cache.hits)
+
+        self.assertEqual(expected, first)
+        self.assertEqual(["a.py", "b.py"], first_reads)
+        self.assertEqual(["b.py"], second_reads)
+        self.assertIn("print('B')", second)
+
+    def test_content_hash_revalidates_touched_files(self):
+        with RenderCache(self.cache_path, hash_contents=True) as cache:
+            self.render(cache)
+        stat = (self.root_dir / "a.py").stat()
+        os.utime(self.root_dir / "a.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        with RenderCache(self.cache_path, hash_contents=True) as cache:
+            _, reads = self.render(cache)
+            self.assertEqual(2, cache.hits)
+        self.assertEqual([], reads)
+
+    def test_evicts_least_recently_used_entries(self):
+        cache = RenderCache(self.cache_path, max_bytes=1)
+        self.render(cache)
+        cache.close()
+        with RenderCache(self.cache_path) as cache:
+            _, reads = self.render(cache)
+        self.assertEqual(["a.py", "b.py"], reads)
+
+    def test_two_instances_can_write_to_one_file(self):
+        file_path = self.root_dir / "a.py"
+        stat_key = RenderCache.stat_key(file_path)
+        first = RenderCache(self.cache_path, timeout=0.5)
+        second = RenderCache(self.cache_path, timeout=0.5)
+        try:
+            first.put(self.root_dir, file_path, stat_key, "first", {"block": "1"})
+            second.put(self.root_dir, file_path, stat_key, "second", {"block": "2"})
+            second.flush()
+            # ヒットしただけでは書き込みロックを取らない
+            self.assertEqual({"block": "2"}, second.get(self.root_dir, file_path, stat_key, "second"))
+            self.assertEqual({"block": "1"}, first.get(self.root_dir, file_path, stat_key, "first"))
+            first.flush()
+            second.put(self.root_dir, file_path, stat_key, "third", {"block": "3"})
+            second.flush()
+        finally:
+            first.close()
+            second.close()
+
+        with RenderCache(self.cache_path) as cache:
+            for options, block in (("first", "1"), ("second", "2"), ("third", "3")):
+                self.assertEqual({"block": block}, cache.get(self.root_dir, file_path, stat_key, options))
+
+    def test_puts_are_committed_in_batches(self):
+        file_paths = main.collect_files(self.root_dir, [], [".py"], [])
+        with RenderCache(self.cache_path, write_batch=1) as cache:
+            list(main.render_files(self.root_dir, file_paths, cache=cache))
+            # close する前に、別の接続から読める
+            with RenderCache(self.cache_path) as other:
+                self.render(other)
+                self.assertEqual(2, other.hits)
+
+
+if __name__ == '__main__':
+    unittest.main()
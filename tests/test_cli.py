@@ -0,0 +1,112 @@
+import contextlib
+import io
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import cli
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.root_dir = self.test_dir / "project"
+        (self.root_dir / "src").mkdir(parents=True)
+        (self.root_dir / "src" / "app.py").write_text("print('app')")
+        (self.root_dir / "notes.txt").write_text("notes")
+        (self.root_dir / "README.md").write_text("# readme")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_writes_output_and_json_stats(self):
+        output_path = self.test_dir / "summary.md"
+        stats_path = self.test_dir / "stats.json"
+        exit_code = cli.main([str(self.root_dir), "-o", str(output_path), "--extensions", ".py",
+                              "--stats-json", str(stats_path), "--no-cache"])
+
+        self.assertEqual(0, exit_code)
+        self.assertIn("src/app.py", output_path.read_text(encoding='utf-8'))
+        stats = json.loads(stats_path.read_text(encoding='utf-8'))
+        self.assertEqual(str(output_path), stats["output"])
+        self.assertEqual(2, stats["files"])
+        self.assertEqual(1, stats["stats"][".py"]["count"])
+        for phase in ("walk", "tree", "read", "render", "write", "total"):
+            self.assertIn(phase, stats["timings"])
+
+    def test_writes_to_stdout_with_preset(self):
+        (self.root_dir / "summary.config.json").write_text(json.dumps({
+            'exclude_dirs': "src",
+            'include_extensions': [".txt"],
+            'target_files': "",
+        }))
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            exit_code = cli.main([str(self.root_dir), "--no-cache", "--tree-depth", "0"])
+
+        self.assertEqual(0, exit_code)
+        self.assertIn("notes.txt", stdout.getvalue())
+        self.assertNotIn("app.py", stdout.getvalue())
+        self.assertNotIn("README.md", stdout.getvalue())
+
+    def test_reduce_option_and_preset(self):
+        (self.root_dir / "src" / "app.py").write_text("# comment\nprint('app')\n")
+        output_path = self.test_dir / "summary.md"
+        stats_path = self.test_dir / "stats.json"
+        exit_code = cli.main([str(self.root_dir), "-o", str(output_path), "--extensions", ".py",
+                              "--reduce", "comments", "--stats-json", str(stats_path), "--no-cache"])
+
+        self.assertEqual(0, exit_code)
+        self.assertNotIn("# comment", output_path.read_text(encoding='utf-8'))
+        stats = json.loads(stats_path.read_text(encoding='utf-8'))
+        self.assertEqual(len("# comment\nprint('app')\n"), stats["stats"][".py"]["chars"])
+        self.assertEqual(len("print('app')\n"), stats["stats"][".py"]["reduced_chars"])
+
+        (self.root_dir / "summary.config.json").write_text(json.dumps({'transforms': ["comments"]}))
+        settings = cli.resolve_settings(cli.build_parser().parse_args([str(self.root_dir)]), self.root_dir)
+        self.assertEqual(["comments"], settings['transforms'])
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            cli.main([str(self.root_dir), "--reduce", "unknown"])
+
+    def test_entry_files_select_dependencies(self):
+        (self.root_dir / "src" / "app.py").write_text("import helper\n")
+        (self.root_dir / "src" / "helper.py").write_text("print('helper')\n")
+        (self.root_dir / "src" / "other.py").write_text("print('other')\n")
+        output_path = self.test_dir / "summary.md"
+        stats_path = self.test_dir / "stats.json"
+        exit_code = cli.main([str(self.root_dir), "-o", str(output_path), "--entry-files", "src/app.py",
+                              "--stats-json", str(stats_path), "--no-cache"])
+
+        self.assertEqual(0, exit_code)
+        content = output_path.read_text(encoding='utf-8')
+        self.assertIn("print('helper')", content)
+        self.assertNotIn("print('other')", content)
+        self.assertNotIn("# readme", content)
+        stats = json.loads(stats_path.read_text(encoding='utf-8'))
+        self.assertEqual(2, stats["counters"]["dependency_selected"])
+        self.assertIn("deps", stats["timings"])
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(1, cli.main([str(self.root_dir), "-o", str(output_path), "--entry-files", "missing.py",
+                                          "--no-cache"]))
+            with self.assertRaises(SystemExit):
+                cli.main([str(self.root_dir), "--entry-files", "src/app.py", "--dependency-depth", "-1"])
+
+    def test_startup_is_fast_and_does_not_import_gui(self):
+        code = ("import time; start = time.perf_counter(); import cli, sys; "
+                "print(time.perf_counter() - start); print('tkinter' in sys.modules or 'gui' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True,
+                                check=True)
+        import_seconds, gui_imported = result.stdout.split()
+        self.assertEqual("False", gui_imported)
+        self.assertLess(float(import_seconds), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from cache import RenderCache
+from dependencies import python_imports, script_imports, select_dependencies
+from report import RunReport
+
+
+class TestDependencies(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.root_dir = self.test_dir / "project"
+        files = {
+            "app.py": "import os\nimport pkg.service\nfrom util import helper\n",
+            "util.py": "def helper():\n    from pkg import models\n",
+            "unused.py": "print('unused')\n",
+            "pkg/__init__.py": "",
+            "pkg/service.py": "from . import models\nfrom .models import Model\n",
+            "pkg/models.py": "from ..util import helper\nimport requests\n",
+            "web/main.ts": ("import { a } from './lib/a';\nimport React from 'react';\n"
+                            "export * from \"./lib\";\nconst b = require('../web/b.js');\n"),
+            "web/lib/a.ts": "import type { C } from './c.js';\nconst d = import('./d');\n",
+            "web/lib/c.ts": "export type C = string;\n",
+            "web/lib/d.tsx": "export default 1;\n",
+            "web/lib/index.ts": "export const x = 1;\n",
+            "web/b.js": "module.exports = {};\n",
+            "web/unused.ts": "export {};\n",
+        }
+        for name, content in files.items():
+            path = self.root_dir / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+        self.file_paths = sorted(path for path in self.root_dir.rglob("*") if path.is_file())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def select(self, entry_files, **kwargs):
+        selected = select_dependencies(self.root_dir, self.file_paths, entry_files, **kwargs)
+        return sorted(path.relative_to(self.root_dir).as_posix() for path in selected)
+
+    def test_extract_imports(self):
+        self.assertEqual([[0, "os", []], [1, "pkg", ["a", "b"]]],
+                         python_imports("import os\nfrom .pkg import a, b\n"))
+        self.assertEqual([], python_imports("def broken(:\n"))
+        self.assertEqual(["x", "./y", "z", "./w"],
+                         script_imports("import a from 'x';\nimport './y';\nrequire(\"z\");\nawait import('./w');\n"))
+
+    def test_python_transitive_dependencies(self):
+        self.assertEqual(["app.py", "pkg/__init__.py", "pkg/models.py", "pkg/service.py", "util.py"],
+                         self.select(["app.py"]))
+
+    def test_depth_limits_traversal(self):
+        self.assertEqual(["app.py"], self.select(["app.py"], max_depth=0))
+        self.assertEqual(["app.py", "pkg/__init__.py", "pkg/service.py", "util.py"],
+                         self.select(["app.py"], max_depth=1))
+
+    def test_script_dependencies(self):
+        self.assertEqual(["web/b.js", "web/lib/a.ts", "web/lib/c.ts", "web/lib/d.tsx", "web/lib/index.ts",
+                          "web/main.ts"], self.select(["web/main.ts"]))
+
+    def test_selection_keeps_collection_order(self):
+        selected = select_dependencies(self.root_dir, self.file_paths, ["pkg/service.py"])
+
+        self.assertEqual([path for path in self.file_paths if path in selected], selected)
+
+    def test_unknown_entry_file(self):
+        with self.assertRaises(ValueError):
+            self.select(["missing.py"])
+
+    def test_imports_are_cached(self):
+        cache = RenderCache(self.test_dir / "cache.sqlite3")
+        try:
+            first = RunReport()
+            self.select(["app.py"], cache=cache, report=first)
+            second = RunReport()
+            self.assertEqual(5, len(self.select(["app.py"], cache=cache, report=second)))
+            (self.root_dir / "util.py").write_text("import unused\n")
+            third = RunReport()
+            selected = self.select(["app.py"], cache=cache, report=third)
+        finally:
+            cache.close()
+
+        self.assertEqual(5, first.counters["dependency_parsed"])
+        self.assertEqual(0, second.counters["dependency_parsed"])
+        # 変更した util.py と、新たに依存先になった unused.py だけを読み込む
+        self.assertEqual(2, third.counters["dependency_parsed"])
+        self.assertIn("unused.py", selected)
+
+
+if __name__ == '__main__':
+    unittest.main()
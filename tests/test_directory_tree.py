@@ -0,0 +1,44 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from main import collect_files, get_directory_structure
+from walker import DirectoryWalker
+
+GOLDEN_PATH = Path(__file__).parent / "data" / "tree_golden.txt"
+
+
+class TestDirectoryTree(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        deep_dir = self.test_dir / "src" / "pkg" / "sub" / "deeper" / "deepest"
+        deep_dir.mkdir(parents=True)
+        (deep_dir / "hidden.py").write_text("")
+        (self.test_dir / "src" / "pkg" / "__init__.py").write_text("")
+        (self.test_dir / "src" / "pkg" / "__pycache__").mkdir()
+        (self.test_dir / "src" / "pkg" / "__pycache__" / "mod.cpython-311.pyc").write_text("")
+        (self.test_dir / "src" / "main.py").write_text("")
+        (self.test_dir / "data").mkdir()
+        for index in range(5):
+            (self.test_dir / "data" / f"sample{index}.csv").write_text("")
+        (self.test_dir / "node_modules" / "lib").mkdir(parents=True)
+        (self.test_dir / "README.md").write_text("")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_matches_golden_file(self):
+        structure = get_directory_structure(self.test_dir, ["node_modules"], max_depth=4, max_entries=3)
+        self.assertEqual(GOLDEN_PATH.read_text(encoding='utf-8'), structure.replace(str(self.test_dir), "<root>"))
+
+    def test_reuses_listing_from_file_collection(self):
+        walker = DirectoryWalker(["node_modules"], listing_depth=4)
+        collect_files(self.test_dir, ["node_modules"], [".py"], [], walker=walker)
+        self.assertEqual(get_directory_structure(self.test_dir, ["node_modules"], max_depth=4, max_entries=3),
+                         get_directory_structure(self.test_dir, ["node_modules"], max_depth=4, max_entries=3,
+                                                 walker=walker))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from file_reader import STATUS_BINARY, STATUS_OK, STATUS_TOO_LARGE, STATUS_TRUNCATED, read_file
+from main import generate_summary
+
+
+class TestReadFile(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_text_file(self):
+        path = self.test_dir / "text.txt"
+        path.write_bytes("こんにちは\r\nworld\n".encode('utf-8'))
+        content = read_file(path)
+        self.assertEqual(STATUS_OK, content.status)
+        self.assertEqual("こんにちは\nworld\n", content.text)
+
+    def test_binary_file_is_detected_from_head(self):
+        path = self.test_dir / "data.json"
+        path.write_bytes(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" * 10)
+        content = read_file(path)
+        self.assertEqual(STATUS_BINARY, content.status)
+        self.assertEqual("", content.text)
+
+    def test_oversized_file_is_truncated_with_head_and_tail(self):
+        path = self.test_dir / "dump.csv"
+        path.write_text("head\n" + "row\n" * 1000 + "tail\n")
+        content = read_file(path, max_file_size=100, oversize_policy="truncate", truncate_bytes=20)
+        self.assertEqual(STATUS_TRUNCATED, content.status)
+        self.assertTrue(content.text.startswith("head\n"))
+        self.assertTrue(content.text.endswith("tail\n"))
+        self.assertIn("bytes omitted", content.text)
+
+    def test_oversized_file_can_be_skipped(self):
+        path = self.test_dir / "dump.csv"
+        path.write_text("row\n" * 1000)
+        content = read_file(path, max_file_size=100, oversize_policy="skip")
+        self.assertEqual(STATUS_TOO_LARGE, content.status)
+
+    def test_skipped_files_appear_in_stats(self):
+        (self.test_dir / "fixture.json").write_bytes(b"\x00\x01\x02" * 100)
+        (self.test_dir / "large.json").write_text('{"rows": [' + "1, " * 1000 + "1]}")
+        (self.test_dir / "small.json").write_text('{"ok": true}')
+        sink = io.StringIO()
+        file_stats, _ = generate_summary(self.test_dir, [], [".json"], "summary.md", self.test_dir, [],
+                                         sink=sink, tree_depth=0, max_file_size=1000, oversize_policy="truncate")
+        self.assertEqual(2, file_stats[".json"]['count'])
+        self.assertEqual(1, file_stats[".json"]['skipped'])
+        self.assertEqual(1, file_stats[".json"]['truncated'])
+        self.assertNotIn("fixture.json", sink.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
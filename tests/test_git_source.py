@@ -0,0 +1,102 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from git_source import GitWalker, create_walker, list_git_files, parse_index, read_index_files
+from main import collect_files, generate_summary
+from walker import DirectoryWalker
+
+
+def git(repo: Path, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True, text=True).stdout
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class TestGitSource(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.repo = self.test_dir / "repo"
+        (self.repo / "src" / "pkg").mkdir(parents=True)
+        (self.repo / "build").mkdir()
+        git(self.repo, "init", "-q")
+        (self.repo / ".gitignore").write_text("build/\n*.log\n")
+        (self.repo / "README.md").write_text("# repo")
+        (self.repo / "src" / "app.py").write_text("print('app')")
+        (self.repo / "src" / "pkg" / "util.py").write_text("def util(): pass")
+        (self.repo / "src" / "removed.py").write_text("gone")
+        git(self.repo, "add", ".")
+        (self.repo / "src" / "removed.py").unlink()
+        (self.repo / "src" / "new.py").write_text("print('untracked')")
+        (self.repo / "build" / "out.py").write_text("print('ignored')")
+        (self.repo / "debug.log").write_text("ignored")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_list_git_files_applies_gitignore_and_skips_deleted(self):
+        self.assertEqual([".gitignore", "README.md", "src/app.py", "src/new.py", "src/pkg/util.py"],
+                         sorted(list_git_files(self.repo)))
+        self.assertEqual(["app.py", "new.py", "pkg/util.py"], sorted(list_git_files(self.repo / "src")))
+
+    def test_list_git_files_returns_none_outside_a_repository(self):
+        plain = self.test_dir / "plain"
+        plain.mkdir()
+        self.assertIsNone(list_git_files(plain))
+        self.assertIs(type(create_walker(plain, [], source="git")), DirectoryWalker)
+
+    def test_git_walker_matches_filesystem_walker_order(self):
+        shutil.rmtree(self.repo / "build")
+        (self.repo / "debug.log").unlink()
+        git_walker = create_walker(self.repo, [".git"], listing_depth=4, source="git")
+        fs_walker = DirectoryWalker([".git"], listing_depth=4)
+        self.assertIsInstance(git_walker, GitWalker)
+        git_paths = collect_files(self.repo, [".git"], [".py", ".md"], [], walker=git_walker)
+        fs_paths = collect_files(self.repo, [".git"], [".py", ".md"], [], walker=fs_walker)
+        self.assertEqual(fs_paths, git_paths)
+        self.assertEqual(fs_walker.listing, git_walker.listing)
+
+    def test_parse_index_versions(self):
+        expected = sorted(git(self.repo, "ls-files", "--cached").splitlines())
+        for version in ("2", "3", "4"):
+            git(self.repo, "update-index", "--index-version", version)
+            names = parse_index((self.repo / ".git" / "index").read_bytes())
+            self.assertEqual(expected, sorted(names), version)
+
+    def test_falls_back_to_index_without_git_command(self):
+        with mock.patch("git_source.subprocess.run", side_effect=FileNotFoundError("git")):
+            paths = list_git_files(self.repo / "src")
+        self.assertEqual(["app.py", "pkg/util.py"], sorted(paths))
+        self.assertEqual(paths, read_index_files(self.repo / "src"))
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "symlinks are not supported")
+    def test_submodules_and_directory_symlinks_are_not_files(self):
+        (self.repo / "vendor" / "lib.py").mkdir(parents=True)
+        commit = git(self.repo, "hash-object", "-w", "README.md").strip()
+        git(self.repo, "update-index", "--add", "--cacheinfo", f"160000,{commit},vendor/lib.py")
+        os.symlink("pkg", self.repo / "src" / "linked.py")
+        git(self.repo, "add", "src/linked.py")
+        self.assertIn("vendor/lib.py", list_git_files(self.repo))
+
+        output_dir = self.test_dir / "out"
+        output_dir.mkdir()
+        file_stats, _ = generate_summary(self.repo, [".git"], [".py"], "summary.md", output_dir, [],
+                                         source="git")
+        self.assertEqual(3, file_stats[".py"]["count"])
+
+    def test_generate_summary_with_git_source(self):
+        output_dir = self.test_dir / "out"
+        output_dir.mkdir()
+        file_stats, _ = generate_summary(self.repo, [".git"], [".py"], "summary.md", output_dir, [],
+                                         source="git")
+        content = (output_dir / "summary.md").read_text(encoding="utf-8")
+        self.assertEqual(3, file_stats[".py"]["count"])
+        self.assertIn("src/new.py", content)
+        self.assertNotIn("build", content)
+
+
+if __name__ == '__main__':
+    unittest.main()
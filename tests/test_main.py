@@ -1,7 +1,14 @@
+import io
 import tempfile
 import unittest
 from pathlib import Path
 import shutil
+import threading
+import tracemalloc
+from unittest import mock
+
+import main
+from config import PROFILE_ENV
 from main import generate_summary
 
 
@@ -48,6 +55,205 @@ class TestGenerateSummary(unittest.TestCase):
             self.assertIn("included.py", content)
             self.assertNotIn("excluded.py", content)
 
+    def test_generate_summary_reads_each_file_once(self):
+        with mock.patch("main.read_file", wraps=main.read_file) as read_mock:
+            file_stats, total_chars = generate_summary(
+                self.test_dir,
+                exclude_dirs=["exclude_dir"],
+                include_extensions=[".txt", ".py"],
+                output_file="test_summary.md",
+                output_dir=self.test_dir,
+                target_files=[]
+            )
+
+        read_paths = [call.args[0] for call in read_mock.call_args_list]
+        self.assertEqual(2, len(read_paths))
+        self.assertEqual(len(read_paths), len(set(read_paths)))
+        self.assertEqual(1, file_stats[".txt"]['count'])
+        self.assertEqual(len("Test content"), file_stats[".txt"]['chars'])
+        expected_chars = len("Test content") + len("print('This file should be included')")
+        self.assertEqual(f"{expected_chars:,}", total_chars)
+
+    def test_generate_summary_streams_to_sink(self):
+        sink = io.StringIO()
+        generate_summary(
+            self.test_dir,
+            exclude_dirs=["exclude_dir"],
+            include_extensions=[".txt", ".py"],
+            output_file="test_summary.md",
+            output_dir=self.test_dir,
+            target_files=[],
+            sink=sink
+        )
+
+        self.assertFalse((self.test_dir / "test_summary.md").exists())
+        self.assertIn("included.py", sink.getvalue())
+        self.assertIn("Test content", sink.getvalue())
+
+    def test_parallel_rendering_keeps_collection_order(self):
+        for index in range(20):
+            (self.test_dir / "include_dir" / f"module{index:02d}.py").write_text(f"value = {index}")
+        file_paths = main.collect_files(self.test_dir, ["exclude_dir"], [".txt", ".py"], [])
+        serial = main.generate_markdown_output(self.test_dir, file_paths, "")
+
+        for executor in ("thread", "process"):
+            rendered = list(main.render_files(self.test_dir, file_paths, workers=4, executor=executor))
+            self.assertEqual(file_paths, [item.path for item in rendered])
+            self.assertEqual(serial, "".join(main.iter_markdown_output("", rendered)))
+
+    def test_progress_callback_reports_each_file(self):
+        progress = []
+        generate_summary(
+            self.test_dir,
+            exclude_dirs=["exclude_dir"],
+            include_extensions=[".txt", ".py"],
+            output_file="test_summary.md",
+            output_dir=self.test_dir,
+            target_files=[],
+            progress_callback=lambda done, total, file_path: progress.append((done, total, file_path.name))
+        )
+
+        self.assertEqual([(1, 2, "test_file.txt"), (2, 2, "included.py")], progress)
+
+    def test_cancel_event_stops_generation_and_removes_output(self):
+        cancel_event = threading.Event()
+        with self.assertRaises(main.GenerationCancelled):
+            generate_summary(
+                self.test_dir,
+                exclude_dirs=["exclude_dir"],
+                include_extensions=[".txt", ".py"],
+                output_file="test_summary.md",
+                output_dir=self.test_dir,
+                target_files=[],
+                progress_callback=lambda done, total, file_path: cancel_event.set(),
+                cancel_event=cancel_event
+            )
+
+        self.assertFalse((self.test_dir / "test_summary.md").exists())
+
+    def test_duplicate_files_are_replaced_with_reference(self):
+        body = "def helper():\n    return 'shared helper body'\n" * 10
+        (self.test_dir / "include_dir" / "a.py").write_text(body)
+        (self.test_dir / "include_dir" / "b.py").write_text(body)
+        report = main.RunReport()
+        file_stats, _ = generate_summary(
+            self.test_dir,
+            exclude_dirs=["exclude_dir"],
+            include_extensions=[".py"],
+            output_file="test_summary.md",
+            output_dir=self.test_dir,
+            target_files=[],
+            report=report,
+            dedup=True
+        )
+
+        content = (self.test_dir / "test_summary.md").read_text()
+        self.assertEqual(10, content.count("shared helper body"))
+        self.assertIn(f"（{Path('include_dir', 'a.py')} と同じ内容のため省略）", content)
+        self.assertEqual(1, file_stats[".py"]['duplicates'])
+        self.assertEqual(2, file_stats[".py"]['count'])
+        self.assertEqual(1, report.counters["duplicates"])
+        self.assertGreater(report.counters["dedup_saved_bytes"], len(body) - 100)
+
+        generate_summary(
+            self.test_dir,
+            exclude_dirs=["exclude_dir"],
+            include_extensions=[".py"],
+            output_file="test_summary.md",
+            output_dir=self.test_dir,
+            target_files=[]
+        )
+        # 既定では重複を置き換えない
+        content = (self.test_dir / "test_summary.md").read_text()
+        self.assertEqual(20, content.count("shared helper body"))
+
+    def test_targets_first_matches_nested_targets(self):
+        (self.test_dir / "docs" / "guide").mkdir(parents=True)
+        (self.test_dir / "src").mkdir()
+        file_paths = [self.test_dir / "docs" / "guide" / "intro.md", self.test_dir / "include_dir" / "a.py",
+                      self.test_dir / "src" / "main.py"]
+        for file_path in file_paths:
+            file_path.write_text("x" * 400)
+
+        for target, expected in (("docs/**/*.md", file_paths[0]), ("src/main.py", file_paths[2])):
+            with self.subTest(target=target):
+                # ターゲットだけが上限に収まる。パターンは名前ではなくルートからの相対パスと照合する
+                selected = main.prioritize_files(self.test_dir, list(reversed(file_paths)), 150, "targets-first",
+                                                 [target])
+                self.assertEqual([expected], selected)
+
+    def test_duplicates_do_not_reference_files_omitted_by_budget(self):
+        body = "def helper():\n    return 'shared helper body'\n" * 50
+        (self.test_dir / "include_dir" / "a.py").write_text(body)
+        (self.test_dir / "include_dir" / "b.py").write_text(body)
+        (self.test_dir / "include_dir" / "small.py").write_text("x = 1\n")
+        file_paths = [self.test_dir / "include_dir" / name for name in ("a.py", "small.py", "b.py")]
+        report = main.RunReport()
+        output = io.StringIO()
+        main.write_markdown_output(output, self.test_dir, file_paths, "", max_tokens=200,
+                                   budget_priority="small-first", options=main.RenderOptions(with_digest=True),
+                                   report=report, dedup=True)
+
+        # 上限で省略した a.py への参照は出力せず、b.py も a.py と同じく上限で省略する
+        content = output.getvalue()
+        self.assertNotIn("同じ内容のため省略", content)
+        self.assertNotIn("shared helper body", content)
+        self.assertIn("x = 1", content)
+        self.assertEqual(2, report.counters["budget_omitted"])
+        self.assertNotIn("duplicates", report.counters)
+
+    def test_transforms_reduce_output_and_report_sizes(self):
+        source = "# comment\n\n\n\ndef f():\n    return 1  # trailing\n"
+        (self.test_dir / "include_dir" / "reduced.py").write_text(source)
+        file_stats, _ = generate_summary(
+            self.test_dir,
+            exclude_dirs=["exclude_dir"],
+            include_extensions=[".py"],
+            output_file="test_summary.md",
+            output_dir=self.test_dir,
+            target_files=[],
+            transforms=["comments", "blank-lines"]
+        )
+
+        content = (self.test_dir / "test_summary.md").read_text()
+        self.assertIn("def f():\n    return 1\n", content)
+        self.assertNotIn("comment", content)
+        self.assertEqual(len(source) + len("print('This file should be included')"), file_stats[".py"]['chars'])
+        self.assertLess(file_stats[".py"]['reduced_chars'], file_stats[".py"]['chars'])
+
+        with self.assertRaises(ValueError):
+            generate_summary(self.test_dir, ["exclude_dir"], [".py"], "test_summary.md", self.test_dir, [],
+                             transforms=["unknown"])
+
+    def test_exclusions_are_counted_in_report(self):
+        (self.test_dir / "include_dir" / ".DS_Store").write_text("")
+        report = main.RunReport()
+        file_paths = main.collect_files(self.test_dir, ["exclude_dir"], [".txt", ".py"], [], report=report)
+
+        self.assertEqual(2, len(file_paths))
+        self.assertEqual(1, report.counters["excluded_entries"])
+        self.assertEqual(1, report.counters["excluded_files"])
+
+    def test_memory_peaks_are_recorded_while_tracing(self):
+        report = main.RunReport()
+        tracemalloc.start()
+        try:
+            generate_summary(self.test_dir, ["exclude_dir"], [".txt", ".py"], "test_summary.md", self.test_dir, [],
+                             report=report)
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual({"walk", "tree", "output"}, set(report.memory_peaks))
+        self.assertTrue(all(peak > 0 for peak in report.memory_peaks.values()))
+
+    def test_profile_env_writes_stats(self):
+        profile_path = self.test_dir / "summary.prof"
+        with mock.patch.dict("os.environ", {PROFILE_ENV: str(profile_path)}):
+            generate_summary(self.test_dir, ["exclude_dir"], [".txt", ".py"], "test_summary.md", self.test_dir, [])
+
+        self.assertTrue(profile_path.exists())
+        self.assertTrue((self.test_dir / "test_summary.md").exists())
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from config import DEFAULT_TARGET_FILES, EXCLUDE_DIRS
+from main import collect_files
+from matcher import PathMatcher, compile_matcher
+
+
+class TestPathMatcher(unittest.TestCase):
+    def test_name_patterns_match_at_any_depth(self):
+        matcher = PathMatcher(["node_modules", "*.pyc", "*.min.js", "*secret*", "*~"])
+        self.assertTrue(matcher.matches("node_modules", is_dir=True))
+        self.assertTrue(matcher.matches("a/b/node_modules", is_dir=True))
+        self.assertTrue(matcher.matches("pkg/module.pyc"))
+        self.assertTrue(matcher.matches("dist/app.min.js"))
+        self.assertTrue(matcher.matches("top_secret"))
+        self.assertTrue(matcher.matches("notes.txt~"))
+        self.assertFalse(matcher.matches("src/app.js"))
+        self.assertFalse(matcher.matches("module.pyc/readme.md"))
+
+    def test_suffix_patterns_match_dot_leading_names(self):
+        # gitignore と同様に `*` は空文字列にも一致するため、`.pyc` も `*.pyc` に一致する
+        matcher = PathMatcher(["*.pyc", "*.min.js"])
+        self.assertTrue(matcher.matches(".pyc"))
+        self.assertTrue(matcher.matches("pkg/.pyc"))
+        self.assertTrue(matcher.matches(".min.js"))
+        self.assertTrue(matcher.matches(".cache.min.js"))
+        self.assertFalse(matcher.matches(".py"))
+        self.assertFalse(matcher.matches(".js"))
+
+    def test_anchored_and_double_star_patterns(self):
+        matcher = PathMatcher(["/build", "docs/**/*.md", "**/fixtures", "logs/**"])
+        self.assertTrue(matcher.matches("build", is_dir=True))
+        self.assertFalse(matcher.matches("src/build", is_dir=True))
+        self.assertTrue(matcher.matches("docs/index.md"))
+        self.assertTrue(matcher.matches("docs/api/v1/index.md"))
+        self.assertFalse(matcher.matches("src/docs/index.md"))
+        self.assertTrue(matcher.matches("tests/data/fixtures", is_dir=True))
+        self.assertTrue(matcher.matches("logs/2024/app.txt"))
+        self.assertFalse(matcher.matches("logs", is_dir=True))
+
+    def test_directory_only_and_negated_patterns(self):
+        matcher = PathMatcher(["# comment", "", "cache/", "*.log", "!keep.log"])
+        self.assertTrue(matcher.matches("cache", is_dir=True))
+        self.assertFalse(matcher.matches("cache"))
+        self.assertTrue(matcher.matches("server.log"))
+        self.assertFalse(matcher.matches("logs/keep.log"))
+        self.assertTrue(matcher.matches_path("src/cache/data.json"))
+        self.assertFalse(matcher.matches_path("src/cache.json"))
+
+    def test_character_classes(self):
+        matcher = PathMatcher(["file[0-9].txt", "temp[!a].txt"])
+        self.assertTrue(matcher.matches("file3.txt"))
+        self.assertFalse(matcher.matches("fileA.txt"))
+        self.assertTrue(matcher.matches("tempb.txt"))
+        self.assertFalse(matcher.matches("tempa.txt"))
+
+    def test_compile_matcher_is_cached(self):
+        self.assertIs(compile_matcher(("*.py", "build")), compile_matcher(("*.py", "build")))
+
+
+class TestCollectFilesWithPatterns(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        (self.test_dir / "web").mkdir()
+        (self.test_dir / "web" / "vite.config.ts").write_text("export default {}")
+        (self.test_dir / "web" / "main.ts").write_text("console.log(1)")
+        (self.test_dir / "docs" / "generated").mkdir(parents=True)
+        (self.test_dir / "docs" / "generated" / "out.md").write_text("# generated")
+        (self.test_dir / "docs" / "guide.md").write_text("# guide")
+        (self.test_dir / "src").mkdir()
+        (self.test_dir / "src" / "app.py").write_text("print('app')")
+        (self.test_dir / "src" / "app.min.js").write_text("x")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_glob_targets_and_anchored_excludes(self):
+        file_paths = collect_files(self.test_dir, EXCLUDE_DIRS + ["docs/generated"], [".py", ".md", ".js"],
+                                   DEFAULT_TARGET_FILES)
+        names = [path.relative_to(self.test_dir).as_posix() for path in file_paths]
+        self.assertEqual(["docs/guide.md", "src/app.py", "web/vite.config.ts"], names)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from main import generate_summary
+from output_writer import CONTINUATION_HEADER, OutputWriter
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write_sections(self, writer: OutputWriter):
+        with writer:
+            writer.write_section("tree\n")
+            writer.write_section("## ファイル一覧\n\n")
+            for name in ("a.py", "b.py", "c.py"):
+                writer.write_section(f"{name}\n" + "x" * 40 + "\n", name)
+        return writer
+
+    def test_splits_on_section_boundaries_and_writes_manifest(self):
+        writer = self.write_sections(OutputWriter(self.test_dir / "summary.md", split_limit=130))
+
+        manifest = json.loads((self.test_dir / "summary.manifest.json").read_text(encoding="utf-8"))
+        self.assertEqual(writer.main_path, self.test_dir / "summary.manifest.json")
+        self.assertEqual([["a.py", "b.py"], ["c.py"]], [part["files"] for part in manifest["parts"]])
+        self.assertEqual(["summary.part001.md", "summary.part002.md"], [part["name"] for part in manifest["parts"]])
+        for part in manifest["parts"]:
+            content = (self.test_dir / part["name"]).read_text(encoding="utf-8")
+            self.assertLessEqual(len(content.encode("utf-8")), 130)
+            self.assertEqual(part["size"], len(content.encode("utf-8")))
+        self.assertTrue((self.test_dir / "summary.part002.md").read_text(encoding="utf-8")
+                        .startswith(CONTINUATION_HEADER))
+
+    def test_oversized_section_gets_its_own_part(self):
+        writer = self.write_sections(OutputWriter(self.test_dir / "summary.md", split_limit=30, split_unit="chars"))
+        self.assertEqual([["a.py"], ["b.py"], ["c.py"]], [part["files"] for part in writer.parts])
+
+    def test_gzip_and_zip_compression(self):
+        self.write_sections(OutputWriter(self.test_dir / "summary.md", compression="gzip"))
+        with gzip.open(self.test_dir / "summary.md.gz", "rt", encoding="utf-8") as stream:
+            self.assertIn("c.py", stream.read())
+
+        self.write_sections(OutputWriter(self.test_dir / "split.md", split_limit=130, compression="zip"))
+        with zipfile.ZipFile(self.test_dir / "split.zip") as archive:
+            self.assertEqual(["split.part001.md", "split.part002.md"], archive.namelist())
+        self.assertFalse((self.test_dir / "split.part001.md").exists())
+
+    def test_error_discards_partial_output(self):
+        with self.assertRaises(RuntimeError):
+            with OutputWriter(self.test_dir / "summary.md", split_limit=10) as writer:
+                writer.write_section("a.py\n" * 5, "a.py")
+                writer.write_section("b.py\n" * 5, "b.py")
+                raise RuntimeError("boom")
+        self.assertEqual([], list(self.test_dir.iterdir()))
+
+    def test_generate_summary_split_by_tokens(self):
+        root = self.test_dir / "project"
+        root.mkdir()
+        for index in range(6):
+            (root / f"module{index}.py").write_text(f"value_{index} = '{'y' * 200}'\n")
+        output_dir = self.test_dir / "out"
+        output_dir.mkdir()
+
+        generate_summary(root, [], [".py"], "summary.md", output_dir, [], split_limit=150, split_unit="tokens")
+
+        manifest = json.loads((output_dir / "summary.manifest.json").read_text(encoding="utf-8"))
+        files = [name for part in manifest["parts"] for name in part["files"]]
+        self.assertEqual([f"module{index}.py" for index in range(6)], files)
+        self.assertGreater(len(manifest["parts"]), 1)
+        self.assertTrue(all(part["size"] <= 150 for part in manifest["parts"]))
+        self.assertFalse((output_dir / "summary.md").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
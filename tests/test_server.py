@@ -0,0 +1,178 @@
+import http.client
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import server
+
+
+def set_past_mtime(path: Path) -> None:
+    """一覧を使い回せるように、ディレクトリ以下の mtime を過去にする"""
+    past = time.time() - 60
+    for current, dirs, files in os.walk(path):
+        for name in files:
+            os.utime(os.path.join(current, name), (past, past))
+        os.utime(current, (past, past))
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str):
+        super().__init__("localhost")
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.root_dir = self.test_dir / "project"
+        (self.root_dir / "src").mkdir(parents=True)
+        (self.root_dir / "src" / "app.py").write_text("print('app')\n")
+        (self.root_dir / "node_modules").mkdir()
+        (self.root_dir / "node_modules" / "lib.py").write_text("print('lib')\n")
+        (self.root_dir / "README.md").write_text("# readme\n")
+        set_past_mtime(self.root_dir)
+        self.server = self.start(server.create_server(port=0))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def start(self, instance):
+        thread = threading.Thread(target=instance.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            instance.shutdown()
+            instance.server_close()
+            thread.join()
+
+        self.addCleanup(stop)
+        return instance
+
+    def request(self, method, path, body=None, connection=None, headers=None):
+        connection = connection or http.client.HTTPConnection(*self.server.server_address[:2])
+        try:
+            connection.request(method, path, body=None if body is None else json.dumps(body), headers=headers or {})
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            connection.close()
+
+    def summarize(self, **params):
+        return self.request("POST", "/summary", {"root_dir": str(self.root_dir), **params})
+
+    def summarize_with_host(self, host):
+        return self.request("POST", "/summary", {"root_dir": str(self.root_dir)}, headers={"Host": host})
+
+    def test_summary_and_warm_cache(self):
+        status, first = self.summarize()
+
+        self.assertEqual(200, status)
+        self.assertIn("src/app.py", first["summary"])
+        self.assertIn("README.md", first["summary"])
+        self.assertNotIn("lib.py", first["summary"])
+        self.assertEqual(2, first["files"])
+        self.assertEqual(0, first["counters"].get("cache_hits", 0))
+
+        status, second = self.summarize()
+        self.assertEqual(200, status)
+        self.assertEqual(first["summary"], second["summary"])
+        self.assertEqual(2, second["counters"]["cache_hits"])
+        self.assertEqual(2, second["counters"]["directories_reused"])
+
+    def test_changes_are_picked_up(self):
+        self.summarize()
+        (self.root_dir / "src" / "app.py").write_text("print('changed')\n")
+        (self.root_dir / "src" / "new.py").write_text("print('new')\n")
+
+        status, result = self.summarize()
+
+        self.assertEqual(200, status)
+        self.assertIn("print('changed')", result["summary"])
+        self.assertIn("src/new.py", result["summary"])
+        self.assertEqual(1, result["counters"]["cache_hits"])
+
+    def test_parameters_change_output(self):
+        status, result = self.summarize(include_extensions=[".py"], target_files=[], tree_depth=0)
+
+        self.assertEqual(200, status)
+        self.assertIn("src/app.py", result["summary"])
+        self.assertNotIn("README.md", result["summary"])
+
+    def test_bad_requests(self):
+        self.assertEqual(400, self.summarize(unknown=1)[0])
+        self.assertEqual(400, self.request("POST", "/summary", {"root_dir": str(self.test_dir / "missing")})[0])
+        self.assertEqual(400, self.request("POST", "/summary", {})[0])
+        self.assertEqual(400, self.summarize(transforms=["unknown"])[0])
+        self.assertEqual(404, self.request("GET", "/missing")[0])
+
+    def test_rejects_foreign_host_header(self):
+        port = self.server.server_address[1]
+        for host in ("evil.example", f"evil.example:{port}", "localhost:1", "127.0.0.1.evil.example"):
+            self.assertEqual(403, self.summarize_with_host(host)[0], host)
+        self.assertEqual(403, self.request("GET", "/status", headers={"Host": "evil.example"})[0])
+        for host in (f"localhost:{port}", f"127.0.0.1:{port}", "localhost", f"[::1]:{port}"):
+            self.assertEqual(200, self.summarize_with_host(host)[0], host)
+
+    @unittest.skipUnless(socket.has_ipv6, "IPv6 is not supported")
+    def test_ipv6_loopback(self):
+        try:
+            with socket.socket(socket.AF_INET6) as probe:
+                probe.bind(("::1", 0))
+        except OSError as e:
+            self.skipTest(f"cannot bind to ::1: {e}")
+        instance = self.start(server.create_server(host="::1", port=0))
+        port = instance.server_address[1]
+
+        status, result = self.request("POST", "/summary", {"root_dir": str(self.root_dir)},
+                                      http.client.HTTPConnection("::1", port))
+
+        self.assertEqual(200, status)
+        self.assertIn("src/app.py", result["summary"])
+
+    def test_status_and_invalidate(self):
+        self.summarize()
+        status, result = self.request("GET", "/status")
+
+        self.assertEqual(200, status)
+        self.assertEqual([str(self.root_dir.resolve())], [root["root"] for root in result["roots"]])
+        self.assertEqual(2, result["roots"][0]["files"])
+        self.assertEqual(1, self.request("POST", "/invalidate", {"root_dir": str(self.root_dir)})[1]["invalidated"])
+        self.assertEqual([], self.request("GET", "/status")[1]["roots"])
+
+    def test_evicts_least_recently_used_roots(self):
+        other_dir = self.test_dir / "other"
+        other_dir.mkdir()
+        (other_dir / "main.py").write_text("x = 1\n" * 200)
+        index = server.WarmIndex(max_bytes=1)
+
+        index.summarize(self.root_dir)
+        index.summarize(other_dir)
+
+        self.assertEqual([str(other_dir.resolve())], [root["root"] for root in index.status()["roots"]])
+        # 1つのルートだけで上限を超える場合は、そのルートの処理結果を削除する
+        self.assertEqual(0, index.status()["roots"][0]["files"])
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix domain sockets are not supported")
+    def test_unix_socket(self):
+        socket_path = str(self.test_dir / "server.sock")
+        self.start(server.create_server(socket_path=socket_path))
+
+        status, result = self.request("POST", "/summary", {"root_dir": str(self.root_dir)},
+                                      UnixHTTPConnection(socket_path))
+
+        self.assertEqual(200, status)
+        self.assertIn("src/app.py", result["summary"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import tokenizer
+from main import collect_files, generate_summary, render_file
+from tokenizer import ApproximateTokenizer, get_tokenizer, register_tokenizer
+
+
+class TestTokenizer(unittest.TestCase):
+    def test_approximate_tokenizer(self):
+        tokenizer = ApproximateTokenizer()
+        self.assertEqual(0, tokenizer.count(""))
+        self.assertEqual(2, tokenizer.count("abcdefgh"))
+        self.assertEqual(2 + 5, tokenizer.count("abcdefgh日本語です"))
+
+    def test_registered_tokenizer(self):
+        class WordTokenizer:
+            def count(self, text):
+                return len(text.split())
+
+        register_tokenizer("words", WordTokenizer)
+        try:
+            self.assertEqual(3, get_tokenizer("words").count("one two three"))
+        finally:
+            del tokenizer.TOKENIZERS["words"]
+            get_tokenizer.cache_clear()
+
+        with self.assertRaises(ValueError):
+            get_tokenizer("words")
+        with self.assertRaises(ValueError):
+            get_tokenizer("unknown")
+
+
+class TestTokenBudget(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        (self.test_dir / "a_large.py").write_text("x = 1\n" * 200)
+        (self.test_dir / "b_small.py").write_text("y = 2\n")
+        (self.test_dir / "c_small.py").write_text("z = 3\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def summarize(self, **options):
+        sink = io.StringIO()
+        file_stats, _ = generate_summary(self.test_dir, [], [".py"], "summary.md", self.test_dir, [],
+                                         sink=sink, tree_depth=0, **options)
+        return file_stats, sink.getvalue()
+
+    def test_reports_tokens_per_extension(self):
+        file_stats, _ = self.summarize()
+        file_paths = collect_files(self.test_dir, [], [".py"], [])
+        expected = sum(ApproximateTokenizer().count(render_file(self.test_dir, path).block) for path in file_paths)
+        self.assertEqual(expected, file_stats[".py"]['tokens'])
+
+    def test_order_priority_stops_at_budget(self):
+        file_stats, output = self.summarize(max_tokens=100)
+        self.assertEqual({}, dict(file_stats))
+        self.assertNotIn("b_small.py", output)
+
+    def test_small_first_priority_fits_budget(self):
+        file_stats, output = self.summarize(max_tokens=100, budget_priority="small-first")
+        self.assertEqual(2, file_stats[".py"]['count'])
+        self.assertLessEqual(ApproximateTokenizer().count(output), 100)
+        self.assertNotIn("a_large.py", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
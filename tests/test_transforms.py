@@ -0,0 +1,116 @@
+import unittest
+
+import transforms
+from transforms import get_pipeline
+
+PYTHON_SOURCE = '''#!/usr/bin/env python
+# Copyright (c) 2024 Example
+# Licensed under the MIT License
+
+"""モジュールの説明"""
+import os  # 末尾のコメント
+
+
+# コメントだけの行
+def add(a, b=1) -> int:
+    """足し算をする"""
+    text = "a # 文字列の中の記号"
+    return a + b
+
+
+class Greeter(Base):
+    """挨拶するクラス"""
+
+    @property
+    def name(self):
+        """名前"""
+'''
+
+
+class TestTransforms(unittest.TestCase):
+    def test_no_transforms_only_escapes_markdown(self):
+        pipeline = get_pipeline(".py")
+
+        self.assertEqual("python script.py\n``````\n# comment", pipeline("python -m script.py\n```\n# comment"))
+
+    def test_strips_python_comments_outside_strings(self):
+        result = get_pipeline(".py", ("comments",))(PYTHON_SOURCE)
+
+        self.assertTrue(result.startswith("#!/usr/bin/env python\n"))
+        self.assertNotIn("Copyright", result)
+        self.assertNotIn("末尾のコメント", result)
+        self.assertNotIn("コメントだけの行", result)
+        self.assertIn("import os\n", result)
+        self.assertIn('text = "a # 文字列の中の記号"', result)
+
+    def test_strips_python_docstrings(self):
+        result = get_pipeline(".py", ("docstrings",))(PYTHON_SOURCE)
+
+        for docstring in ("モジュールの説明", "足し算をする", "挨拶するクラス", "名前"):
+            self.assertNotIn(docstring, result)
+        self.assertIn("    def name(self):\n        ...\n", result)
+        compile(result, "<result>", "exec")
+
+    def test_strips_license_header_only(self):
+        result = get_pipeline(".py", ("license",))(PYTHON_SOURCE)
+
+        self.assertTrue(result.startswith('#!/usr/bin/env python\n"""モジュールの説明"""'))
+        self.assertIn("# コメントだけの行", result)
+        unchanged = "# Utility helpers\nimport os\n"
+        self.assertEqual(unchanged, get_pipeline(".py", ("license",))(unchanged))
+
+    def test_python_signatures(self):
+        result = get_pipeline(".py", ("signatures",))(PYTHON_SOURCE)
+
+        self.assertEqual("def add(a, b=1) -> int: ...\n"
+                         "class Greeter(Base):\n"
+                         "    @property\n"
+                         "    def name(self): ...\n", result)
+        self.assertEqual("def broken(:\n", get_pipeline(".py", ("signatures",))("def broken(:\n"))
+
+    def test_c_like_comments_keep_strings_and_indentation(self):
+        source = ("/*\n * SPDX-License-Identifier: MIT\n */\n"
+                  "/** 説明 */\n"
+                  "function f() { // 行末\n"
+                  "  const url = \"http://example.com\"; /* 途中 */ let t = `a // b`;\n"
+                  "  return 1;\n"
+                  "}\n")
+        result = get_pipeline(".js", ("license", "comments"))(source)
+
+        self.assertEqual("function f() {\n"
+                         "  const url = \"http://example.com\"; let t = `a // b`;\n"
+                         "  return 1;\n"
+                         "}\n", result)
+        self.assertNotIn("説明", get_pipeline(".ts", ("docstrings",))("/** 説明 */\nlet a = 1; // 残す\n"))
+        self.assertIn("// 残す", get_pipeline(".ts", ("docstrings",))("/** 説明 */\nlet a = 1; // 残す\n"))
+
+    def test_shell_hash_is_comment_only_at_word_start(self):
+        result = get_pipeline(".sh", ("comments",))('echo $# ${#items} "#tag" # comment\n# full line\nls\n')
+
+        self.assertEqual('echo $# ${#items} "#tag"\nls\n', result)
+
+    def test_syntaxes_without_strings(self):
+        self.assertEqual("<p>a</p>\n<p>b</p>\n",
+                         get_pipeline(".html", ("comments",))("<!-- header -->\n<p>a</p> <!-- note -->\n<p>b</p>\n"))
+        self.assertEqual("@echo off\necho rem is kept\n",
+                         get_pipeline(".bat", ("comments",))("@echo off\nREM comment\n:: label comment\necho rem is kept\n"))
+
+    def test_collapses_blank_lines_for_any_extension(self):
+        self.assertEqual("a\n\nb\n", get_pipeline(".md", ("blank-lines",))("a\n\n\n  \n\nb\n"))
+        self.assertEqual("{}", get_pipeline(".json", ("comments",))("{}"))
+
+    def test_register_transform_and_unknown_names(self):
+        transforms.register_transform("upper", lambda extension: str.upper if extension == ".txt" else None)
+        try:
+            self.assertEqual("ABC", get_pipeline(".txt", ("upper",))("abc"))
+            self.assertEqual("abc", get_pipeline(".py", ("upper",))("abc"))
+        finally:
+            del transforms.TRANSFORMS["upper"]
+            get_pipeline.cache_clear()
+
+        with self.assertRaises(ValueError):
+            get_pipeline(".py", ("unknown",))
+
+
+if __name__ == '__main__':
+    unittest.main()
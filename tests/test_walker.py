@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from main import collect_files
+from walker import DirectoryWalker
+
+
+class TestDirectoryWalker(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        (self.test_dir / "src").mkdir()
+        (self.test_dir / "src" / "app.py").write_text("print('app')")
+        (self.test_dir / "node_modules" / "lib").mkdir(parents=True)
+        (self.test_dir / "node_modules" / "lib" / "index.js").write_text("module.exports = 1;")
+        (self.test_dir / "mypkg.egg-info").mkdir()
+        (self.test_dir / "mypkg.egg-info" / "PKG-INFO.txt").write_text("info")
+        (self.test_dir / "top_secret").mkdir()
+        (self.test_dir / "top_secret" / "keys.txt").write_text("keys")
+        (self.test_dir / "README.md").write_text("# readme")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_walk_prunes_excluded_directories(self):
+        scanned = []
+        original_scandir = os.scandir
+
+        def recording_scandir(path):
+            scanned.append(Path(path).name)
+            return original_scandir(path)
+
+        walker = DirectoryWalker(["node_modules", "*.egg-info", "*secret*"])
+        with mock.patch("walker.os.scandir", side_effect=recording_scandir):
+            entries = list(walker.walk(self.test_dir))
+
+        self.assertTrue(all(isinstance(entry, os.DirEntry) for entry in entries))
+        self.assertEqual(["README.md", "app.py"], [entry.name for entry in entries])
+        self.assertNotIn("node_modules", scanned)
+        self.assertNotIn("mypkg.egg-info", scanned)
+        self.assertNotIn("top_secret", scanned)
+
+    def test_collect_files_honours_glob_excludes(self):
+        file_paths = collect_files(self.test_dir, ["node_modules", "*.egg-info", "*secret*"],
+                                   [".py", ".txt", ".js"], ["README.md"])
+        names = [path.relative_to(self.test_dir).as_posix() for path in file_paths]
+        self.assertEqual(["README.md", "src/app.py"], names)
+
+
+if __name__ == '__main__':
+    unittest.main()
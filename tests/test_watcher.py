@@ -0,0 +1,146 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import main
+from cache import RenderCache
+from main import generate_summary
+from report import RunReport
+from watcher import InotifyWatcher, PollingWatcher, WatchSession, watch
+
+
+class TestWatchSession(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.root = self.test_dir / "project"
+        (self.root / "src").mkdir(parents=True)
+        (self.root / "README.md").write_text("# project")
+        (self.root / "src" / "a.py").write_text("print('a')")
+        (self.root / "src" / "b.py").write_text("print('b')")
+        self.output_path = self.test_dir / "summary.md"
+        self.session = WatchSession(self.root, ["node_modules"], [".py", ".md"], [], self.output_path)
+        self.session.build()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def assert_matches_full_run(self):
+        expected_dir = self.test_dir / "expected"
+        expected_dir.mkdir(exist_ok=True)
+        expected_stats, _ = generate_summary(self.root, ["node_modules"], [".py", ".md"], "summary.md",
+                                             expected_dir, [])
+        self.assertEqual((expected_dir / "summary.md").read_bytes(), self.output_path.read_bytes())
+        file_stats, _ = self.session.stats()
+        self.assertEqual(dict(expected_stats), dict(file_stats))
+
+    def test_build_matches_generate_summary(self):
+        self.assert_matches_full_run()
+
+    def test_modified_file_is_the_only_one_read(self):
+        (self.root / "src" / "a.py").write_text("print('changed a')")
+        with mock.patch("main.read_file", wraps=main.read_file) as read_file:
+            self.assertTrue(self.session.update([str(self.root / "src" / "a.py")]))
+        self.assertEqual([self.root / "src" / "a.py"], [call.args[0] for call in read_file.call_args_list])
+        self.assert_matches_full_run()
+
+    def test_same_length_change_rewrites_only_that_section(self):
+        (self.root / "src" / "a.py").write_text("print('A')")
+        self.session.update([self.root / "src" / "a.py"])
+        self.assertEqual(len(self.session.rendered[self.root / "src" / "a.py"].block.encode("utf-8")),
+                         self.session.bytes_written)
+        self.assert_matches_full_run()
+
+    def test_added_and_deleted_files_rescan(self):
+        (self.root / "src" / "c.py").write_text("print('c')")
+        (self.root / "src" / "b.py").unlink()
+        self.assertTrue(self.session.update([self.root / "src" / "c.py", self.root / "src" / "b.py"]))
+        self.assertEqual([self.root / "README.md", self.root / "src" / "a.py", self.root / "src" / "c.py"],
+                         self.session.file_paths)
+        self.assert_matches_full_run()
+
+    def test_entry_files_follow_changed_imports(self):
+        session = WatchSession(self.root, ["node_modules"], [".py", ".md"], [], self.output_path,
+                               entry_files=["src/a.py"])
+        session.build()
+        self.assertEqual([self.root / "src" / "a.py"], session.file_paths)
+
+        (self.root / "src" / "a.py").write_text("import b")
+        self.assertTrue(session.update([self.root / "src" / "a.py"]))
+        self.assertEqual([self.root / "src" / "a.py", self.root / "src" / "b.py"], session.file_paths)
+
+    def test_cache_is_committed_after_each_update(self):
+        cache_path = self.test_dir / "cache.sqlite3"
+        cache = RenderCache(cache_path)
+        try:
+            session = WatchSession(self.root, ["node_modules"], [".py", ".md"], [], self.output_path, cache=cache)
+            session.build()
+            (self.root / "src" / "a.py").write_text("print('changed a')")
+            session.update([self.root / "src" / "a.py"])
+
+            # 監視中でも、同じキャッシュを使う別の生成が書き込みを待たされず、監視側の処理結果を使える
+            expected_dir = self.test_dir / "expected"
+            expected_dir.mkdir()
+            report = RunReport()
+            with RenderCache(cache_path, timeout=0.5, write_batch=1) as other:
+                generate_summary(self.root, ["node_modules"], [".py", ".md"], "summary.md", expected_dir, [],
+                                 cache=other, report=report)
+        finally:
+            cache.close()
+        self.assertEqual(3, report.counters["cache_hits"])
+
+    def test_unknown_vanished_paths_are_ignored(self):
+        self.assertFalse(self.session.update([self.root / "src" / ".a.py.swp", self.output_path]))
+
+    def test_watch_loop_applies_debounced_changes(self):
+        stop_event = threading.Event()
+        updates = []
+        thread = threading.Thread(target=watch, args=(self.session, stop_event),
+                                  kwargs={"debounce": 0.05, "poll_interval": 0.05, "on_update": updates.append,
+                                          "watcher": PollingWatcher(stop_event)})
+        thread.start()
+        try:
+            time.sleep(0.1)
+            target = self.root / "src" / "a.py"
+            target.write_text("print('saved once')")
+            target.write_text("print('saved twice')")
+            os.utime(target, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+            deadline = time.time() + 5
+            while not updates and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            stop_event.set()
+            thread.join(5)
+        self.assertTrue(updates)
+        self.assertIn("saved twice", self.output_path.read_text(encoding="utf-8"))
+        self.assert_matches_full_run()
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is only available on Linux")
+class TestInotifyWatcher(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        (self.test_dir / "sub").mkdir()
+        self.watcher = InotifyWatcher()
+        self.watcher.update([str(self.test_dir), str(self.test_dir / "sub")], {})
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_reports_changed_paths(self):
+        (self.test_dir / "sub" / "new.py").write_text("x = 1")
+        (self.test_dir / "other").mkdir()
+        changed = self.watcher.poll(1.0)
+        self.assertIn(str(self.test_dir / "sub" / "new.py"), changed)
+        self.assertIn(str(self.test_dir / "other"), changed)
+        self.assertEqual(set(), self.watcher.poll(0.05))
+
+
+if __name__ == '__main__':
+    unittest.main()
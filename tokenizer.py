@@ -0,0 +1,103 @@
+from functools import lru_cache
+from typing import Callable, Dict
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ApproximateTokenizer:
+    """
+    外部ライブラリを使わない高速なトークン数の近似
+
+    ASCII 文字はおよそ4文字で1トークン、それ以外の文字（日本語など）は1文字1トークンとして数える。
+    文字列の走査は C 実装のメソッドだけで行うため、ファイルの読み込みに比べて十分に軽い。
+    """
+    name = "approx"
+
+    def count(self, text: str) -> int:
+        """
+        トークン数を数える
+
+        Args:
+            text: 対象の文字列
+
+        Returns:
+            int: トークン数の近似値
+        """
+        if text.isascii():
+            return (len(text) + 3) // 4
+        ascii_chars = len(text.encode('ascii', 'ignore'))
+        return (ascii_chars + 3) // 4 + len(text) - ascii_chars
+
+
+class TiktokenTokenizer:
+    """
+    tiktoken の BPE トークナイザーで正確なトークン数を数える
+
+    tiktoken がインストールされている場合のみ利用できる。
+    """
+    name = "tiktoken"
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        """
+        Args:
+            encoding_name: tiktoken のエンコーディング名
+        """
+        try:
+            import tiktoken
+        except ImportError as e:
+            raise ImportError("tiktoken トークナイザーを使うには `pip install tiktoken` を実行してください。") from e
+        self._encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(self, text: str) -> int:
+        """
+        トークン数を数える
+
+        Args:
+            text: 対象の文字列
+
+        Returns:
+            int: トークン数
+        """
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+TOKENIZERS: Dict[str, Callable[[], object]] = {
+    ApproximateTokenizer.name: ApproximateTokenizer,
+    TiktokenTokenizer.name: TiktokenTokenizer,
+}
+
+
+def register_tokenizer(name: str, factory: Callable[[], object]) -> None:
+    """
+    トークナイザーを登録する
+
+    factory は `count(text) -> int` メソッドを持つオブジェクトを返す呼び出し可能オブジェクト。
+    プロセスプールで使う場合は、ワーカープロセスでも同じ登録が行われている必要がある。
+
+    Args:
+        name: トークナイザー名
+        factory: トークナイザーを生成する呼び出し可能オブジェクト
+    """
+    TOKENIZERS[name] = factory
+    get_tokenizer.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(name: str):
+    """
+    名前からトークナイザーを取得する
+
+    Args:
+        name: トークナイザー名
+
+    Returns:
+        トークナイザー
+
+    Raises:
+        ValueError: 未登録の名前が指定された場合
+    """
+    if name not in TOKENIZERS:
+        raise ValueError(f"Unknown tokenizer: {name} (available: {', '.join(TOKENIZERS)})")
+    return TOKENIZERS[name]()
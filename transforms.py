@@ -0,0 +1,382 @@
+"""
+ファイルの内容を出力前に縮小する変換のパイプライン
+
+変換は名前で指定し、拡張子ごとに適用できる実装を選んで1つのパイプラインにまとめる。
+正規表現は拡張子と変換名の組み合わせごとに1回だけコンパイルし、以降のファイルでは使い回す。
+どの変換を指定しても、最後にマークダウンに埋め込むためのエスケープを行う。
+"""
+import ast
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+Transform = Callable[[str], str]
+# 拡張子を受け取り、その拡張子に適用する変換を返す。適用できない場合は None を返す
+TransformFactory = Callable[[str], Optional[Transform]]
+
+# 文字列リテラル（コメント記号を含んでいても削除しない）
+_DOUBLE_QUOTED = r'"(?:\\.|[^"\\\n])*"'
+_SINGLE_QUOTED = r"'(?:\\.|[^'\\\n])*'"
+_BACKQUOTED = r'`(?:\\.|[^`\\])*`'
+_TRIPLE_QUOTED = r'"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\''
+_SQL_QUOTED = r"'(?:[^']|'')*'"
+# CSS の url() は引用符なしで // を含むことがある
+_CSS_URL = r'url\([^)\n]*\)'
+_C_BLOCK = (r'/\*', r'\*/')
+
+# ライセンスヘッダーとみなすキーワード
+_LICENSE_KEYWORDS = re.compile(
+    r'copyright|licen[cs]e|spdx-license-identifier|all rights reserved|permission is hereby granted', re.IGNORECASE)
+# 2行以上続く空行
+_BLANK_LINES = re.compile(r'\n(?:[ \t]*\n){2,}')
+# python -m で始まるコマンド（Claude Projectエラー対策）
+_PYTHON_MODULE = re.compile(r'python -m')
+# マークダウンのコードブロックの開始記号
+_CODE_FENCE = re.compile(r'^```', re.MULTILINE)
+
+
+class CommentSyntax(NamedTuple):
+    """
+    言語ごとのコメントと文字列の記法（正規表現の断片）
+
+    Attributes:
+        strings: 文字列リテラル
+        line: 行コメントの開始記号。None の場合は行コメントがない
+        blocks: ブロックコメントの (開始, 終了) のリスト
+        docs: ドキュメントコメント（行コメントまたはブロックコメントの断片）のリスト
+        inline: 行コメントをコードの後ろにも書けるか
+    """
+    strings: Tuple[str, ...] = ()
+    line: Optional[str] = None
+    blocks: Tuple[Tuple[str, str], ...] = ()
+    docs: Tuple[Tuple[str, str], ...] = ()
+    inline: bool = True
+
+
+_HASH = CommentSyntax(strings=(_DOUBLE_QUOTED, _SINGLE_QUOTED), line=r'(?<!\S)#')
+_C_LIKE = CommentSyntax(strings=(_DOUBLE_QUOTED, _SINGLE_QUOTED), line=r'//', blocks=(_C_BLOCK,),
+                        docs=((r'///', r'$'), (r'/\*\*(?![*/])', r'\*/')))
+_JS_LIKE = _C_LIKE._replace(strings=(_DOUBLE_QUOTED, _SINGLE_QUOTED, _BACKQUOTED))
+_MARKUP = CommentSyntax(blocks=((r'<!--', r'-->'),))
+
+# 拡張子ごとのコメントの記法（config.SUPPORTED_EXTENSIONS のうち、コメントを持つもの）
+LANGUAGE_SYNTAX: Dict[str, CommentSyntax] = {
+    ".py": CommentSyntax(strings=(_TRIPLE_QUOTED, _DOUBLE_QUOTED, _SINGLE_QUOTED), line=r'#'),
+    ".rb": _HASH,
+    ".sh": _HASH,
+    ".yml": _HASH,
+    ".yaml": _HASH,
+    ".toml": _HASH,
+    ".conf": _HASH,
+    ".ini": _HASH._replace(line=r'(?<!\S)[#;]'),
+    ".ps1": _HASH._replace(blocks=((r'<#', r'#>'),)),
+    ".bat": CommentSyntax(line=r'(?i:rem\b)|::', inline=False),
+    ".sql": CommentSyntax(strings=(_SQL_QUOTED, _DOUBLE_QUOTED), line=r'--', blocks=(_C_BLOCK,)),
+    ".c": _C_LIKE,
+    ".h": _C_LIKE,
+    ".cpp": _C_LIKE,
+    ".hpp": _C_LIKE,
+    ".java": _C_LIKE,
+    ".kt": _C_LIKE,
+    ".scala": _C_LIKE,
+    ".swift": _C_LIKE,
+    ".rs": _C_LIKE,
+    ".go": _JS_LIKE,
+    ".js": _JS_LIKE,
+    ".jsx": _JS_LIKE,
+    ".ts": _JS_LIKE,
+    ".tsx": _JS_LIKE,
+    ".php": _C_LIKE._replace(line=r'//|#(?!\[)'),
+    ".css": CommentSyntax(strings=(_DOUBLE_QUOTED, _SINGLE_QUOTED), blocks=(_C_BLOCK,)),
+    ".scss": _C_LIKE._replace(strings=(_DOUBLE_QUOTED, _SINGLE_QUOTED, _CSS_URL), docs=()),
+    ".sass": _C_LIKE._replace(strings=(_DOUBLE_QUOTED, _SINGLE_QUOTED, _CSS_URL), docs=()),
+    ".html": _MARKUP,
+    ".xml": _MARKUP,
+    ".vue": _MARKUP,
+    ".svelte": _MARKUP,
+}
+
+
+def compile_comment_stripper(strings: Sequence[str], line: Optional[str], blocks: Sequence[Tuple[str, str]],
+                             inline: bool = True) -> Optional[Transform]:
+    """
+    文字列リテラルを避けてコメントを削除する変換を生成する
+
+    コメントだけの行は行ごと削除し、コードの後ろのコメントは直前の空白とともに削除する。shebang 行は残す。
+
+    Args:
+        strings: 文字列リテラルの正規表現
+        line: 行コメントの開始記号の正規表現
+        blocks: ブロックコメントの (開始, 終了) の正規表現のリスト
+        inline: 行コメントをコードの後ろにも書けるか
+
+    Returns:
+        Optional[Transform]: 変換。削除するコメントがない場合は None
+    """
+    block_patterns = [rf'(?:{start})[\s\S]*?(?:{end})' for start, end in blocks]
+    line_patterns = [rf'(?:{line})[^\n]*'] if line else []
+    comments = line_patterns + block_patterns
+    if not comments:
+        return None
+    inline_comments = comments if inline else block_patterns
+    # 文字列リテラルがない記法でも置換関数から参照できるよう、keep グループは常に用意する（(?!) は何にも一致しない）
+    parts = [rf'(?P<keep>{"|".join(strings) if strings else "(?!)"})']
+    parts.append(rf'^[ \t]*(?:{"|".join(comments)})[ \t]*(?:\n|\Z)')
+    if inline_comments:
+        # 行頭のインデントは残し、コードとコメントの間の空白だけを削除する
+        parts.append(rf'(?:(?<=\S)[ \t]+)?(?:{"|".join(inline_comments)})')
+    pattern = re.compile("|".join(parts), re.MULTILINE)
+
+    def strip_comments(content: str) -> str:
+        # shebang 行はコメントとして扱わない
+        shebang = ""
+        if content.startswith("#!"):
+            shebang, newline, content = content.partition("\n")
+            shebang += newline
+        return shebang + pattern.sub(lambda match: match.group("keep") or "", content)
+
+    return strip_comments
+
+
+def strip_python_docstrings(content: str) -> str:
+    """
+    Python のモジュール・クラス・関数のドキュメント文字列を削除する
+
+    構文解析できない場合は内容をそのまま返す。本体がドキュメント文字列だけの場合は `...` に置き換える。
+
+    Args:
+        content: ファイルの内容
+
+    Returns:
+        str: ドキュメント文字列を削除した内容
+    """
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return content
+    lines = content.splitlines(keepends=True)
+    # 置き換える行の範囲（0始まり、終了は含まない）と置き換え後の行
+    replacements: List[Tuple[int, int, List[str]]] = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        if not node.body:
+            continue
+        docstring = node.body[0]
+        if not (isinstance(docstring, ast.Expr) and isinstance(docstring.value, ast.Constant)
+                and isinstance(docstring.value.value, str)):
+            continue
+        start, end = docstring.lineno - 1, docstring.end_lineno
+        # 他の文と同じ行にあるドキュメント文字列はそのまま残す
+        if _before(lines[start], docstring.col_offset).strip() or \
+                _after(lines[end - 1], docstring.end_col_offset).strip():
+            continue
+        if len(node.body) > 1 and node.body[1].lineno - 1 < end:
+            continue
+        filler = [] if len(node.body) > 1 or isinstance(node, ast.Module) else \
+            [" " * docstring.col_offset + "...\n"]
+        replacements.append((start, end, filler))
+    for start, end, filler in sorted(replacements, reverse=True):
+        lines[start:end] = filler
+    return "".join(lines)
+
+
+def _before(line: str, offset: int) -> str:
+    # ast の列番号は UTF-8 のバイト数で数える
+    return line.encode("utf-8")[:offset].decode("utf-8", "replace")
+
+
+def _after(line: str, offset: int) -> str:
+    return line.encode("utf-8")[offset:].decode("utf-8", "replace")
+
+
+def python_signatures(content: str) -> str:
+    """
+    Python のトップレベルの関数・クラスの定義行だけを取り出す
+
+    クラスは直下のメソッドの定義行も含める。本体は `...` に置き換える。
+    構文解析できない場合は内容をそのまま返す。
+
+    Args:
+        content: ファイルの内容
+
+    Returns:
+        str: 定義行だけの内容
+    """
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return content
+    lines = content.splitlines(keepends=True)
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+    def header(node: ast.AST) -> str:
+        # デコレーターから本体の直前までを取り出す
+        first = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+        body = node.body[0]
+        text = "".join(lines[first - 1:body.lineno - 1]) + _before(lines[body.lineno - 1], body.col_offset)
+        return text.rstrip()
+
+    output = []
+    for node in tree.body:
+        if not isinstance(node, definitions):
+            continue
+        methods = [child for child in node.body if isinstance(child, definitions)] \
+            if isinstance(node, ast.ClassDef) else []
+        if not methods:
+            output.append(f"{header(node)} ...\n")
+            continue
+        output.append(f"{header(node)}\n")
+        output.extend(f"{header(method)} ...\n" for method in methods)
+    return "".join(output)
+
+
+def compile_license_stripper(syntax: CommentSyntax) -> Optional[Transform]:
+    """
+    ファイル先頭のライセンスヘッダー（ライセンスに関するキーワードを含むコメント）を削除する変換を生成する
+
+    shebang 行は残す。
+
+    Args:
+        syntax: コメントの記法
+
+    Returns:
+        Optional[Transform]: 変換。コメントがない言語の場合は None
+    """
+    headers = [rf'(?:[ \t]*(?:{syntax.line})[^\n]*(?:\n|\Z))+'] if syntax.line else []
+    headers += [rf'[ \t]*(?:{start})[\s\S]*?(?:{end})[ \t]*(?:\n|\Z)' for start, end in syntax.blocks]
+    if not headers:
+        return None
+    pattern = re.compile(rf'\A(?P<prefix>(?:#![^\n]*\n)?(?:[ \t]*\n)*)(?P<header>{"|".join(headers)})(?:[ \t]*\n)*')
+
+    def strip_license(content: str) -> str:
+        match = pattern.match(content)
+        if match is None or not _LICENSE_KEYWORDS.search(match.group("header")):
+            return content
+        return match.group("prefix") + content[match.end():]
+
+    return strip_license
+
+
+def collapse_blank_lines(content: str) -> str:
+    """
+    2行以上続く空行を1行にまとめる
+
+    Args:
+        content: ファイルの内容
+
+    Returns:
+        str: 空行をまとめた内容
+    """
+    return _BLANK_LINES.sub("\n\n", content)
+
+
+def escape_markdown(content: str) -> str:
+    """
+    内容をマークダウンのコードブロックに埋め込めるように変換する
+
+    Args:
+        content: ファイルの内容
+
+    Returns:
+        str: 変換後の内容
+    """
+    # python -m で始まるコマンドを python に変換(Claude Projectエラー対策)
+    content = _PYTHON_MODULE.sub('python', content)
+    # コードブロックの開始記号 ``` がマークダウンの区切りとして誤認識されるのを防ぐため、
+    return _CODE_FENCE.sub('``````', content)
+
+
+def _comments(extension: str) -> Optional[Transform]:
+    syntax = LANGUAGE_SYNTAX.get(extension)
+    if syntax is None:
+        return None
+    return compile_comment_stripper(syntax.strings, syntax.line, syntax.blocks, syntax.inline)
+
+
+def _docstrings(extension: str) -> Optional[Transform]:
+    if extension == ".py":
+        return strip_python_docstrings
+    syntax = LANGUAGE_SYNTAX.get(extension)
+    if syntax is None or not syntax.docs:
+        return None
+    line_docs = [start for start, end in syntax.docs if end == r'$']
+    block_docs = [(start, end) for start, end in syntax.docs if end != r'$']
+    return compile_comment_stripper(syntax.strings, "|".join(line_docs) or None, block_docs)
+
+
+def _license(extension: str) -> Optional[Transform]:
+    syntax = LANGUAGE_SYNTAX.get(extension)
+    return compile_license_stripper(syntax) if syntax is not None else None
+
+
+def _signatures(extension: str) -> Optional[Transform]:
+    return python_signatures if extension == ".py" else None
+
+
+# 変換名 -> 拡張子ごとの変換を返す関数。パイプラインはこの登録順に適用する
+TRANSFORMS: Dict[str, TransformFactory] = {
+    "signatures": _signatures,
+    "docstrings": _docstrings,
+    "license": _license,
+    "comments": _comments,
+    "blank-lines": lambda extension: collapse_blank_lines,
+}
+
+
+def register_transform(name: str, factory: TransformFactory) -> None:
+    """
+    変換を登録する
+
+    factory は拡張子を受け取り、`(content: str) -> str` の変換か、適用しない場合は None を返す。
+    プロセスプールで使う場合は、ワーカープロセスでも同じ登録が行われている必要がある。
+
+    Args:
+        name: 変換名
+        factory: 拡張子ごとの変換を返す呼び出し可能オブジェクト
+    """
+    TRANSFORMS[name] = factory
+    get_pipeline.cache_clear()
+
+
+def validate_transforms(names: Iterable[str]) -> None:
+    """
+    変換名がすべて登録されているかを確認する
+
+    Args:
+        names: 変換名
+
+    Raises:
+        ValueError: 未登録の名前が含まれる場合
+    """
+    unknown = [name for name in names if name not in TRANSFORMS]
+    if unknown:
+        raise ValueError(f"Unknown transform: {', '.join(unknown)} (available: {', '.join(TRANSFORMS)})")
+
+
+@lru_cache(maxsize=None)
+def get_pipeline(extension: str, names: Tuple[str, ...] = ()) -> Transform:
+    """
+    拡張子に適用する変換を1つのパイプラインにまとめる
+
+    Args:
+        extension: 拡張子
+        names: 適用する変換名
+
+    Returns:
+        Transform: 指定した変換のうち拡張子に適用できるものを登録順に行い、最後にマークダウン用のエスケープを行う変換
+
+    Raises:
+        ValueError: 未登録の変換名が指定された場合
+    """
+    validate_transforms(names)
+    stages = [factory(extension) for name, factory in TRANSFORMS.items() if name in names]
+    stages = [stage for stage in stages if stage is not None]
+    stages.append(escape_markdown)
+
+    def pipeline(content: str) -> str:
+        for stage in stages:
+            content = stage(content)
+        return content
+
+    return pipeline
@@ -0,0 +1,87 @@
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from logging_config import get_logger
+from matcher import compile_matcher
+
+logger = get_logger(__name__)
+
+
+class DirectoryWalker:
+    """
+    os.scandir ベースのディレクトリ走査クラス
+
+    除外ディレクトリは中に入る前に枝刈りするため、node_modules や .git などの
+    巨大なディレクトリを走査しない。除外パターンは gitignore 形式で、完全一致に加えて
+    `*.egg-info` のような glob や `docs/build` のようなルートからのパスにも対応する。
+
+    listing_depth を指定すると、その深さ未満のディレクトリの一覧を listing に記録する。
+    ディレクトリ構造の表示はこの一覧を使うため、ファイルシステムの走査は1回で済む。
+    """
+
+    def __init__(self, exclude_dirs: List[str], listing_depth: Optional[int] = None):
+        """
+        Args:
+            exclude_dirs: 除外するディレクトリ名またはgitignore形式のパターンのリスト
+            listing_depth: ディレクトリ一覧を記録する深さ（ルートが0）。None の場合は記録しない
+        """
+        self.listing_depth = listing_depth
+        # ディレクトリのパス -> (名前, ディレクトリかどうか) のリスト
+        self.listing: Dict[str, List[Tuple[str, bool]]] = {}
+        # 走査したディレクトリのパス（変更の監視に使う）
+        self.directories: List[str] = []
+        # 除外パターンに一致して走査しなかったエントリ数
+        self.excluded = 0
+        self.matcher = compile_matcher(tuple(exclude_dirs))
+
+    def walk(self, root_dir: Path, max_depth: Optional[int] = None) -> Iterator[os.DirEntry]:
+        """
+        ルートディレクトリ以下のファイルを走査する
+
+        各ディレクトリのエントリは名前順に並べ、そのディレクトリのファイルを返してから
+        サブディレクトリへ降りる。除外パターンに一致するディレクトリには入らない。
+
+        Args:
+            root_dir: ルートディレクトリ
+            max_depth: 列挙するエントリの最大の深さ（ルート直下が1）。None の場合は制限しない
+
+        Yields:
+            os.DirEntry: 収集対象候補のファイルエントリ
+        """
+        matcher = self.matcher
+        stack = [(os.fspath(root_dir), "", 0)]
+        while stack:
+            current, prefix, depth = stack.pop()
+            try:
+                with os.scandir(current) as iterator:
+                    entries = sorted(iterator, key=lambda entry: entry.name)
+            except OSError as e:
+                logger.warning(f"ディレクトリを読み取れませんでした: {current}: {e}")
+                continue
+            self.directories.append(current)
+
+            sub_dirs = []
+            listing = [] if self.listing_depth is not None and depth < self.listing_depth else None
+            for entry in entries:
+                rel_path = prefix + entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if matcher and matcher.matches(rel_path, is_dir):
+                        self.excluded += 1
+                        continue
+                    if is_dir:
+                        sub_dirs.append((entry.path, rel_path + "/", depth + 1))
+                    elif entry.is_file():
+                        yield entry
+                except OSError as e:
+                    logger.warning(f"エントリを判定できませんでした: {entry.path}: {e}")
+                    continue
+                if listing is not None:
+                    listing.append((entry.name, is_dir))
+            if listing is not None:
+                self.listing[current] = listing
+            if max_depth is not None and depth + 1 >= max_depth:
+                continue
+            # 名前順に処理するため逆順でスタックに積む
+            stack.extend(reversed(sub_dirs))
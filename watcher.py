@@ -0,0 +1,522 @@
+"""
+監視モード
+
+ファイルの一覧・ファイルごとの処理結果・統計をメモリに保持し、ファイルが変更されたら
+そのファイルだけを処理し直して、出力ファイルの変更のあった部分だけを書き換える。
+変更の検知には Linux では inotify を使い、使えない環境ではファイルの状態を定期的に比較する。
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from cache import RenderCache, StatKey
+from config import (
+    DEDUP_FILES, DEFAULT_EXECUTOR, DEFAULT_FILE_SOURCE, DEFAULT_TOKENIZER, DEFAULT_TRANSFORMS, DEFAULT_WORKERS,
+    DEPENDENCY_DEPTH, MAX_FILE_SIZE, OVERSIZE_POLICY, TREE_MAX_DEPTH, TREE_MAX_ENTRIES, WATCH_DEBOUNCE, WATCH_POLL_INTERVAL
+)
+from dependencies import select_dependencies
+from git_source import create_walker
+from logging_config import get_logger
+from main import (
+    ContentDeduplicator, RenderedFile, RenderOptions, accumulate_file_stats, collect_files, get_directory_structure, iter_markdown_output,
+    render_files
+)
+
+logger = get_logger(__name__)
+
+# inotify のイベント
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+               | IN_DELETE_SELF | IN_MOVE_SELF)
+# struct inotify_event の固定長部分（wd, mask, cookie, len）
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class WatchSession:
+    """
+    1つのプロジェクトのサマリーをメモリに保持し、変更に合わせて更新するクラス
+    """
+
+    def __init__(self, root_dir: Path, exclude_dirs: List[str], include_extensions: List[str],
+                 target_files: List[str], output_path: Path, *, workers: int = DEFAULT_WORKERS,
+                 executor: str = DEFAULT_EXECUTOR, cache: Optional[RenderCache] = None,
+                 tree_depth: int = TREE_MAX_DEPTH, tree_max_entries: Optional[int] = TREE_MAX_ENTRIES,
+                 tokenizer: str = DEFAULT_TOKENIZER, max_file_size: Optional[int] = MAX_FILE_SIZE,
+                 oversize_policy: str = OVERSIZE_POLICY, source: str = DEFAULT_FILE_SOURCE,
+                 dedup: bool = DEDUP_FILES, transforms: Sequence[str] = DEFAULT_TRANSFORMS,
+                 entry_files: Optional[Sequence[str]] = None, dependency_depth: Optional[int] = DEPENDENCY_DEPTH):
+        """
+        Args:
+            root_dir: ルートディレクトリ
+            exclude_dirs: 除外するディレクトリリスト
+            include_extensions: 含めるファイル拡張子リスト
+            target_files: 取得対象のファイル名またはパターンのリスト
+            output_path: 出力ファイルのパス
+            workers: 並列ワーカー数
+            executor: 並列処理に使うプールの種類（"thread" または "process"）
+            cache: 処理結果のキャッシュ
+            tree_depth: ディレクトリ構造を表示する深さ
+            tree_max_entries: ディレクトリ構造で1ディレクトリあたりに表示する最大エントリ数
+            tokenizer: トークナイザー名
+            max_file_size: 全体を読み込む最大のファイルサイズ（バイト）
+            oversize_policy: 上限を超えるファイルの扱い
+            source: ファイルの列挙方法（"filesystem" または "git"）
+            dedup: 同じ内容のファイルを、最初に出力したファイルへの参照に置き換えるか
+            transforms: 出力前に内容を縮小する変換名のリスト
+            entry_files: 指定した場合、これらのファイルと import で依存するファイルだけを出力する
+            dependency_depth: entry_files からたどる依存関係の深さ。None の場合は制限しない
+        """
+        self.root_dir = root_dir
+        self.exclude_dirs = exclude_dirs
+        self.include_extensions = include_extensions
+        self.target_files = target_files
+        self.output_path = Path(output_path)
+        self.workers = workers
+        self.executor = executor
+        self.cache = cache
+        self.tree_depth = tree_depth
+        self.tree_max_entries = tree_max_entries
+        self.source = source
+        self.dedup = dedup
+        self.entry_files = entry_files
+        self.dependency_depth = dependency_depth
+        self.options = RenderOptions(tokenizer=tokenizer, max_file_size=max_file_size,
+                                     oversize_policy=oversize_policy, with_digest=dedup,
+                                     transforms=tuple(transforms))
+
+        self.file_paths: List[Path] = []
+        self.rendered: Dict[Path, RenderedFile] = {}
+        # 処理する直前に取得したファイルの状態
+        self.stat_keys: Dict[Path, Optional[StatKey]] = {}
+        self.directories: List[str] = []
+        self.directory_structure = ""
+        # 最後に書き込んだ出力の断片と、そのエンコード結果
+        self._sections: List[str] = []
+        self._encoded: List[bytes] = []
+        # 最後の書き込みで実際に書き込んだバイト数
+        self.bytes_written = 0
+
+    def build(self) -> None:
+        """
+        全体を走査・処理して出力ファイルを書き込む
+        """
+        self.scan()
+        self.write()
+
+    def scan(self) -> None:
+        """
+        ファイルの一覧とディレクトリ構造を取り直し、新しいファイルと変更のあったファイルだけを処理する
+        """
+        walker = create_walker(self.root_dir, self.exclude_dirs, listing_depth=self.tree_depth, source=self.source)
+        file_paths = [file_path for file_path in
+                      collect_files(self.root_dir, self.exclude_dirs, self.include_extensions, self.target_files,
+                                    walker=walker)
+                      if file_path != self.output_path]
+        if self.entry_files:
+            file_paths = select_dependencies(self.root_dir, file_paths, self.entry_files, self.dependency_depth,
+                                             self.cache)
+        self.directory_structure = get_directory_structure(self.root_dir, self.exclude_dirs, self.tree_depth,
+                                                           self.tree_max_entries, walker)
+        self.directories = walker.directories
+
+        stale = []
+        stat_keys = {}
+        for file_path in file_paths:
+            stat_key = RenderCache.stat_key(file_path)
+            stat_keys[file_path] = stat_key
+            if stat_key is None or file_path not in self.rendered or self.stat_keys.get(file_path) != stat_key:
+                stale.append(file_path)
+        self.file_paths = file_paths
+        self.stat_keys = stat_keys
+        self.rendered = {file_path: self.rendered[file_path] for file_path in file_paths
+                         if file_path in self.rendered}
+        self._render(stale)
+
+    def update(self, changed_paths: Iterable[Union[str, Path]]) -> bool:
+        """
+        変更されたパスを反映して出力ファイルを更新する
+
+        既知のファイルの内容が変わっただけであれば、そのファイルだけを処理し直す。
+        ファイルの追加・削除やディレクトリの変更が含まれる場合は、一覧を取り直す。
+        エントリファイルを指定した場合は、import が変わると依存するファイルも変わるため、常に一覧を取り直す。
+
+        Args:
+            changed_paths: 変更されたファイルまたはディレクトリのパス
+
+        Returns:
+            bool: 出力ファイルを書き換えた場合はTrue
+        """
+        changed = {Path(path) for path in changed_paths}
+        changed.discard(self.output_path)
+        # 一時ファイルのように、作られてすぐ消えた未知のパスは無視する
+        changed = {path for path in changed if path in self.rendered or os.path.lexists(path)}
+        if not changed:
+            return False
+
+        if not self.entry_files and all(path in self.rendered and path.is_file() for path in changed):
+            order = {file_path: index for index, file_path in enumerate(self.file_paths)}
+            stale = sorted(changed, key=order.__getitem__)
+            for file_path in stale:
+                self.stat_keys[file_path] = RenderCache.stat_key(file_path)
+            self._render(stale)
+        else:
+            self.scan()
+        return self.write()
+
+    def write(self) -> bool:
+        """
+        メモリ上の処理結果を出力ファイルに書き込む
+
+        前回の書き込みから変わった断片だけを書き換える。断片の長さが変わらなければその位置だけを上書きし、
+        変わった場合は最初に変わった断片から末尾までを書き直す。
+
+        Returns:
+            bool: 出力ファイルを書き換えた場合はTrue
+        """
+        sections = list(iter_markdown_output(self.directory_structure, self._ordered()))
+        previous = dict(zip(self._sections, self._encoded))
+        encoded = [previous.get(section) or _encode(section) for section in sections]
+
+        if not self._encoded or not self._output_matches():
+            self.output_path.write_bytes(b"".join(encoded))
+            self.bytes_written = sum(len(chunk) for chunk in encoded)
+        else:
+            self.bytes_written = _rewrite(self.output_path, self._encoded, encoded)
+        self._sections = sections
+        self._encoded = encoded
+        if self.bytes_written:
+            logger.info(f"Summary updated: {self.output_path} ({self.bytes_written} bytes written)")
+        return self.bytes_written > 0
+
+    def stats(self) -> Tuple[Dict[str, Dict[str, int]], str]:
+        """
+        メモリ上の処理結果からファイル統計情報を集計する
+
+        Returns:
+            Tuple[Dict[str, Dict[str, int]], str]: ファイル統計情報と合計文字数
+        """
+        return accumulate_file_stats(self._ordered())
+
+    def _ordered(self) -> Iterator[RenderedFile]:
+        """
+        処理結果を出力順に返す。重複の置き換えは変更のたびに先頭からやり直す
+
+        Yields:
+            RenderedFile: 処理済みファイル
+        """
+        deduplicator = ContentDeduplicator(self.root_dir, self.options.tokenizer) if self.dedup else None
+        for file_path in self.file_paths:
+            rendered = self.rendered[file_path]
+            if deduplicator is None:
+                yield rendered
+                continue
+            written = deduplicator.apply(rendered)
+            yield written
+            deduplicator.record(rendered, written)
+
+    def _render(self, file_paths: List[Path]) -> None:
+        """
+        ファイルを処理して結果をメモリに保持する
+
+        Args:
+            file_paths: 処理するファイルパスのリスト
+        """
+        for rendered in render_files(self.root_dir, file_paths, workers=self.workers, executor=self.executor,
+                                     cache=self.cache, options=self.options):
+            self.rendered[rendered.path] = rendered
+        # 監視中もキャッシュを共有する他の生成（GUI や別の CLI）から使えるように、更新のたびに書き込む
+        if self.cache is not None:
+            self.cache.flush()
+
+    def _output_matches(self) -> bool:
+        """
+        出力ファイルが前回書き込んだままのサイズかを確認する
+
+        Returns:
+            bool: 前回の書き込み結果と同じサイズの場合はTrue
+        """
+        try:
+            return self.output_path.stat().st_size == sum(len(chunk) for chunk in self._encoded)
+        except OSError:
+            return False
+
+
+class PollingWatcher:
+    """
+    ファイルとディレクトリの状態（mtime とサイズ）を定期的に比較して変更を検知するクラス
+
+    ディレクトリの mtime はエントリの追加・削除で変わるため、新しいファイルも検知できる。
+    """
+
+    def __init__(self, stop_event: Optional[threading.Event] = None):
+        """
+        Args:
+            stop_event: 待機を中断するためのイベント
+        """
+        self._stop_event = stop_event or threading.Event()
+        self._snapshot: Dict[str, Optional[StatKey]] = {}
+
+    def update(self, directories: Iterable[str], stat_keys: Dict[Path, Optional[StatKey]]) -> None:
+        """
+        監視対象を更新する
+
+        Args:
+            directories: 監視するディレクトリのパス
+            stat_keys: 監視するファイルのパスと、処理したときの状態
+        """
+        snapshot = {directory: RenderCache.stat_key(Path(directory)) for directory in directories}
+        snapshot.update((os.fspath(file_path), stat_key) for file_path, stat_key in stat_keys.items())
+        self._snapshot = snapshot
+
+    def poll(self, timeout: float) -> Set[str]:
+        """
+        timeout 秒待ってから、状態が変わったパスを返す
+
+        Args:
+            timeout: 待機する秒数
+
+        Returns:
+            Set[str]: 変更されたパスの集合
+        """
+        if self._stop_event.wait(timeout):
+            return set()
+        changed = set()
+        for path, stat_key in self._snapshot.items():
+            current = RenderCache.stat_key(Path(path))
+            if current != stat_key:
+                changed.add(path)
+                self._snapshot[path] = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """
+    Linux の inotify でディレクトリごとの変更を検知するクラス
+
+    ctypes で libc を直接呼び出すため、追加のライブラリは不要。
+    """
+
+    def __init__(self):
+        """
+        Raises:
+            OSError: inotify が使えない場合
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        try:
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        except AttributeError as e:
+            raise OSError(f"inotify is not available: {e}") from e
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._libc = libc
+        self._fd = fd
+        # ウォッチ記述子 -> ディレクトリのパス
+        self._watches: Dict[int, str] = {}
+        # ディレクトリのパス -> ウォッチ記述子
+        self._descriptors: Dict[str, int] = {}
+
+    def update(self, directories: Iterable[str], stat_keys: Dict[Path, Optional[StatKey]]) -> None:
+        """
+        監視するディレクトリを更新する
+
+        Args:
+            directories: 監視するディレクトリのパス
+            stat_keys: 監視するファイルのパス（inotify ではディレクトリ単位で監視するため使わない）
+
+        Raises:
+            OSError: 監視の上限（fs.inotify.max_user_watches）に達した場合
+        """
+        directories = set(directories)
+        for directory in directories - self._descriptors.keys():
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                if errno == 2:  # ENOENT: 走査後に削除された
+                    continue
+                raise OSError(errno, f"{os.strerror(errno)}: {directory}")
+            self._watches[wd] = directory
+            self._descriptors[directory] = wd
+        for directory in self._descriptors.keys() - directories:
+            wd = self._descriptors.pop(directory)
+            self._watches.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def poll(self, timeout: float) -> Set[str]:
+        """
+        最大 timeout 秒待って、変更されたパスを返す
+
+        Args:
+            timeout: 待機する最大秒数
+
+        Returns:
+            Set[str]: 変更されたパスの集合
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # イベントを取りこぼしたので、全体を取り直させる
+                changed.update(self._descriptors)
+                continue
+            if mask & IN_IGNORED:
+                directory = self._watches.pop(wd, None)
+                if directory is not None:
+                    self._descriptors.pop(directory, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is not None:
+                changed.add(os.path.join(directory, os.fsdecode(name)) if name else directory)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def create_watcher(stop_event: Optional[threading.Event] = None) -> Union[InotifyWatcher, PollingWatcher]:
+    """
+    使える方法で変更を検知するクラスを生成する
+
+    Args:
+        stop_event: 待機を中断するためのイベント
+
+    Returns:
+        Union[InotifyWatcher, PollingWatcher]: inotify が使える場合は InotifyWatcher、それ以外は PollingWatcher
+    """
+    try:
+        return InotifyWatcher()
+    except OSError as e:
+        logger.info(f"inotify is not available, falling back to polling: {e}")
+        return PollingWatcher(stop_event)
+
+
+def watch(session: WatchSession, stop_event: Optional[threading.Event] = None,
+          debounce: float = WATCH_DEBOUNCE, poll_interval: float = WATCH_POLL_INTERVAL,
+          on_update: Optional[Callable[[WatchSession], None]] = None,
+          watcher: Optional[Union[InotifyWatcher, PollingWatcher]] = None) -> None:
+    """
+    stop_event がセットされるまで変更を監視し、出力ファイルを更新し続ける
+
+    session は build 済みであること。変更を検知したら debounce 秒間新しい変更がなくなるまで待ち、
+    まとめて反映する。
+
+    Args:
+        session: build 済みの WatchSession
+        stop_event: 監視を終了するためのイベント
+        debounce: 連続した変更をまとめるための待ち時間（秒）
+        poll_interval: 変更を確認する間隔（秒）
+        on_update: 出力ファイルを書き換えるたびに呼び出す関数
+        watcher: 変更を検知するクラス。None の場合は create_watcher で生成する
+    """
+    stop_event = stop_event or threading.Event()
+    watcher = watcher or create_watcher(stop_event)
+    try:
+        try:
+            watcher.update(session.directories, session.stat_keys)
+        except OSError as e:
+            logger.warning(f"inotify で監視できないため、ポーリングに切り替えます: {e}")
+            watcher.close()
+            watcher = PollingWatcher(stop_event)
+            watcher.update(session.directories, session.stat_keys)
+
+        while not stop_event.is_set():
+            changed = watcher.poll(poll_interval)
+            if not changed:
+                continue
+            while not stop_event.is_set():
+                more = watcher.poll(debounce)
+                if not more:
+                    break
+                changed |= more
+            try:
+                if session.update(changed) and on_update is not None:
+                    on_update(session)
+            except Exception as e:
+                logger.error(f"サマリーの更新中にエラーが発生しました: {e}")
+            watcher.update(session.directories, session.stat_keys)
+    finally:
+        watcher.close()
+
+
+def _encode(section: str) -> bytes:
+    """
+    出力の断片を、テキストモードで書き込んだ場合と同じバイト列に変換する
+
+    Args:
+        section: 出力の断片
+
+    Returns:
+        bytes: UTF-8 のバイト列
+    """
+    if os.linesep != "\n":
+        section = section.replace("\n", os.linesep)
+    return section.encode("utf-8")
+
+
+def _rewrite(output_path: Path, previous: List[bytes], current: List[bytes]) -> int:
+    """
+    前回の出力と比べて変わった断片だけを書き換える
+
+    Args:
+        output_path: 出力ファイルのパス
+        previous: 前回書き込んだ断片
+        current: 今回書き込む断片
+
+    Returns:
+        int: 書き込んだバイト数
+    """
+    written = 0
+    with output_path.open("r+b") as output_stream:
+        if len(previous) == len(current) and all(len(old) == len(new) for old, new in zip(previous, current)):
+            offset = 0
+            for old, new in zip(previous, current):
+                if old != new:
+                    output_stream.seek(offset)
+                    output_stream.write(new)
+                    written += len(new)
+                offset += len(old)
+            return written
+
+        first = next((index for index, (old, new) in enumerate(zip(previous, current)) if old != new),
+                     min(len(previous), len(current)))
+        output_stream.seek(sum(len(chunk) for chunk in previous[:first]))
+        for chunk in current[first:]:
+            output_stream.write(chunk)
+            written += len(chunk)
+        output_stream.truncate()
+    return written